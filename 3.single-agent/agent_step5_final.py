@@ -1,23 +1,20 @@
-import os
-from crewai import Agent, Crew, Task, Process, LLM
-from dotenv import load_dotenv
+from crewai import Agent, Crew, Task, Process
+from config import get_bedrock_model_id
+from prompt_cache import CachingLLM
 from student_db_tool import StudentDBTool
 from course_search_tool import CourseSearchTool, get_current_semester_info
 from enrollments_search_tool import EnrollmentsSearchTool
 from graduation_rag_tool import GraduationRAGTool
 from recommendation_engine_tool import RecommendationEngineTool
 
-# Load environment variables
-load_dotenv()
-
 # 현재 날짜와 학기 정보 가져오기
 semester_info = get_current_semester_info()
 
 # AWS Bedrock configuration using CrewAI LLM
-model_id = os.environ["BEDROCK_MODEL_ID"]
+model_id = get_bedrock_model_id()
 
-# Create LLM instance with Bedrock
-llm = LLM(
+# Create LLM instance with Bedrock (정적 system 접두부는 프롬프트 캐시 사용)
+llm = CachingLLM(
     model=f"bedrock/{model_id}",
     temperature=0.2,
     max_tokens=1000
@@ -34,13 +31,7 @@ recommendation_engine_tool = RecommendationEngineTool()
 agent = Agent(
     role='종합 학사 상담 및 수강 추천 전문가',
     goal='학생의 모든 학사 정보를 종합 분석하여 개인화된 수강 추천과 졸업 로드맵을 제공합니다',
-    backstory=f'''당신은 모든 학사 업무를 종합적으로 처리하는 최고 수준의 학사 상담 전문가입니다.
-    
-    📅 현재 날짜 정보:
-    - 오늘 날짜: {semester_info['current_date']}
-    - 현재 학기: {"방학 기간" if not semester_info['current_semester'] else f"{semester_info['current_semester_year']}년 {semester_info['current_semester']}학기"}
-    - 다음 학기: {semester_info['next_semester_year']}년 {semester_info['next_semester']}학기
-    - 지난 학기: {semester_info['prev_semester_year']}년 {semester_info['prev_semester']}학기
+    backstory='''당신은 모든 학사 업무를 종합적으로 처리하는 최고 수준의 학사 상담 전문가입니다.
     
     주요 역할:
     - 학생의 기본 정보를 정확히 파악합니다
@@ -83,10 +74,17 @@ agent = Agent(
     verbose=True
 )
 
+# 현재 날짜 정보는 매번 바뀌므로 배경 설명(정적 접두부)이 아닌 Task 설명(동적 접미부)에 넣습니다
+date_context = f'''📅 현재 날짜 정보:
+- 오늘 날짜: {semester_info['current_date']}
+- 현재 학기: {"방학 기간" if not semester_info['current_semester'] else f"{semester_info['current_semester_year']}년 {semester_info['current_semester']}학기"}
+- 다음 학기: {semester_info['next_semester_year']}년 {semester_info['next_semester']}학기
+- 지난 학기: {semester_info['prev_semester_year']}년 {semester_info['prev_semester']}학기'''
+
 def create_task(user_question: str) -> Task:
     """사용자 질문에 따라 Task를 생성합니다."""
     return Task(
-        description=f"모든 학사 정보 도구를 종합적으로 활용하여 최고 수준의 개인화된 상담과 추천을 제공해주세요: {user_question}",
+        description=f"{date_context}\n\n모든 학사 정보 도구를 종합적으로 활용하여 최고 수준의 개인화된 상담과 추천을 제공해주세요: {user_question}",
         agent=agent,
         expected_output="학생의 모든 정보를 종합 분석한 개인화된 전문 상담 및 구체적인 실행 계획"
     )
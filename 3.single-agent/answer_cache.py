@@ -0,0 +1,263 @@
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from invalidation import CATALOG_SCOPE, invalidation_bus, scope_student_id, student_scope
+
+# 질문 끝의 존댓말/요청 표현은 같은 의도로 봅니다.
+_TRAILING_POLITE = re.compile(r'(해\s*주세요|해\s*줘|해\s*주실래요|알려\s*주세요|알려\s*줘|보여\s*주세요|보여\s*줘|요)$')
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+
+def normalize_question(question: str) -> str:
+    """캐시 키용으로 질문을 정규화합니다 (유니코드 정규화, 소문자, 문장부호·공백·요청 어미 제거)."""
+    text = unicodedata.normalize('NFKC', question).lower()
+    text = _PUNCTUATION.sub(' ', text)
+    text = ' '.join(text.split())
+    text = _TRAILING_POLITE.sub('', text).strip()
+    return text.replace(' ', '')
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class AnswerCache:
+    """process_user_query 앞단의 답변 캐시입니다.
+
+    키: 정규화된 질문 + 학번 + 학기 + 데이터 버전 스탬프.
+    embed_fn이 있으면 같은 학번/학기/버전 범위 안에서 임베딩 유사도로 바꿔 말한 질문도 찾습니다.
+    LRU(max_entries)와 TTL(ttl_seconds)로 항목을 제거합니다.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 3600,
+                 embed_fn: Optional[Callable[[str], List[float]]] = None,
+                 similarity_threshold: float = 0.92):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'exact_hits': 0, 'semantic_hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'saved_seconds': 0.0}
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry['stored_at'] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+            self.stats['evictions'] += 1
+
+    def _embed(self, text: str) -> Optional[List[float]]:
+        """유사 질문 검색용 임베딩입니다. 임베딩 호출이 실패하면(스로틀링, 회로 열림 등) None을 반환해 정확히 일치하는 질문만 찾습니다."""
+        if not self.embed_fn:
+            return None
+        try:
+            return self.embed_fn(text)
+        except Exception as e:
+            print(f"답변 캐시 임베딩 중 오류 (정확히 일치하는 질문만 사용): {str(e)}")
+            return None
+
+    def get(self, question: str, student_id: str, semester: str, data_version: str) -> Optional[str]:
+        """캐시된 답변을 반환합니다. 없으면 None."""
+        key = (normalize_question(question), student_id, semester, data_version)
+        now = time.time()
+        with self._lock:
+            self._evict_expired(now)
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+                self.stats['exact_hits'] += 1
+                self.stats['saved_seconds'] += entry['latency']
+                return entry['answer']
+            candidates = [
+                (k, e) for k, e in self._entries.items()
+                if k[1:] == key[1:] and e['embedding'] is not None
+            ]
+
+        query_embedding = self._embed(key[0]) if candidates else None
+        if query_embedding is not None:
+            best_key, best_score = None, 0.0
+            for candidate_key, entry in candidates:
+                score = _cosine(query_embedding, entry['embedding'])
+                if score > best_score:
+                    best_key, best_score = candidate_key, score
+            if best_score >= self.similarity_threshold:
+                with self._lock:
+                    entry = self._entries.get(best_key)
+                    if entry:
+                        self._entries.move_to_end(best_key)
+                        self.stats['semantic_hits'] += 1
+                        self.stats['saved_seconds'] += entry['latency']
+                        return entry['answer']
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, question: str, student_id: str, semester: str, data_version: str,
+            answer: str, latency: float):
+        """답변과 생성에 걸린 시간(절약 시간 계산용)을 저장합니다."""
+        key = (normalize_question(question), student_id, semester, data_version)
+        embedding = self._embed(key[0])
+        with self._lock:
+            self._entries[key] = {
+                'answer': answer,
+                'latency': latency,
+                'embedding': embedding,
+                'stored_at': time.time()
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def invalidate(self, student_id: Optional[str] = None):
+        """특정 학생(또는 전체)의 캐시 항목을 제거합니다. 키의 학번 부분에 그 학생이 들어 있는 항목이 모두 대상입니다."""
+        with self._lock:
+            if student_id is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if student_id in k[1].split(',')]:
+                del self._entries[key]
+
+    def invalidate_scope(self, scope: str):
+        """invalidation_bus 구독용: 카탈로그가 바뀌면 전체, 학생 범위면 그 학생의 항목을 제거합니다."""
+        student_id = scope_student_id(scope)
+        if scope == CATALOG_SCOPE or student_id is not None:
+            self.invalidate(student_id)
+            with self._lock:
+                self.stats['invalidations'] += 1
+
+    def report(self) -> Dict:
+        """적중률과 절약한 LLM 시간을 반환합니다."""
+        with self._lock:
+            hits = self.stats['exact_hits'] + self.stats['semantic_hits']
+            lookups = hits + self.stats['misses']
+            return {
+                **self.stats,
+                'saved_seconds': round(self.stats['saved_seconds'], 3),
+                'entries': len(self._entries),
+                'hit_ratio': round(hits / lookups, 3) if lookups else 0.0
+            }
+
+
+class DataVersionStamp:
+    """학생 이수 내역과 강의 카탈로그의 변경을 감지하는 데이터 버전 스탬프입니다.
+
+    변경 추적 트리거(change_tracking.py install)가 설치되어 있으면 data_versions의 범위별 버전을 스탬프로 쓰고,
+    없으면 가벼운 집계 쿼리 결과를 스탬프로 사용합니다. 데이터가 바뀌면 스탬프가 달라져
+    이전 캐시 키가 더 이상 맞지 않게 됩니다. 집계 방식은 poll_interval 동안 마지막 값을 재사용합니다.
+    """
+
+    # 도구가 보여주는 열(과목·학과 정보, 학생 정보와 이수 내역)이 하나라도 바뀌면 스탬프가 달라지도록 모두 해시합니다
+    CATALOG_QUERY = (
+        "SELECT (SELECT COUNT(*) FROM courses) + (SELECT COUNT(*) FROM major) AS n, "
+        "(SELECT COALESCE(SUM(CRC32(CONCAT_WS('|', course_code, course_name, credits, course_type, department, professor, "
+        "note, target_grade, offered_year, offered_semester))), 0) FROM courses) + "
+        "(SELECT COALESCE(SUM(CRC32(CONCAT_WS('|', major_code, college, department, dept_code, major_name))), 0) FROM major) AS h"
+    )
+    STUDENT_QUERY = (
+        "SELECT COUNT(*) AS n, COALESCE(SUM(CRC32(CONCAT_WS('|', course_code, enrollment_type, earned_credits, "
+        "offering_department, enrollment_semester, grade))), 0) + "
+        "(SELECT COALESCE(SUM(CRC32(CONCAT_WS('|', name, major_code, admission_year, completed_semester))), 0) "
+        "FROM students WHERE student_id = %s) AS h FROM enrollments WHERE student_id = %s"
+    )
+
+    def __init__(self, poll_interval: float = 30.0, watcher=None):
+        self.poll_interval = poll_interval
+        self.watcher = watcher
+        self._cached = {}
+        self._lock = threading.Lock()
+
+    def _query_stamp(self, sql: str, params: tuple) -> str:
+        from db import get_connection
+
+        connection = get_connection()
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            row = cursor.fetchone() or {}
+            cursor.close()
+            return f"{row.get('n', 0)}:{row.get('h', 0)}"
+        finally:
+            connection.close()
+
+    def _stamp(self, scope: str, sql: str, params: tuple) -> str:
+        now = time.time()
+        with self._lock:
+            cached = self._cached.get(scope)
+            if cached and now - cached[1] < self.poll_interval:
+                return cached[0]
+        try:
+            value = self._query_stamp(sql, params)
+        except Exception as e:
+            # 스탬프를 구할 수 없으면 캐시를 사용하지 않도록 매번 다른 값을 반환합니다.
+            print(f"데이터 버전 조회 중 오류: {str(e)}")
+            return f"unknown-{now}"
+        with self._lock:
+            self._cached[scope] = (value, now)
+        return value
+
+    def current(self, student_key: str) -> str:
+        """카탈로그 + 학생 이수 내역 버전 스탬프를 반환합니다. student_key는 학번(여러 명이면 쉼표로 구분)입니다."""
+        student_ids = student_key.split(',')
+        if self.watcher is not None and self.watcher.poll_if_due():
+            students = '.'.join(str(self.watcher.version(student_scope(sid))) for sid in student_ids)
+            return f"v{self.watcher.version(CATALOG_SCOPE)}/{students}"
+        catalog = self._stamp('catalog', self.CATALOG_QUERY, ())
+        students = '.'.join(self._stamp(student_scope(sid), self.STUDENT_QUERY, (sid, sid)) for sid in student_ids)
+        return f"c{catalog}/s{students}"
+
+
+def is_known_version(data_version: str) -> bool:
+    """스탬프 조회에 실패한 버전(unknown-…)은 다시 맞을 수 없으므로 캐시하지 않습니다."""
+    return 'unknown-' not in data_version
+
+
+_answer_cache = None
+_data_version = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """환경변수 설정으로 공용 답변 캐시를 만들어 반환합니다."""
+    global _answer_cache
+    with _cache_lock:
+        if _answer_cache is None:
+            embed_fn = None
+            if os.environ.get('ANSWER_CACHE_SEMANTIC', '0') == '1':
+                from graduation_rag_tool import get_embeddings
+                embed_fn = get_embeddings().embed_query
+            _answer_cache = AnswerCache(
+                max_entries=int(os.environ.get('ANSWER_CACHE_MAX_ENTRIES', '1000')),
+                ttl_seconds=float(os.environ.get('ANSWER_CACHE_TTL_SECONDS', '3600')),
+                embed_fn=embed_fn,
+                similarity_threshold=float(os.environ.get('ANSWER_CACHE_SIMILARITY', '0.92'))
+            )
+            invalidation_bus.subscribe('answer_cache', _answer_cache.invalidate_scope)
+    return _answer_cache
+
+
+def get_data_version() -> DataVersionStamp:
+    """공용 데이터 버전 스탬프를 반환합니다."""
+    global _data_version
+    with _cache_lock:
+        if _data_version is None:
+            watcher = None
+            if os.environ.get('DATA_VERSION_TRIGGERS', '1') == '1':
+                from change_tracking import get_version_watcher
+                watcher = get_version_watcher()
+            _data_version = DataVersionStamp(float(os.environ.get('DATA_VERSION_POLL_SECONDS', '30')), watcher)
+    return _data_version
+
+
+def is_answer_cache_enabled() -> bool:
+    """답변 캐시 사용 여부 (ANSWER_CACHE=0이면 비활성화)."""
+    return os.environ.get('ANSWER_CACHE', '1') != '0'
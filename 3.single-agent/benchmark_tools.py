@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+# (시나리오 이름, 도구 클래스 이름, 입력) — 도구 _run의 분기를 하나씩 실행합니다
+SCENARIOS = [
+    ('student.my_info', 'StudentDBTool', {'query': "내 정보 조회"}),
+    ('student.similar', 'StudentDBTool', {'query': "나와 비슷한 학생들 정보"}),
+    ('course.next_semester', 'CourseSearchTool', {'query': "다음 학기 개설 과목"}),
+    ('course.prev_semester', 'CourseSearchTool', {'query': "지난 학기 개설 과목"}),
+    ('course.this_semester', 'CourseSearchTool', {'query': "이번 학기 개설 과목"}),
+    ('course.all', 'CourseSearchTool', {'query': "전체 과목 목록"}),
+    ('course.direct_sql', 'CourseSearchTool', {'query': "SELECT course_code, course_name FROM courses WHERE credits = 3"}),
+    ('course.natural_grade_dept', 'CourseSearchTool', {'query': "컴퓨터공학과 3학년 전공 과목"}),
+    ('course.natural_keyword', 'CourseSearchTool', {'query': "심리학 관련 과목"}),
+    ('enrollment.mine', 'EnrollmentsSearchTool', {'query': "내가 이수한 과목"}),
+    ('enrollment.semester', 'EnrollmentsSearchTool', {'query': "2023년 1학기 이수 과목"}),
+    ('enrollment.grade', 'EnrollmentsSearchTool', {'query': "A+ 받은 과목"}),
+    ('enrollment.stats', 'EnrollmentsSearchTool', {'query': "이수 통계"}),
+    ('recommendation', 'RecommendationEngineTool', {'student_id': None}),
+]
+RAG_SCENARIOS = [
+    ('rag.requirements', 'GraduationRAGTool', {'query': "졸업 요건 알려줘"}),
+    ('rag.credits', 'GraduationRAGTool', {'query': "전공 필수 학점은 몇 학점인가요"}),
+]
+TOOL_MODULES = {
+    'StudentDBTool': 'student_db_tool',
+    'CourseSearchTool': 'course_search_tool',
+    'EnrollmentsSearchTool': 'enrollments_search_tool',
+    'RecommendationEngineTool': 'recommendation_engine_tool',
+    'GraduationRAGTool': 'graduation_rag_tool',
+}
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def _lookup_student_id(name: str = '도윤정') -> str:
+    """추천 시나리오에 쓸 인증 학생의 학번을 조회합니다."""
+    from db import get_connection, READ
+    from repository import Repository
+
+    connection = get_connection(READ)
+    try:
+        student_id = Repository(connection).student_id_by_name(name)
+    finally:
+        connection.close()
+    if not student_id:
+        raise RuntimeError(f"학생 '{name}'을 찾을 수 없습니다. synthetic_data.py로 데이터를 먼저 생성하세요.")
+    return str(student_id)
+
+
+def measure(run: Callable[[], str], iterations: int, warmup: int, concurrency: int = 1) -> Dict:
+    """warmup 후 iterations회 실행한 지연 시간 분포(ms)와 처리량을 반환합니다."""
+    for _ in range(warmup):
+        run()
+
+    def timed(_):
+        started = time.perf_counter()
+        output = run()
+        return (time.perf_counter() - started) * 1000, len(output or '')
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = list(executor.map(timed, range(iterations)))
+    else:
+        samples = [timed(i) for i in range(iterations)]
+    wall = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in samples)
+    return {
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'p50_ms': round(_percentile(latencies, 0.50), 2),
+        'p95_ms': round(_percentile(latencies, 0.95), 2),
+        'p99_ms': round(_percentile(latencies, 0.99), 2),
+        'mean_ms': round(sum(latencies) / len(latencies), 2),
+        'throughput_per_s': round(iterations / wall, 1) if wall else 0.0,
+        'output_chars': samples[-1][1]
+    }
+
+
+def run_benchmarks(iterations: int = 20, warmup: int = 3, concurrency: int = 1,
+                   include_rag: bool = False, only: List[str] = None) -> Dict:
+    """시나리오별로 도구 _run을 직접 호출해 측정합니다 (에이전트/LLM은 거치지 않음)."""
+    import importlib
+
+    scenarios = SCENARIOS + (RAG_SCENARIOS if include_rag else [])
+    if only:
+        scenarios = [s for s in scenarios if any(s[0].startswith(prefix) for prefix in only)]
+
+    tools = {}
+    results = {}
+    student_id = None
+    for name, tool_class, arguments in scenarios:
+        if tool_class not in tools:
+            module = importlib.import_module(TOOL_MODULES[tool_class])
+            tools[tool_class] = getattr(module, tool_class)()
+        tool = tools[tool_class]
+        if 'student_id' in arguments:
+            student_id = student_id or _lookup_student_id()
+            arguments = {**arguments, 'student_id': student_id}
+        results[name] = measure(lambda: tool._run(**arguments), iterations, warmup, concurrency)
+        result = results[name]
+        print(f"{name:<28} p50 {result['p50_ms']:>8}ms  p95 {result['p95_ms']:>8}ms  "
+              f"p99 {result['p99_ms']:>8}ms  {result['throughput_per_s']:>7}/s")
+    return {
+        'backend': os.environ.get('DB_BACKEND', 'mysql'),
+        'iterations': iterations,
+        'concurrency': concurrency,
+        'scenarios': results
+    }
+
+
+def compare_to_baseline(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """기준 대비 p95가 tolerance 이상 늘어난 시나리오를 반환합니다."""
+    failures = []
+    for name, result in report['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if not previous:
+            continue
+        limit = previous['p95_ms'] * (1 + tolerance)
+        if result['p95_ms'] > limit:
+            failures.append(f"{name}: p95 {result['p95_ms']}ms가 기준 {previous['p95_ms']}ms 대비 {tolerance:.0%} 이상 증가")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="도구별 벤치마크 (합성 데이터: DB_BACKEND=sqlite SQLITE_PATH=...)")
+    parser.add_argument('--iterations', type=int, default=20, help="시나리오별 측정 횟수")
+    parser.add_argument('--warmup', type=int, default=3, help="측정 전 워밍업 횟수")
+    parser.add_argument('--concurrency', type=int, default=1, help="동시 실행 스레드 수")
+    parser.add_argument('--include-rag', action='store_true', help="GraduationRAGTool 시나리오 포함 (벡터 저장소 필요)")
+    parser.add_argument('--only', nargs='*', help="이 접두사로 시작하는 시나리오만 실행 (예: course enrollment.stats)")
+    parser.add_argument('--baseline', help="비교할 이전 결과 JSON 경로")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="기준 대비 허용 p95 증가율 (기본값: 0.2 = 20%%)")
+    parser.add_argument('--save', help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.iterations, args.warmup, args.concurrency, args.include_rag, args.only)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            failures = compare_to_baseline(report, json.load(f), args.tolerance)
+        if failures:
+            print("\n❌ 도구 성능 회귀:")
+            for failure in failures:
+                print(f"- {failure}")
+            sys.exit(1)
+    print("\n✅ 도구 벤치마크 완료")
@@ -0,0 +1,150 @@
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from resilience import mark_degraded
+
+# 영문+숫자(과목 코드 CSE101 등), 숫자(학점 130 등), 한글 연속 구간
+_TOKEN_PATTERN = re.compile(r'[a-z]+\d*[a-z\d]*|\d+|[가-힣]+')
+# 한글 어절 끝의 조사 (긴 것부터 검사)
+_PARTICLES = sorted([
+    '에서는', '으로는', '에서', '으로', '에게', '까지', '부터', '이나', '이라', '보다',
+    '은', '는', '이', '가', '을', '를', '의', '에', '로', '과', '와', '도', '만', '나'
+], key=len, reverse=True)
+
+
+def _strip_particle(word: str) -> str:
+    for particle in _PARTICLES:
+        if len(word) > len(particle) + 1 and word.endswith(particle):
+            return word[:-len(particle)]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """BM25용 토큰 목록을 반환합니다.
+
+    영문/숫자 토큰은 그대로 두고, 한글 어절은 조사를 떼어낸 뒤 어절 자체와 글자 bigram을 함께 사용합니다
+    ('졸업논문은' → '졸업논문', '졸업', '업논', '논문'). 형태소 분석기 없이도 복합어 일부가 일치하도록 하기 위함입니다.
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(unicodedata.normalize('NFKC', text).lower()):
+        if not '가' <= token[0] <= '힣':
+            tokens.append(token)
+            continue
+        word = _strip_particle(token)
+        tokens.append(word)
+        if len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def metadata_matches(metadata: Optional[Dict], filters: Optional[Dict]) -> bool:
+    """metadata가 filters의 모든 조건을 만족하는지 반환합니다 (JSONB @>와 같은 의미, 값은 문자열로 비교)."""
+    if not filters:
+        return True
+    metadata = metadata or {}
+    return all(key in metadata and str(metadata[key]) == str(value) for key, value in filters.items())
+
+
+class BM25Index:
+    """documents 본문에 대한 메모리 내 BM25 역색인입니다."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents = []          # [{'content': ..., 'metadata': ...}]
+        self._doc_lengths = []
+        self._postings = defaultdict(list)   # 토큰 → [(문서 번호, 빈도)]
+        self._total_length = 0
+
+    def add(self, content: str, metadata: Optional[Dict] = None):
+        doc_index = len(self.documents)
+        term_counts = Counter(tokenize(content))
+        for term, count in term_counts.items():
+            self._postings[term].append((doc_index, count))
+        self.documents.append({'content': content, 'metadata': metadata or {}})
+        self._doc_lengths.append(sum(term_counts.values()))
+        self._total_length += self._doc_lengths[-1]
+
+    def _idf(self, term: str) -> float:
+        doc_freq = len(self._postings.get(term, ()))
+        return math.log(1 + (len(self.documents) - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    def search(self, query: str, top_k: int = 5, filters: Optional[Dict] = None) -> List[Dict]:
+        """BM25 점수 상위 top_k 문서를 반환합니다 (filters는 metadata 조건)."""
+        scores = defaultdict(float)
+        avg_length = self._total_length / len(self.documents) if self.documents else 1
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for doc_index, count in postings:
+                length_norm = 1 - self.b + self.b * self._doc_lengths[doc_index] / (avg_length or 1)
+                scores[doc_index] += idf * count * (self.k1 + 1) / (count + self.k1 * length_norm)
+
+        ranked = sorted(
+            (item for item in scores.items() if metadata_matches(self.documents[item[0]]['metadata'], filters)),
+            key=lambda item: item[1], reverse=True
+        )
+        return [
+            {**self.documents[doc_index], 'bm25': round(score, 4)}
+            for doc_index, score in ranked[:top_k]
+        ]
+
+    def __len__(self):
+        return len(self.documents)
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict]], k: int = 60, key: str = 'content') -> List[Dict]:
+    """여러 검색 결과 목록을 RRF(Σ 1/(k + 순위))로 합칩니다.
+
+    같은 문서(key 기준)의 필드는 합쳐지므로 벡터 결과의 similarity와 BM25 점수가 함께 남습니다.
+    """
+    fused: Dict[str, Dict] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, 1):
+            entry = fused.setdefault(doc[key], {'rrf_score': 0.0})
+            for field, value in doc.items():
+                entry.setdefault(field, value)
+            entry['rrf_score'] += 1.0 / (k + rank)
+    return sorted(fused.values(), key=lambda doc: doc['rrf_score'], reverse=True)
+
+
+_index: Optional[BM25Index] = None
+_index_loaded_at = 0.0
+# 마지막 구축이 실패했으면 다시 시도할 시각 (그 전까지는 문서를 다시 읽지 않음)
+_retry_at = None
+_index_lock = threading.Lock()
+
+
+def get_bm25_index(load_documents, refresh_seconds: float = 600, retry_seconds: float = 30) -> Optional[BM25Index]:
+    """공용 BM25 색인을 반환합니다.
+
+    load_documents()는 (content, metadata) 목록을 반환하는 함수이며,
+    refresh_seconds가 지나면 문서를 다시 읽어 색인을 재구축합니다. 실패하면 이전 색인(없으면 None)을 유지하고
+    retry_seconds 동안은 다시 읽지 않아 DB 장애 중에 모든 요청이 잠금을 잡은 채 재구축을 기다리지 않습니다.
+    실패 후에 반환하는 색인은 오래되었을 수 있으므로 요청을 축소 응답('bm25')으로 표시합니다.
+    """
+    global _index, _index_loaded_at, _retry_at
+    with _index_lock:
+        now = time.time()
+        if _retry_at is not None and now < _retry_at:
+            mark_degraded('bm25')
+            return _index
+        if _retry_at is None and _index is not None and now - _index_loaded_at < refresh_seconds:
+            return _index
+        try:
+            index = BM25Index()
+            for content, metadata in load_documents():
+                index.add(content, metadata)
+            _index, _index_loaded_at, _retry_at = index, time.time(), None
+        except Exception as e:
+            print(f"BM25 색인 구축 중 오류 ({retry_seconds:.0f}초 후 재시도): {str(e)}")
+            _retry_at = now + retry_seconds
+            mark_degraded('bm25')
+        return _index
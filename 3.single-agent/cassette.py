@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# 매일 바뀌는 날짜 정보는 지문에서 제외해야 다른 날 재생해도 같은 요청으로 인식됩니다
+_DATE_CONTEXT = re.compile(r'📅 현재 날짜 정보:.*?(?:\n\s*\n|$)', re.S)
+_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+class CassetteMiss(KeyError):
+    """재생 모드에서 녹화되지 않은 요청이 들어왔을 때 발생합니다."""
+
+
+def _message_text(message) -> str:
+    if not isinstance(message, dict):
+        return str(message)
+    content = message.get('content', '')
+    if isinstance(content, list):
+        return ''.join(block.get('text', '') for block in content if isinstance(block, dict))
+    return str(content)
+
+
+def normalize_messages(messages) -> List[List[str]]:
+    if isinstance(messages, str):
+        messages = [{'role': 'user', 'content': messages}]
+    normalized = []
+    for message in messages:
+        text = _DATE.sub('<date>', _DATE_CONTEXT.sub('', _message_text(message)))
+        normalized.append([message.get('role', '') if isinstance(message, dict) else '', text.strip()])
+    return normalized
+
+
+def fingerprint(kind: str, model: str, payload) -> str:
+    raw = json.dumps([kind, model, payload], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class Cassette:
+    """LLM 응답과 임베딩을 요청 지문(sha256)별로 JSONL 파일에 녹화하고 재생합니다.
+
+    record 모드는 실제 호출 결과를 파일 끝에 추가하고(같은 지문은 처음 것만 보관),
+    replay 모드는 파일에서만 응답을 꺼내며 없는 요청은 CassetteMiss로 실패시킵니다.
+    """
+
+    def __init__(self, path: str, mode: str = 'replay'):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"지원하지 않는 카세트 모드입니다: {mode}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self.stats = {'hits': 0, 'misses': 0, 'recorded': 0}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry['key'], entry)
+        elif mode == 'replay':
+            raise FileNotFoundError(f"카세트 파일이 없습니다: {path} (먼저 CASSETTE_MODE=record로 녹화하세요)")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, kind: str, model: str, payload):
+        key = fingerprint(kind, model, payload)
+        with self._lock:
+            entry = self._entries.get(key)
+            self.stats['hits' if entry else 'misses'] += 1
+        if entry is None:
+            raise CassetteMiss(f"녹화되지 않은 {kind} 요청입니다 (model={model}, key={key[:12]})")
+        return entry['response']
+
+    def record(self, kind: str, model: str, payload, response):
+        key = fingerprint(kind, model, payload)
+        with self._lock:
+            if key in self._entries:
+                return
+            entry = {'key': key, 'kind': kind, 'model': model, 'response': response}
+            self._entries[key] = entry
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.stats['recorded'] += 1
+
+    def call(self, kind: str, model: str, payload, run: Callable):
+        """replay면 녹화된 응답을, record면 run() 결과를 녹화한 뒤 반환합니다."""
+        if self.mode == 'replay':
+            return self.lookup(kind, model, payload)
+        response = run()
+        if isinstance(response, (str, list)):
+            self.record(kind, model, payload, response)
+        return response
+
+    def llm_call(self, model: str, messages, run: Callable[[], str]) -> str:
+        return self.call('llm', model, normalize_messages(messages), run)
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {'mode': self.mode, 'entries': len(self._entries), **self.stats}
+
+
+class CassetteEmbeddings:
+    """임베딩 호출을 텍스트별로 녹화/재생하는 래퍼입니다 (재생 모드에서는 embeddings=None)."""
+
+    def __init__(self, embeddings, cassette: Cassette, model_id: str):
+        self.embeddings = embeddings
+        self.cassette = cassette
+        self.model_id = model_id
+        self.dimension = getattr(embeddings, 'dimension', None)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.cassette.call('embed_query', self.model_id, text, lambda: self.embeddings.embed_query(text))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [
+            self.cassette.call('embed_document', self.model_id, text, lambda text=text: self.embeddings.embed_documents([text])[0])
+            for text in texts
+        ]
+
+
+_cassette = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """CASSETTE_MODE=record|replay이면 CASSETTE_PATH(기본 .cache/cassette.jsonl)의 공용 카세트를 반환합니다."""
+    global _cassette
+    mode = os.environ.get('CASSETTE_MODE', '').lower()
+    if mode not in ('record', 'replay'):
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            path = os.environ.get('CASSETTE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'cassette.jsonl'))
+            _cassette = Cassette(path, mode)
+    return _cassette
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="질문 목록의 LLM/임베딩 응답 녹화 및 오프라인 재생")
+    parser.add_argument('mode', choices=['record', 'replay'])
+    parser.add_argument('questions', nargs='*', help="실행할 질문")
+    parser.add_argument('--questions-file', help="질문 목록 파일 (한 줄에 하나)")
+    parser.add_argument('--path', help="카세트 파일 경로 (기본 .cache/cassette.jsonl)")
+    parser.add_argument('--repeat', type=int, default=1, help="질문 목록 반복 횟수 (재생 시 지연 시간 측정용)")
+    args = parser.parse_args()
+
+    os.environ['CASSETTE_MODE'] = args.mode
+    if args.path:
+        os.environ['CASSETTE_PATH'] = args.path
+    # 매 실행이 전체 경로를 거치도록 답변 캐시는 끕니다
+    os.environ['ANSWER_CACHE'] = '0'
+    questions = list(args.questions)
+    if args.questions_file:
+        with open(args.questions_file, encoding='utf-8') as f:
+            questions += [line.strip() for line in f if line.strip()]
+
+    from main import process_user_query
+
+    cassette = get_cassette()
+    answers_path = cassette.path + '.answers.json'
+    recorded_answers = {}
+    if args.mode == 'replay' and os.path.exists(answers_path):
+        with open(answers_path, encoding='utf-8') as f:
+            recorded_answers = json.load(f)
+
+    answers, mismatches = {}, 0
+    for _ in range(args.repeat):
+        for question in questions:
+            started = time.perf_counter()
+            answers[question] = process_user_query(question)
+            elapsed = (time.perf_counter() - started) * 1000
+            same = '' if question not in recorded_answers else (' (녹화 답변과 동일)' if recorded_answers[question] == answers[question] else ' ⚠️ 녹화 답변과 다름')
+            mismatches += same.startswith(' ⚠️')
+            print(f"{elapsed:>9.1f}ms  {question}{same}")
+
+    if args.mode == 'record':
+        with open(answers_path, 'w', encoding='utf-8') as f:
+            json.dump(answers, f, ensure_ascii=False, indent=2)
+    print(f"\n카세트 현황: {cassette.report()}")
+    if mismatches:
+        print(f"⚠️ 녹화 답변과 다른 답변 {mismatches}건 (도구 결과가 바뀌었는지 확인하세요)")
@@ -0,0 +1,240 @@
+import argparse
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from invalidation import CATALOG_SCOPE, invalidation_bus, student_scope
+
+# 트리거가 범위별 버전을 올리는 테이블 (updated_ms: 마지막 변경 시각, epoch 밀리초)
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS data_versions (
+        scope VARCHAR(64) PRIMARY KEY,
+        version BIGINT NOT NULL,
+        updated_ms BIGINT NOT NULL
+    )
+"""
+SCHEMA_INDEX = "CREATE INDEX idx_data_versions_updated ON data_versions (updated_ms)"
+
+# (테이블, 범위 식 생성 함수) — row는 'NEW' 또는 'OLD'
+TRACKED_TABLES = [
+    ('courses', lambda row, concat: f"'{CATALOG_SCOPE}'"),
+    ('major', lambda row, concat: f"'{CATALOG_SCOPE}'"),
+    ('students', lambda row, concat: concat(f"'{student_scope('')}'", f"{row}.student_id")),
+    ('enrollments', lambda row, concat: concat(f"'{student_scope('')}'", f"{row}.student_id")),
+]
+EVENTS = [('INSERT', ['NEW']), ('UPDATE', ['OLD', 'NEW']), ('DELETE', ['OLD'])]
+
+
+def _now_ms(backend: str) -> str:
+    if backend == 'sqlite':
+        return "CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER)"
+    return "ROUND(UNIX_TIMESTAMP(NOW(3)) * 1000)"
+
+
+def _concat(backend: str) -> Callable[[str, str], str]:
+    if backend == 'sqlite':
+        return lambda a, b: f"{a} || {b}"
+    return lambda a, b: f"CONCAT({a}, {b})"
+
+
+def bump_sql(backend: str, scope_expr: str) -> str:
+    """scope_expr 범위의 버전을 1 올리는 upsert 문장입니다."""
+    values = f"INSERT INTO data_versions (scope, version, updated_ms) VALUES ({scope_expr}, 1, {_now_ms(backend)})"
+    if backend == 'sqlite':
+        return values + " ON CONFLICT(scope) DO UPDATE SET version = version + 1, updated_ms = excluded.updated_ms"
+    return values + " ON DUPLICATE KEY UPDATE version = version + 1, updated_ms = VALUES(updated_ms)"
+
+
+def trigger_name(table: str, event: str) -> str:
+    return f"trg_{table}_{event.lower()}_version"
+
+
+def create_trigger_sql(backend: str, table: str, event: str) -> str:
+    scope_fn = dict(TRACKED_TABLES)[table]
+    rows = dict(EVENTS)[event]
+    scopes = []
+    for row in rows:
+        scope = scope_fn(row, _concat(backend))
+        if scope not in scopes:
+            scopes.append(scope)
+    body = ' '.join(bump_sql(backend, scope) + ';' for scope in scopes)
+    return f"CREATE TRIGGER {trigger_name(table, event)} AFTER {event} ON {table} FOR EACH ROW BEGIN {body} END"
+
+
+def _trigger_exists(cursor, backend: str, name: str) -> bool:
+    if backend == 'sqlite':
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = %s", (name,))
+    else:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.triggers WHERE trigger_schema = DATABASE() AND trigger_name = %s",
+            (name,)
+        )
+    return cursor.fetchone() is not None
+
+
+def install(connection, backend: str):
+    """data_versions 테이블과 변경 추적 트리거를 만듭니다. 이미 있는 트리거는 건너뜁니다.
+
+    대량 적재(synthetic_data.py) 뒤에 설치해야 적재 중 행마다 트리거가 실행되지 않습니다.
+    """
+    cursor = connection.cursor()
+    cursor.execute(SCHEMA)
+    try:
+        cursor.execute(SCHEMA_INDEX)
+    except Exception:
+        pass   # 이미 있음
+    for table, _ in TRACKED_TABLES:
+        for event, _ in EVENTS:
+            name = trigger_name(table, event)
+            if _trigger_exists(cursor, backend, name):
+                print(f"  - {name}: 이미 있음")
+                continue
+            cursor.execute(create_trigger_sql(backend, table, event))
+            print(f"  - {name} 생성")
+    connection.commit()
+    cursor.close()
+
+
+def uninstall(connection, backend: str):
+    cursor = connection.cursor()
+    for table, _ in TRACKED_TABLES:
+        for event, _ in EVENTS:
+            name = trigger_name(table, event)
+            if _trigger_exists(cursor, backend, name):
+                cursor.execute(f"DROP TRIGGER {name}")
+                print(f"  - {name} 삭제")
+    connection.commit()
+    cursor.close()
+
+
+class VersionWatcher:
+    """data_versions를 주기적으로 읽어 범위별 버전을 기억하고, 바뀐 범위를 invalidation_bus로 알립니다.
+
+    - poll_interval초마다 한 번, 마지막으로 본 변경 시각에서 overlap초를 뺀 이후의 행만 읽습니다
+      (늦게 커밋된 트랜잭션이 더 이른 시각을 가질 수 있으므로 겹쳐 읽고, 버전 비교로 중복을 거릅니다).
+    - 첫 조회는 현재 버전을 기억만 하고 알리지 않습니다.
+    - 테이블이 없으면 available=False가 되어 호출하는 쪽이 기존 방식(집계 스탬프)을 씁니다.
+    """
+
+    def __init__(self, connect: Callable, poll_interval: float = 5.0, overlap: float = 5.0):
+        self.connect = connect
+        self.poll_interval = poll_interval
+        self.overlap = overlap
+        self.versions: Dict[str, int] = {}
+        self.available: Optional[bool] = None
+        self.loaded = False
+        self.high_water_ms = 0
+        self.polled_at = 0.0
+        self.polls = 0
+        self.changes = 0
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+
+    def _read_changes(self, since_ms: int) -> List[tuple]:
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("SELECT scope, version, updated_ms FROM data_versions WHERE updated_ms >= %s", (since_ms,))
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        finally:
+            connection.close()
+
+    def poll(self) -> List[str]:
+        """변경을 읽어 버전을 갱신하고, 바뀐 범위 목록을 알린 뒤 반환합니다."""
+        with self._lock:
+            first = not self.loaded
+            since = 0 if first else self.high_water_ms - int(self.overlap * 1000)
+            try:
+                rows = self._read_changes(since)
+            except Exception as e:
+                if self.available is not False:
+                    print(f"데이터 버전 테이블을 읽을 수 없어 집계 스탬프를 사용합니다: {str(e)}")
+                self.available = False
+                self.polled_at = time.time()
+                return []
+            self.available = True
+            self.loaded = True
+            self.polled_at = time.time()
+            self.polls += 1
+            changed = []
+            for scope, version, updated_ms in rows:
+                version, updated_ms = int(version), int(updated_ms)
+                self.high_water_ms = max(self.high_water_ms, updated_ms)
+                if self.versions.get(scope) != version:
+                    if not first:
+                        changed.append(scope)
+                    self.versions[scope] = version
+            self.changes += len(changed)
+        if changed:
+            invalidation_bus.publish(changed)
+        return changed
+
+    def poll_if_due(self) -> bool:
+        """poll_interval이 지났으면 poll하고, 버전 테이블을 쓸 수 있는지 반환합니다.
+
+        다른 요청이 이미 조회 중이면 기다리지 않고 마지막으로 읽은 버전을 씁니다.
+        """
+        if time.time() - self.polled_at >= self.poll_interval and self._poll_lock.acquire(blocking=False):
+            try:
+                self.poll()
+            finally:
+                self._poll_lock.release()
+        return bool(self.available)
+
+    def version(self, scope: str) -> int:
+        with self._lock:
+            return self.versions.get(scope, 0)
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                'available': self.available,
+                'scopes': len(self.versions),
+                'polls': self.polls,
+                'changes': self.changes,
+                'catalog_version': self.versions.get(CATALOG_SCOPE, 0)
+            }
+
+
+_watcher: Optional[VersionWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_version_watcher() -> VersionWatcher:
+    """주 DB의 data_versions를 읽는 공용 감시자를 반환합니다 (DATA_VERSION_WATCH_SECONDS, DATA_VERSION_OVERLAP_SECONDS)."""
+    from db import get_connection
+
+    global _watcher
+    with _watcher_lock:
+        if _watcher is None:
+            _watcher = VersionWatcher(
+                get_connection,
+                poll_interval=float(os.environ.get('DATA_VERSION_WATCH_SECONDS', '5')),
+                overlap=float(os.environ.get('DATA_VERSION_OVERLAP_SECONDS', '5'))
+            )
+    return _watcher
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="과목/학생/이수 내역 변경 추적 트리거 관리 (DB_BACKEND=mysql|sqlite)")
+    parser.add_argument('command', choices=['install', 'uninstall', 'status'])
+    args = parser.parse_args()
+
+    from db import get_connection, get_db_backend
+
+    if args.command == 'status':
+        watcher = get_version_watcher()
+        watcher.poll()
+        print(watcher.report())
+    else:
+        connection = get_connection()
+        try:
+            if args.command == 'install':
+                install(connection, get_db_backend())
+            else:
+                uninstall(connection, get_db_backend())
+        finally:
+            connection.close()
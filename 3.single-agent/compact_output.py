@@ -0,0 +1,63 @@
+import json
+import os
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+# 압축 모드에서 LLM에게 주는 도구 결과 해석 안내 (최종 답변 단계에서 사람이 읽는 형식으로 변환)
+COMPACT_OUTPUT_GUIDE = """도구 결과가 압축 JSON으로 반환될 수 있습니다.
+    - t: 결과 종류, n: 전체 건수, cols: 열 이름, rows: 행 목록, ctx: 학기 등 부가 정보
+    - rows의 dept 값(d0, d1 ...)은 dept 사전에서 학과명으로 바꿔 읽습니다
+    - 최종 답변에서는 이 데이터를 사용자가 이해하기 쉬운 문장과 목록으로 정리합니다"""
+
+
+def is_compact_mode() -> bool:
+    """도구가 압축 출력 모드로 동작해야 하는지 반환합니다 (TOOL_OUTPUT_MODE=compact)."""
+    return os.environ.get('TOOL_OUTPUT_MODE', 'text').lower() == 'compact'
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return str(value)
+
+
+def to_compact_json(payload: Dict) -> str:
+    """공백 없는 JSON 문자열로 직렬화합니다."""
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+def encode_rows(kind: str, rows: List[Dict], columns: Dict[str, str], total: Optional[int] = None,
+                dept_column: str = '개설학과', ctx: Optional[Dict] = None) -> str:
+    """조회 결과 행을 열 기반 압축 JSON으로 변환합니다.
+
+    columns는 {원래 열 이름: 짧은 키} 매핑이며 순서가 곧 cols 순서입니다 (스키마 고정).
+    dept_column 값은 사전(dept)으로 중복 제거해 d0, d1 ... 참조로 바꿉니다.
+    """
+    dept_ids = {}
+    encoded_rows = []
+    for row in rows:
+        encoded = []
+        for column in columns:
+            value = row.get(column)
+            if column == dept_column and value:
+                value = value.strip()
+                if value not in dept_ids:
+                    dept_ids[value] = f"d{len(dept_ids)}"
+                value = dept_ids[value]
+            encoded.append(value)
+        encoded_rows.append(encoded)
+
+    payload = {'t': kind, 'n': total if total is not None else len(rows)}
+    if ctx:
+        payload['ctx'] = ctx
+    payload['cols'] = list(columns.values())
+    payload['rows'] = encoded_rows
+    if dept_ids:
+        payload['dept'] = {dept_id: name for name, dept_id in dept_ids.items()}
+    return to_compact_json(payload)
+
+
+def estimate_tokens(text: str) -> int:
+    """프롬프트 토큰 수를 대략 추정합니다 (영문/기호 약 4자당 1토큰, 한글·이모지 약 1자당 1토큰)."""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return round(ascii_chars / 4 + (len(text) - ascii_chars))
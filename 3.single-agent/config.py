@@ -0,0 +1,38 @@
+import os
+import threading
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def load_env():
+    """.env 파일의 환경변수를 프로세스당 한 번만 로드합니다."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv()
+            _env_loaded = True
+
+
+def get_bedrock_model_id() -> str:
+    """에이전트가 사용할 Bedrock 모델 ID를 반환합니다."""
+    load_env()
+    return os.environ["BEDROCK_MODEL_ID"]
+
+
+# 도구가 인증된 학생으로 조회하는 학생 이름 (시뮬레이션용 - 실제로는 세션에서 가져옴)
+SESSION_STUDENT_NAMES = {'student_db': '도윤정', 'enrollments': '다인장'}
+
+
+def get_session_student_name(tool: str) -> str:
+    """도구(student_db, enrollments)가 인증된 학생으로 조회하는 이름을 반환합니다."""
+    return SESSION_STUDENT_NAMES[tool]
+
+
+def get_session_student_id() -> str:
+    """현재 세션에서 인증된 학생의 학번을 반환합니다 (NXT_STUDENT_ID)."""
+    load_env()
+    return os.environ.get('NXT_STUDENT_ID', '')
@@ -0,0 +1,141 @@
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, List
+
+from bm25 import tokenize
+from compact_output import estimate_tokens
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?。])\s+|\n+')
+
+
+def _term_vector(text: str) -> Counter:
+    return Counter(tokenize(text))
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b.get(term, 0) for term, count in a.items())
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def _relevance_scores(docs: List[Dict]) -> List[float]:
+    """검색 점수(rrf_score 또는 similarity)를 최고 점수 대비 비율(0~1)로 정규화합니다."""
+    raw = [max(0.0, doc.get('rrf_score', doc.get('similarity', 0.0)) or 0.0) for doc in docs]
+    high = max(raw)
+    return [value / high for value in raw] if high else [1.0] * len(raw)
+
+
+def mmr_select(docs: List[Dict], k: int = 3, lambda_: float = 0.5) -> List[Dict]:
+    """Maximal Marginal Relevance로 관련성이 높으면서 서로 겹치지 않는 문서 k개를 고릅니다.
+
+    관련성은 검색 점수, 중복도는 이미 고른 문서와의 토큰 코사인 유사도 최댓값을 사용하므로
+    추가 임베딩 호출이 필요 없습니다.
+    """
+    if len(docs) <= 1:
+        return list(docs)
+    relevance = _relevance_scores(docs)
+    vectors = [_term_vector(doc['content']) for doc in docs]
+    remaining = list(range(len(docs)))
+    selected = []
+    while remaining and len(selected) < k:
+        best_index = max(
+            remaining,
+            key=lambda i: lambda_ * relevance[i] - (1 - lambda_) * max(
+                (_cosine(vectors[i], vectors[j]) for j in selected), default=0.0
+            )
+        )
+        selected.append(best_index)
+        remaining.remove(best_index)
+    return [docs[i] for i in selected]
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT.split(text) if sentence and sentence.strip()]
+
+
+def compress_context(query: str, docs: List[Dict], token_budget: int = 400) -> List[Dict]:
+    """문서에서 질문과 관련된 문장만 남겨 token_budget 안에 맞춥니다.
+
+    문장 점수는 질문 토큰과의 겹침을 후보 문장 전체에서의 희소성(idf)으로 가중한 값이며,
+    점수가 높은 문장부터 예산이 찰 때까지 고른 뒤(이미 고른 문장과 같은 문장은 제외) 문서별 원래 순서로 다시 이어 붙입니다.
+    관련 문장이 하나도 없으면 첫 문서의 첫 문장을 남깁니다.
+    """
+    query_terms = set(tokenize(query))
+    sentences = []   # (문서 번호, 문장 번호, 문장, 토큰 집합)
+    for doc_index, doc in enumerate(docs):
+        for sentence_index, sentence in enumerate(split_sentences(doc['content'])):
+            sentences.append((doc_index, sentence_index, sentence, set(tokenize(sentence))))
+    if not sentences:
+        return []
+
+    document_frequency = Counter(term for *_, terms in sentences for term in terms & query_terms)
+    scored = []
+    for doc_index, sentence_index, sentence, terms in sentences:
+        score = sum(math.log(1 + len(sentences) / document_frequency[term]) for term in terms & query_terms)
+        if score > 0:
+            # 같은 점수면 상위 문서, 앞 문장을 우선합니다
+            scored.append((-score, doc_index, sentence_index, sentence))
+    scored.sort()
+    if not scored:
+        doc_index, sentence_index, sentence, _ = sentences[0]
+        scored = [(0, doc_index, sentence_index, sentence)]
+
+    kept, seen, used = [], set(), 0
+    for _, doc_index, sentence_index, sentence in scored:
+        tokens = estimate_tokens(sentence)
+        if sentence in seen or (kept and used + tokens > token_budget):
+            continue
+        kept.append((doc_index, sentence_index, sentence))
+        seen.add(sentence)
+        used += tokens
+
+    compressed = []
+    for doc_index, doc in enumerate(docs):
+        passage = ' '.join(sentence for d, _, sentence in sorted(kept) if d == doc_index)
+        if passage:
+            compressed.append({**doc, 'content': passage})
+    return compressed
+
+
+class CompressionStats:
+    """압축 전(선택 문서 전체)과 후의 컨텍스트 토큰 수를 누적합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.original_tokens = 0
+        self.compressed_tokens = 0
+
+    def record(self, original: List[Dict], compressed: List[Dict]):
+        with self._lock:
+            self.calls += 1
+            self.original_tokens += sum(estimate_tokens(doc['content']) for doc in original)
+            self.compressed_tokens += sum(estimate_tokens(doc['content']) for doc in compressed)
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'original_tokens': self.original_tokens,
+                'compressed_tokens': self.compressed_tokens,
+                'reduction': round(1 - self.compressed_tokens / self.original_tokens, 3) if self.original_tokens else 0.0
+            }
+
+
+compression_stats = CompressionStats()
+
+
+def is_compression_enabled() -> bool:
+    """MMR 선택 + 문장 단위 압축 사용 여부 (RAG_COMPRESSION=0이면 비활성화)."""
+    return os.environ.get('RAG_COMPRESSION', '1') != '0'
+
+
+def select_context(query: str, candidates: List[Dict], k: int = 3) -> List[Dict]:
+    """후보 문서에서 MMR로 k개를 고르고 질문 관련 문장만 남깁니다 (압축 전/후 토큰 수를 기록)."""
+    selected = mmr_select(candidates, k=k, lambda_=float(os.environ.get('RAG_MMR_LAMBDA', '0.5')))
+    compressed = compress_context(query, selected, int(os.environ.get('RAG_CONTEXT_TOKEN_BUDGET', '400')))
+    compression_stats.record(selected, compressed)
+    return compressed
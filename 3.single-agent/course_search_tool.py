@@ -1,10 +1,30 @@
 import os
-import mysql.connector
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
+from db import get_connection, get_db_backend, READ
+from repository import Repository
+from guarded_query import run_guarded_select, GuardedQueryError
+from compact_output import is_compact_mode, encode_rows
+from tool_memo import memoize_tool_run
+from tracing import traced_tool_run
 from datetime import datetime
 
+# 압축 출력 모드의 열 이름 매핑
+COURSE_COMPACT_COLUMNS = {
+    '과목코드': 'code',
+    '과목명': 'name',
+    '학점': 'cr',
+    '과목구분': 'type',
+    '개설학과': 'dept',
+    '교수': 'prof',
+    '대상학년': 'grade'
+}
+
+def is_fulltext_search_enabled() -> bool:
+    """과목 키워드 검색에 MySQL ngram FULLTEXT(MATCH ... AGAINST)를 사용할지 여부 (COURSE_FULLTEXT=1, MySQL 전용)."""
+    return os.environ.get('COURSE_FULLTEXT', '0') == '1' and get_db_backend() == 'mysql'
+
 def get_current_semester_info():
     """현재 날짜를 기준으로 학기 정보를 반환합니다."""
     now = datetime.now()
@@ -177,27 +197,9 @@ class CourseSearchTool(BaseTool):
         
         return conditions
     
-    def _build_sql_query(self, conditions: dict) -> tuple:
-        """조건들을 바탕으로 SQL 쿼리를 동적으로 생성합니다."""
-        base_query = """
-        SELECT 
-            c.course_code as 과목코드,
-            c.course_name as 과목명,
-            c.credits as 학점,
-            c.course_type as 과목구분,
-            CASE 
-                WHEN m.major_name IS NOT NULL THEN 
-                    CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
-                ELSE 
-                    CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
-            END as 개설학과,
-            c.professor as 교수,
-            c.target_grade as 대상학년,
-            c.note as 비고
-        FROM courses c
-        LEFT JOIN major m ON c.department = m.major_code
-        WHERE 1=1
-        """
+    def _build_where_clause(self, conditions: dict) -> tuple:
+        """조건들을 바탕으로 과목 검색의 WHERE 조건('AND ...')과 파라미터를 동적으로 생성합니다."""
+        base_query = ""
         
         params = []
         
@@ -226,6 +228,14 @@ class CourseSearchTool(BaseTool):
             subject_keywords = conditions['subject_keyword'] if isinstance(conditions['subject_keyword'], list) else [conditions['subject_keyword']]
             subject_conditions = []
             for keyword in subject_keywords:
+                if is_fulltext_search_enabled():
+                    # ngram FULLTEXT 인덱스(migrations.py 5번)로 부분 문자열을 찾아 전체 스캔을 피합니다
+                    subject_conditions.extend([
+                        "MATCH(c.course_name) AGAINST (%s IN BOOLEAN MODE)",
+                        "MATCH(m.department, m.major_name) AGAINST (%s IN BOOLEAN MODE)"
+                    ])
+                    params.extend([f'"{keyword}"', f'"{keyword}"'])
+                    continue
                 subject_conditions.extend([
                     "c.course_name LIKE %s",
                     "m.department LIKE %s",
@@ -241,22 +251,16 @@ class CourseSearchTool(BaseTool):
             base_query += " AND c.professor LIKE %s"
             params.append(f"%{conditions['professor']}%")
         
-        base_query += " ORDER BY m.college, m.department, c.course_name"
-        
         return base_query, params
 
+    @traced_tool_run
+    @memoize_tool_run
     def _run(self, query: str) -> str:
         """Execute database query to get course information."""
         try:
             # Database connection
-            connection = mysql.connector.connect(
-                host=os.environ["RDS_HOST"],
-                port=int(os.environ["RDS_PORT"]),
-                database=os.environ["RDS_DATABASE"],
-                user=os.environ["RDS_USERNAME"],
-                password=os.environ["RDS_PASSWORD"]
-            )
-            cursor = connection.cursor(dictionary=True)
+            connection = get_connection(READ)
+            repository = Repository(connection)
             
             # 현재 날짜 기반 학기 정보 가져오기
             semester_info = get_current_semester_info()
@@ -267,64 +271,22 @@ class CourseSearchTool(BaseTool):
                 next_semester = semester_info['next_semester']
                 next_year = semester_info['next_semester_year']
                 
-                sql_query = """
-                SELECT 
-                    c.course_code as 과목코드,
-                    c.course_name as 과목명,
-                    c.credits as 학점,
-                    c.course_type as 과목구분,
-                    CASE 
-                        WHEN m.major_name IS NOT NULL THEN 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
-                        ELSE 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
-                    END as 개설학과,
-                    c.professor as 교수,
-                    c.target_grade as 대상학년,
-                    c.offered_year as 개설년도,
-                    c.offered_semester as 개설학기
-                FROM courses c
-                LEFT JOIN major m ON c.department = m.major_code
-                WHERE c.offered_year = %s AND c.offered_semester = %s
-                ORDER BY m.college, m.department, c.course_name
-                """
-                cursor.execute(sql_query, (next_year, next_semester))
-                results = cursor.fetchall()
+                results = repository.courses_by_semester(next_year, next_semester)
                 
                 # 결과에 학기 정보 추가
                 semester_context = f"\n📅 현재 날짜: {semester_info['current_date']}\n📚 다음 학기: {next_year}년 {next_semester}학기\n\n"
+                compact_ctx = {'next': f"{next_year}-{next_semester}"}
                 
             elif "지난 학기" in query or "이전 학기" in query:
                 # 지난 학기 정보를 쿼리에 포함 (major 테이블과 조인)
                 prev_semester = semester_info['prev_semester']
                 prev_year = semester_info['prev_semester_year']
                 
-                sql_query = """
-                SELECT 
-                    c.course_code as 과목코드,
-                    c.course_name as 과목명,
-                    c.credits as 학점,
-                    c.course_type as 과목구분,
-                    CASE 
-                        WHEN m.major_name IS NOT NULL THEN 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
-                        ELSE 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
-                    END as 개설학과,
-                    c.professor as 교수,
-                    c.target_grade as 대상학년,
-                    c.offered_year as 개설년도,
-                    c.offered_semester as 개설학기
-                FROM courses c
-                LEFT JOIN major m ON c.department = m.major_code
-                WHERE c.offered_year = %s AND c.offered_semester = %s
-                ORDER BY m.college, m.department, c.course_name
-                """
-                cursor.execute(sql_query, (prev_year, prev_semester))
-                results = cursor.fetchall()
+                results = repository.courses_by_semester(prev_year, prev_semester)
                 
                 # 결과에 학기 정보 추가
                 semester_context = f"\n📅 현재 날짜: {semester_info['current_date']}\n📚 지난 학기: {prev_year}년 {prev_semester}학기\n\n"
+                compact_ctx = {'prev': f"{prev_year}-{prev_semester}"}
                 
             elif "이번 학기" in query or "현재 학기" in query:
                 # 현재 학기 정보를 쿼리에 포함 (major 테이블과 조인)
@@ -332,31 +294,10 @@ class CourseSearchTool(BaseTool):
                     current_semester = semester_info['current_semester']
                     current_year = semester_info['current_semester_year']
                     
-                    sql_query = """
-                    SELECT 
-                        c.course_code as 과목코드,
-                        c.course_name as 과목명,
-                        c.credits as 학점,
-                        c.course_type as 과목구분,
-                        CASE 
-                            WHEN m.major_name IS NOT NULL THEN 
-                                CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
-                            ELSE 
-                                CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
-                        END as 개설학과,
-                        c.professor as 교수,
-                        c.target_grade as 대상학년,
-                        c.offered_year as 개설년도,
-                        c.offered_semester as 개설학기
-                    FROM courses c
-                    LEFT JOIN major m ON c.department = m.major_code
-                    WHERE c.offered_year = %s AND c.offered_semester = %s
-                    ORDER BY m.college, m.department, c.course_name
-                    """
-                    cursor.execute(sql_query, (current_year, current_semester))
-                    results = cursor.fetchall()
+                    results = repository.courses_by_semester(current_year, current_semester)
                     
                     semester_context = f"\n📅 현재 날짜: {semester_info['current_date']}\n📚 현재 학기: {current_year}년 {current_semester}학기\n\n"
+                    compact_ctx = {'cur': f"{current_year}-{current_semester}"}
                 else:
                     return f"""
                     📅 현재 날짜: {semester_info['current_date']}
@@ -369,35 +310,18 @@ class CourseSearchTool(BaseTool):
                     """
                     
             elif "전체" in query or "모든" in query:
-                sql_query = """
-                SELECT 
-                    c.course_code as 과목코드,
-                    c.course_name as 과목명,
-                    c.credits as 학점,
-                    c.course_type as 과목구분,
-                    CASE 
-                        WHEN m.major_name IS NOT NULL THEN 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
-                        ELSE 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
-                    END as 개설학과,
-                    c.professor as 교수,
-                    c.target_grade as 대상학년
-                FROM courses c
-                LEFT JOIN major m ON c.department = m.major_code
-                ORDER BY m.college, m.department, c.course_name
-                """
-                cursor.execute(sql_query)
-                results = cursor.fetchall()
+                results = repository.all_courses()
                 semester_context = f"\n📅 현재 날짜: {semester_info['current_date']}\n\n"
                 
             elif query.strip().upper().startswith("SELECT"):
-                # 직접 SQL 쿼리
-                if "courses" in query.lower():
-                    cursor.execute(query)
-                    results = cursor.fetchall()
-                else:
-                    return "courses 테이블만 사용할 수 있습니다."
+                # 직접 SQL 쿼리: 행 수/시간/결과 크기 제한과 실행 계획 검사를 거쳐 실행합니다
+                try:
+                    guarded = run_guarded_select(connection, query, get_db_backend())
+                except GuardedQueryError as e:
+                    return f"쿼리를 실행할 수 없습니다: {e}"
+                results = guarded['rows']
+                if guarded['truncated']:
+                    semester_context = f"⚠️ {guarded['reason']}\n\n"
                     
             else:
                 # 자연어 쿼리 파싱 및 동적 SQL 생성
@@ -418,9 +342,8 @@ class CourseSearchTool(BaseTool):
                     ⚠️ 주의: 이 도구는 조회/검색 전용입니다. 추천 기능은 별도 도구에서 제공됩니다.
                     """
                 
-                sql_query, params = self._build_sql_query(conditions)
-                cursor.execute(sql_query, params)
-                results = cursor.fetchall()
+                where, params = self._build_where_clause(conditions)
+                results = repository.search_courses(where, params)
             
             if not results:
                 return "조회된 강의가 없습니다."
@@ -432,6 +355,11 @@ class CourseSearchTool(BaseTool):
             display_limit = 10
             display_results = results[:display_limit]
             
+            # 압축 출력 모드: 장식 없이 열 기반 JSON으로 반환 (문장 정리는 최종 답변 단계에서)
+            if is_compact_mode():
+                return encode_rows('courses', display_results, COURSE_COMPACT_COLUMNS, total_count,
+                                   ctx=locals().get('compact_ctx'))
+            
             # 결과 포맷팅
             formatted_results = []
             for i, course in enumerate(display_results, 1):
@@ -462,6 +390,5 @@ class CourseSearchTool(BaseTool):
         except Exception as e:
             return f"데이터베이스 오류: {str(e)}"
         finally:
-            if 'connection' in locals() and connection.is_connected():
-                cursor.close()
+            if 'connection' in locals():
                 connection.close()
\ No newline at end of file
@@ -0,0 +1,436 @@
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Dict, Optional
+from config import load_env
+from tracing import is_tracing_enabled, span, TracedConnection
+from slow_query_log import wrap_connection
+from replicas import get_replica_router
+from resilience import DeadlineExceeded, is_dependency_failure, mark_degraded, remaining, resilient_call
+
+
+def get_db_backend() -> str:
+    """학사 DB 종류를 반환합니다 (DB_BACKEND=mysql 기본, sqlite는 벤치마크/로컬 실행용)."""
+    return os.environ.get('DB_BACKEND', 'mysql').lower()
+
+
+# get_connection의 route: 주 DB, 읽기 복제본, 복제 지연이 작은 복제본(없으면 주 DB)
+PRIMARY = 'primary'
+READ = 'read'
+FRESH_READ = 'fresh'
+
+
+class PooledConnection:
+    """풀이 보관하는 실제 연결입니다.
+
+    cursor(prepared=True, statement=이름)으로 요청하면 만든 prepared 커서를 이름별로 보관했다가 재사용하므로,
+    MySQL은 같은 문장을 연결당 한 번만 서버에서 준비(PREPARE)합니다. SQLite는 드라이버가 문장을 캐시하므로 커서만 재사용합니다.
+    """
+
+    def __init__(self, connection, pool: 'ConnectionPool', max_statements: int = 64, target: str = PRIMARY):
+        self.connection = connection
+        self.pool = pool
+        self.target = target
+        self.max_statements = max_statements
+        self.statements = OrderedDict()
+        self.returned_at = time.time()
+        self.max_execution_ms = None
+
+    def cursor(self, *args, statement: str = None, **kwargs):
+        if statement is None or not kwargs.get('prepared'):
+            return self.connection.cursor(*args, **kwargs)
+        cursor = self.statements.get(statement)
+        if cursor is not None:
+            self.statements.move_to_end(statement)
+            self.pool.count('statement_hits')
+            return cursor
+        cursor = self.connection.cursor(*args, **kwargs)
+        self.statements[statement] = cursor
+        self.pool.count('statements_prepared')
+        if len(self.statements) > self.max_statements:
+            # 서버의 max_prepared_stmt_count를 넘지 않도록 가장 오래 쓰지 않은 문장을 해제합니다
+            _, evicted = self.statements.popitem(last=False)
+            evicted.close()
+        return cursor
+
+    def limit_query_time(self, timeout_ms: int):
+        """이 연결에서 실행할 SELECT의 서버 측 시간 제한(MySQL max_execution_time)을 바꿉니다 (이미 같은 값이면 생략)."""
+        if timeout_ms == self.max_execution_ms:
+            return
+        cursor = self.connection.cursor()
+        cursor.execute(f"SET SESSION max_execution_time = {timeout_ms}")
+        cursor.close()
+        self.max_execution_ms = timeout_ms
+
+    def close(self):
+        for cursor in self.statements.values():
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        self.statements.clear()
+        self.connection.close()
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+
+class ConnectionPool:
+    """학사 DB 연결 풀입니다.
+
+    - 동시에 사용 중인 연결 수를 세고, DB_POOL_SIZE가 설정되면 그 수까지만 허용합니다 (자리가 없으면 DB_POOL_TIMEOUT초까지 대기).
+    - 반납된 연결은 대상(주 DB/복제본)별로 DB_POOL_IDLE개까지 보관했다가 다시 씁니다. 반납 시 rollback으로 트랜잭션(읽기 스냅샷)을 끝내고,
+      DB_POOL_PING_SECONDS 이상 쉬었던 연결은 꺼낼 때 살아 있는지 확인합니다.
+    """
+
+    def __init__(self, size: int = 0, timeout: float = 10.0, max_idle: int = 8, ping_seconds: float = 30.0,
+                 max_statements: int = 64):
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_seconds = ping_seconds
+        self.max_statements = max_statements
+        self._slots = threading.BoundedSemaphore(size) if size > 0 else None
+        self._idle: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.in_use = 0
+            self.peak_in_use = 0
+            self.acquired = 0
+            self.opened = 0
+            self.reused = 0
+            self.waits = 0
+            self.wait_seconds = 0.0
+            self.timeouts = 0
+            self.statements_prepared = 0
+            self.statement_hits = 0
+
+    def count(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def acquire(self):
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            started = time.perf_counter()
+            acquired = self._slots.acquire(timeout=self.timeout)
+            with self._lock:
+                self.waits += 1
+                self.wait_seconds += time.perf_counter() - started
+                if not acquired:
+                    self.timeouts += 1
+            if not acquired:
+                raise RuntimeError(f"DB 연결 대기 시간 초과 ({self.timeout}초, 최대 {self.size}개 사용 중)")
+        with self._lock:
+            self.in_use += 1
+            self.acquired += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    def checkout(self, opener, target: str = PRIMARY) -> PooledConnection:
+        """target의 보관 중인 연결이 있으면 꺼내고, 없으면 opener(target)으로 새로 엽니다."""
+        while True:
+            with self._lock:
+                idle = self._idle.get(target)
+                pooled = idle.pop() if idle else None
+            if pooled is None:
+                break
+            if time.time() - pooled.returned_at < self.ping_seconds or pooled.is_connected():
+                with self._lock:
+                    self.reused += 1
+                return pooled
+            pooled.close()
+        pooled = PooledConnection(opener(target), self, self.max_statements, target)
+        with self._lock:
+            self.opened += 1
+        return pooled
+
+    def checkin(self, pooled: PooledConnection):
+        try:
+            pooled.rollback()
+        except Exception:
+            pooled.close()
+            return
+        pooled.returned_at = time.time()
+        with self._lock:
+            idle = self._idle.setdefault(pooled.target, deque())
+            if len(idle) < self.max_idle:
+                idle.append(pooled)
+                return
+        pooled.close()
+
+    def close_idle(self):
+        with self._lock:
+            idle, self._idle = [pooled for queue in self._idle.values() for pooled in queue], {}
+        for pooled in idle:
+            pooled.close()
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                'size': self.size,
+                'in_use': self.in_use,
+                'peak_in_use': self.peak_in_use,
+                'acquired': self.acquired,
+                'opened': self.opened,
+                'reused': self.reused,
+                'idle': sum(len(queue) for queue in self._idle.values()),
+                'waits': self.waits,
+                'wait_ms_total': round(self.wait_seconds * 1000, 1),
+                'timeouts': self.timeouts,
+                'statements_prepared': self.statements_prepared,
+                'statement_hits': self.statement_hits
+            }
+
+
+class LimitedConnection:
+    """close() 시 연결을 풀에 돌려주고 자리를 한 번만 반납하는 연결 래퍼입니다."""
+
+    def __init__(self, connection: PooledConnection, pool: ConnectionPool):
+        self._connection = connection
+        self._pool = pool
+        self._released = False
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        try:
+            self._pool.checkin(self._connection)
+        finally:
+            self._pool.release()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+connection_pool = ConnectionPool(
+    size=int(os.environ.get('DB_POOL_SIZE', '0')),
+    timeout=float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+    max_idle=int(os.environ.get('DB_POOL_IDLE', '8')),
+    ping_seconds=float(os.environ.get('DB_POOL_PING_SECONDS', '30')),
+    max_statements=int(os.environ.get('DB_STATEMENT_CACHE', '64'))
+)
+
+
+def set_connection_limit(size: int, timeout: float = 10.0):
+    """동시 연결 상한을 바꿉니다 (부하 테스트에서 풀 크기별로 측정할 때 사용)."""
+    global connection_pool
+    connection_pool.close_idle()
+    connection_pool = ConnectionPool(size, timeout, connection_pool.max_idle, connection_pool.ping_seconds,
+                                     connection_pool.max_statements)
+    return connection_pool
+
+
+def _open_connection(target: str = PRIMARY, connect_timeout: Optional[float] = None):
+    """target(PRIMARY, 복제본 host[:port] 또는 SQLite 파일 경로)에 새 연결을 엽니다.
+
+    MySQL 접속 정보(RDS_HOST, RDS_PORT, RDS_DATABASE, RDS_USERNAME, RDS_PASSWORD)는 필수이며, 없으면 기본값으로 접속하지 않고 KeyError를 냅니다.
+    connect_timeout(기본 DB_CONNECT_TIMEOUT)은 요청 마감과 관계없이 고정합니다. mysql.connector는 이 값을 이후 소켓 읽기에도 쓰고
+    연결은 풀에 남아 다른 요청도 사용하므로, 요청별 마감은 문장 시간 제한(_limit_query_time)으로 적용합니다.
+    """
+    if get_db_backend() == 'sqlite':
+        return SQLiteConnection(os.environ.get('SQLITE_PATH', 'nxtclass.sqlite3') if target == PRIMARY else target)
+
+    import mysql.connector
+
+    if connect_timeout is None:
+        connect_timeout = float(os.environ.get('DB_CONNECT_TIMEOUT', '5'))
+    timeout = max(1, int(connect_timeout))
+    if target == PRIMARY:
+        host, port = os.environ["RDS_HOST"], os.environ["RDS_PORT"]
+    else:
+        host, _, port = target.partition(':')
+        port = port or os.environ["RDS_PORT"]
+    return mysql.connector.connect(
+        host=host,
+        port=int(port),
+        database=os.environ["RDS_DATABASE"],
+        user=os.environ["RDS_USERNAME"],
+        password=os.environ["RDS_PASSWORD"],
+        connection_timeout=timeout
+    )
+
+
+def _limit_query_time(pooled: PooledConnection):
+    """꺼낸 연결의 SELECT 시간 제한을 DB_QUERY_TIMEOUT_MS(기본 10000)와 요청에 남은 시간 중 작은 값으로 맞춥니다.
+
+    서버가 시간이 지난 SELECT를 중단합니다 (오류 3024). 마감까지 여유가 있으면 값이 같아 SET을 다시 보내지 않습니다.
+    """
+    query_timeout_ms = int(os.environ.get('DB_QUERY_TIMEOUT_MS', '10000'))
+    if get_db_backend() != 'mysql' or query_timeout_ms <= 0:
+        return
+    pooled.limit_query_time(max(1, int(remaining(query_timeout_ms / 1000) * 1000)))
+
+
+def dependency_name(target: str) -> str:
+    """차단기 이름: 주 DB는 'mysql', 복제본은 'mysql-replica:<대상>'(복제본마다 따로 열림)."""
+    return 'mysql' if target == PRIMARY else f"mysql-replica:{target}"
+
+
+def _open_replica_check(target: str):
+    """복제본 상태 확인용 연결입니다. 짧은 DB_REPLICA_CHECK_TIMEOUT(기본 2초)만 기다립니다."""
+    return _open_connection(target, connect_timeout=float(os.environ.get('DB_REPLICA_CHECK_TIMEOUT', '2')))
+
+
+def get_replica_report() -> Optional[dict]:
+    """복제본 라우팅 상태 (복제본이 설정되지 않았으면 None)."""
+    router = get_replica_router(_open_replica_check, get_db_backend())
+    return router.report() if router else None
+
+
+def _checkout(pool: ConnectionPool, route: str) -> PooledConnection:
+    """route에 맞는 대상을 골라 풀에서 연결을 꺼냅니다. 복제본 연결에 실패하면 그 복제본을 제외하고 주 DB를 씁니다."""
+    router = get_replica_router(_open_replica_check, get_db_backend()) if route != PRIMARY else None
+    target = router.choose(fresh=route == FRESH_READ) if router else None
+    if target is not None:
+        try:
+            # 복제본은 재시도하지 않고 바로 주 DB로 넘어갑니다
+            return resilient_call(dependency_name(target), lambda: pool.checkout(_open_connection, target), retries=0)
+        except DeadlineExceeded:
+            # 요청 시간이 다 된 것이지 복제본 장애가 아니므로 복제본을 제외하지 않습니다
+            raise
+        except Exception as e:
+            print(f"복제본 {target} 연결 실패, 주 DB 사용: {str(e)}")
+            router.mark_failed(target, e)
+    try:
+        return resilient_call(dependency_name(PRIMARY), lambda: pool.checkout(_open_connection))
+    except Exception as e:
+        if is_dependency_failure(e):
+            mark_degraded('mysql')
+        raise
+
+
+def get_connection(route: str = PRIMARY):
+    """학사 데이터베이스 연결을 반환합니다 (MySQL 드라이버는 첫 사용 시 import, DB_BACKEND=sqlite면 SQLITE_PATH 파일).
+
+    연결은 풀(ConnectionPool)에서 꺼내며, 반환된 연결을 close()하면 풀로 돌아갑니다.
+    route가 READ면 복제본(RDS_REPLICA_HOSTS)으로, FRESH_READ면 복제 지연이 DB_REPLICA_FRESH_LAG_SECONDS 이하인 복제본으로 보내고,
+    조건에 맞는 복제본이 없으면 주 DB를 사용합니다.
+    연결은 차단기(resilience.resilient_call)를 거치며 일시적 오류는 지터 백오프로 재시도하고, 요청 마감을 넘기지 않습니다.
+    """
+    load_env()
+    pool = connection_pool
+    with span('connect'):
+        pool.acquire()
+        try:
+            pooled = _checkout(pool, route)
+            connection = LimitedConnection(pooled, pool)
+        except Exception:
+            pool.release()
+            raise
+        try:
+            _limit_query_time(pooled)
+        except Exception:
+            connection.close()
+            raise
+    # SLOW_QUERY_LOG=1이면 느린 문장의 EXPLAIN을 같은 대상의 별도 연결에서 수집합니다
+    connection = wrap_connection(connection, lambda: _open_connection(pooled.target), get_db_backend())
+    # 추적 중에는 SQL 실행/결과 가져오기 시간을 단계별로 기록합니다
+    return TracedConnection(connection) if is_tracing_enabled() else connection
+
+
+def _concat(*values):
+    # MySQL CONCAT: 인자 중 NULL이 있으면 NULL
+    if any(value is None for value in values):
+        return None
+    return ''.join(str(value) for value in values)
+
+
+def _concat_ws(separator, *values):
+    return str(separator).join(str(value) for value in values if value is not None)
+
+
+def _crc32(value):
+    return None if value is None else zlib.crc32(str(value).encode('utf-8'))
+
+
+class SQLiteCursor:
+    """mysql.connector 커서와 같은 방식으로 쓰는 SQLite 커서입니다 (%s 자리표시자, dictionary 행)."""
+
+    def __init__(self, cursor, dictionary: bool = False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def execute(self, sql, params=None):
+        self._cursor.execute(sql.replace('%s', '?'), tuple(params or ()))
+        return None
+
+    def executemany(self, sql, seq_params):
+        self._cursor.executemany(sql.replace('%s', '?'), seq_params)
+
+    def _convert(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size) if size else self._cursor.fetchmany()
+        return [self._convert(row) for row in rows]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """합성 데이터로 도구를 실행하기 위한 MySQL 호환 SQLite 연결입니다.
+
+    도구 SQL이 쓰는 CONCAT/CONCAT_WS/CRC32 함수를 등록하고 cursor(dictionary=True)를 지원합니다.
+    """
+
+    def __init__(self, path: str):
+        import sqlite3
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.create_function('CONCAT', -1, _concat, deterministic=True)
+        self._connection.create_function('CONCAT_WS', -1, _concat_ws, deterministic=True)
+        self._connection.create_function('CRC32', 1, _crc32, deterministic=True)
+
+    def cursor(self, dictionary: bool = False, **kwargs):
+        return SQLiteCursor(self._connection.cursor(), dictionary=dictionary)
+
+    def set_statement_timeout(self, timeout_ms):
+        """이후 실행하는 문장을 timeout_ms가 지나면 중단합니다 (None이면 해제). MySQL MAX_EXECUTION_TIME 대응입니다."""
+        if timeout_ms is None:
+            self._connection.set_progress_handler(None, 0)
+            return
+        deadline = time.perf_counter() + timeout_ms / 1000
+        self._connection.set_progress_handler(lambda: time.perf_counter() > deadline, 1000)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        self._connection.close()
+
+    def is_connected(self) -> bool:
+        return True
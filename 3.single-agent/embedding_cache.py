@@ -0,0 +1,253 @@
+import atexit
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows에서는 프로세스 내 잠금만 사용합니다
+    fcntl = None
+
+# 파일 구조: [헤더 64바이트][슬롯 × capacity]
+# 헤더: 매직 + 버전 + 용량 + 차원 + 세대(u64, 슬롯을 쓸 때마다 증가)
+# 슬롯: 키 다이제스트(16바이트, 0이면 빈 슬롯) + 마지막 사용 순번(u64) + float32 벡터(dim)
+_MAGIC = b'NXEMBC01'
+_HEADER = struct.Struct('<8sIII')
+_GENERATION = struct.Struct('<Q')
+_HEADER_SIZE = 64
+_SLOT_META = struct.Struct('<16sQ')
+_EMPTY_DIGEST = b'\x00' * 16
+
+
+def normalize_text(text: str) -> str:
+    """임베딩 캐시 키용으로 텍스트를 정규화합니다 (유니코드 정규화, 소문자, 공백 정리)."""
+    return ' '.join(unicodedata.normalize('NFKC', text).lower().split())
+
+
+class EmbeddingCache:
+    """쿼리 임베딩의 LRU 캐시입니다. 메모리 맵 파일에 저장되어 재시작 후에도 유지됩니다.
+
+    키는 (임베딩 모델 ID, 정규화된 텍스트)이며, 용량을 넘으면 가장 오래 사용하지 않은 항목을 덮어씁니다.
+    벡터 차원은 첫 저장 시 정해지며, 파일의 차원/용량이 다르면 새로 만듭니다.
+
+    여러 워커 프로세스가 같은 파일을 공유할 수 있도록 모든 읽기/쓰기는 `<path>.lock` 파일 잠금(flock) 안에서
+    하고, 다른 프로세스가 쓴 내용(헤더의 세대 번호, 교체된 파일)을 확인해 슬롯 목록을 다시 읽습니다.
+    """
+
+    def __init__(self, path: str, capacity: int = 10000):
+        self.path = path
+        self.capacity = capacity
+        self.dim = None
+        self._mm = None
+        self._file = None
+        self._inode = None
+        self._generation = None
+        self._lock_file = None
+        self._slots = OrderedDict()   # 다이제스트 → 슬롯 번호 (LRU 순서)
+        self._clock = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        with self._lock, self._file_lock():
+            self._sync()
+
+    @property
+    def _slot_size(self) -> int:
+        return _SLOT_META.size + 4 * self.dim
+
+    def _open_existing(self):
+        with open(self.path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return
+        magic, version, capacity, dim = _HEADER.unpack(header)
+        if magic != _MAGIC or version != 1 or capacity != self.capacity:
+            return
+        self._map(dim, create=False)
+
+    def _load_slots(self):
+        self._slots.clear()
+        entries = []
+        for slot in range(self.capacity):
+            offset = _HEADER_SIZE + slot * self._slot_size
+            digest, last_used = _SLOT_META.unpack_from(self._mm, offset)
+            if digest != _EMPTY_DIGEST:
+                entries.append((last_used, digest, slot))
+        for last_used, digest, slot in sorted(entries):
+            self._slots[digest] = slot
+            self._clock = max(self._clock, last_used)
+
+    def _map(self, dim: int, create: bool):
+        self.dim = dim
+        size = _HEADER_SIZE + self.capacity * self._slot_size
+        if create:
+            # 다른 프로세스의 기존 매핑이 잘린 파일을 읽지 않도록 새 파일을 만든 뒤 교체합니다.
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, 1, self.capacity, dim).ljust(_HEADER_SIZE, b'\x00'))
+                f.truncate(size)
+            os.replace(temp_path, self.path)
+        self._file = open(self.path, 'r+b')
+        self._mm = mmap.mmap(self._file.fileno(), size)
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+    def _reset(self, dim: int):
+        """차원이 다른 벡터가 들어오면 캐시 파일을 새로 만듭니다."""
+        self.close()
+        self._slots.clear()
+        self._clock = 0
+        self._map(dim, create=True)
+        self._generation = 0
+
+    @contextmanager
+    def _file_lock(self):
+        """같은 캐시 파일을 쓰는 다른 프로세스와의 배타 잠금입니다."""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._lock_file = open(f"{self.path}.lock", 'a+b')
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _sync(self, rescan: bool = False):
+        """다른 프로세스가 파일을 교체했거나 슬롯을 썼으면 매핑과 슬롯 목록을 다시 읽습니다."""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            inode = None
+        if inode is None or inode != self._inode:
+            self.close()
+            self._slots.clear()
+            self._clock = 0
+            self._generation = None
+            if inode is not None:
+                self._open_existing()
+        if self._mm is None:
+            return
+        generation = _GENERATION.unpack_from(self._mm, _HEADER.size)[0]
+        if rescan or generation != self._generation:
+            self._load_slots()
+            self._generation = generation
+
+    @staticmethod
+    def _digest(model_id: str, text: str) -> bytes:
+        key = f"{model_id}\x00{normalize_text(text)}".encode('utf-8')
+        return hashlib.blake2b(key, digest_size=16).digest()
+
+    def _touch(self, digest: bytes, slot: int):
+        self._clock += 1
+        self._slots[digest] = slot
+        self._slots.move_to_end(digest)
+        _SLOT_META.pack_into(self._mm, _HEADER_SIZE + slot * self._slot_size, digest, self._clock)
+
+    def get(self, model_id: str, text: str) -> Optional[List[float]]:
+        """캐시된 임베딩을 반환합니다. 없으면 None."""
+        digest = self._digest(model_id, text)
+        with self._lock, self._file_lock():
+            self._sync()
+            slot = self._slots.get(digest)
+            if slot is not None and _SLOT_META.unpack_from(self._mm, _HEADER_SIZE + slot * self._slot_size)[0] != digest:
+                del self._slots[digest]
+                slot = None
+            if slot is None:
+                self.stats['misses'] += 1
+                return None
+            offset = _HEADER_SIZE + slot * self._slot_size + _SLOT_META.size
+            vector = array('f')
+            vector.frombytes(self._mm[offset:offset + 4 * self.dim])
+            self._touch(digest, slot)
+            self.stats['hits'] += 1
+            return vector.tolist()
+
+    def put(self, model_id: str, text: str, embedding: List[float]):
+        """임베딩을 저장합니다. 용량이 차면 가장 오래 사용하지 않은 슬롯을 재사용합니다."""
+        digest = self._digest(model_id, text)
+        with self._lock, self._file_lock():
+            # 제거할 슬롯을 고르기 전에 다른 프로세스의 사용 기록까지 반영합니다.
+            self._sync(rescan=True)
+            if self._mm is None or self.dim != len(embedding):
+                self._reset(len(embedding))
+
+            slot = self._slots.get(digest)
+            if slot is None:
+                if len(self._slots) < self.capacity:
+                    # 슬롯은 앞에서부터 채우고 제거 시에는 바로 재사용하므로 다음 빈 슬롯은 항목 수와 같습니다.
+                    slot = len(self._slots)
+                else:
+                    _, slot = self._slots.popitem(last=False)
+                    self.stats['evictions'] += 1
+
+            offset = _HEADER_SIZE + slot * self._slot_size + _SLOT_META.size
+            self._mm[offset:offset + 4 * self.dim] = array('f', embedding).tobytes()
+            self._touch(digest, slot)
+            self._generation += 1
+            _GENERATION.pack_into(self._mm, _HEADER.size, self._generation)
+
+    def flush(self):
+        with self._lock:
+            if self._mm is not None:
+                self._mm.flush()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.flush()
+            self._mm.close()
+            self._file.close()
+            self._mm = None
+            self._file = None
+            self._inode = None
+
+    def report(self) -> Dict:
+        """적중/미스/제거 횟수와 적중률을 반환합니다."""
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                **self.stats,
+                'entries': len(self._slots),
+                'capacity': self.capacity,
+                'hit_ratio': round(self.stats['hits'] / lookups, 3) if lookups else 0.0
+            }
+
+
+class CachedEmbeddings:
+    """embed_query 결과를 EmbeddingCache에 저장하는 임베딩 래퍼입니다."""
+
+    def __init__(self, embeddings, cache: EmbeddingCache, model_id: str):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_id = model_id
+        self.dimension = getattr(embeddings, 'dimension', None)
+
+    def embed_query(self, text: str) -> List[float]:
+        cached = self.cache.get(self.model_id, text)
+        if cached is not None:
+            return cached
+        embedding = self.embeddings.embed_query(text)
+        self.cache.put(self.model_id, text, embedding)
+        return embedding
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+
+def create_embedding_cache() -> Optional[EmbeddingCache]:
+    """환경변수 설정으로 쿼리 임베딩 캐시를 만듭니다 (EMBEDDING_CACHE=0이면 None)."""
+    if os.environ.get('EMBEDDING_CACHE', '1') == '0':
+        return None
+    path = os.environ.get('EMBEDDING_CACHE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'query_embeddings.bin'))
+    cache = EmbeddingCache(path, capacity=int(os.environ.get('EMBEDDING_CACHE_CAPACITY', '10000')))
+    # 종료 시 변경 내용을 디스크에 반영합니다.
+    atexit.register(cache.close)
+    return cache
@@ -0,0 +1,239 @@
+import contextvars
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from config import load_env
+from resilience import resilient_call
+
+# Cohere 임베딩은 요청 하나에 최대 96개 텍스트를 받습니다.
+COHERE_MAX_BATCH = 96
+
+
+class EmbeddingProvider(ABC):
+    """임베딩 제공자 인터페이스입니다. embed_documents/embed_queries는 여러 텍스트를 한 번에 처리합니다.
+
+    embed_documents는 반드시 구현해야 하며(구현하지 않으면 생성 시점에 TypeError),
+    문서와 질문을 다르게 임베딩하는 모델(Cohere의 input_type)은 embed_queries를 재정의합니다.
+    """
+
+    model_id = ''
+    dimension = 0
+
+    @abstractmethod
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        ...
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+
+class BedrockEmbeddingProvider(EmbeddingProvider):
+    """Bedrock 임베딩 모델을 호출합니다.
+
+    Titan 계열은 요청당 텍스트 하나만 받으므로 스레드 풀로 동시에 호출하고,
+    Cohere 계열은 요청당 최대 96개씩 묶어 호출합니다.
+    """
+
+    def __init__(self, model_id: str = 'amazon.titan-embed-text-v1', region: str = 'us-east-1', max_workers: int = 8):
+        import boto3
+        from botocore.config import Config
+
+        self.model_id = model_id
+        # 재시도는 resilient_call이 차단기와 함께 처리하므로 botocore 자체 재시도는 끕니다
+        config = Config(
+            connect_timeout=float(os.environ.get('BEDROCK_CONNECT_TIMEOUT', '3')),
+            read_timeout=float(os.environ.get('BEDROCK_EMBED_READ_TIMEOUT', '10')),
+            retries={'max_attempts': 1}
+        )
+        self.client = boto3.client(service_name='bedrock-runtime', region_name=region, config=config)
+        self.max_workers = max_workers
+        # Titan 병렬 호출용 풀은 하나만 만들어 모든 호출(색인 작업의 여러 스레드 포함)이 함께 씁니다
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='titan-embed')
+        self.dimension = 1024 if model_id.startswith(('cohere.', 'amazon.titan-embed-text-v2')) else 1536
+
+    def _invoke(self, body: Dict) -> Dict:
+        def call():
+            response = self.client.invoke_model(
+                modelId=self.model_id, body=json.dumps(body),
+                contentType='application/json', accept='application/json'
+            )
+            return json.loads(response['body'].read())
+
+        return resilient_call('bedrock-embed', call)
+
+    def _embed_titan(self, text: str) -> List[float]:
+        return self._invoke({'inputText': text})['embedding']
+
+    def _embed_cohere(self, texts: List[str], input_type: str) -> List[List[float]]:
+        embeddings = []
+        for i in range(0, len(texts), COHERE_MAX_BATCH):
+            embeddings.extend(self._invoke({'texts': texts[i:i + COHERE_MAX_BATCH], 'input_type': input_type})['embeddings'])
+        return embeddings
+
+    def _embed_titan_many(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) == 1:
+            return [self._embed_titan(texts[0])]
+        # 풀 스레드는 contextvars를 물려받지 않으므로 호출한 쪽의 컨텍스트(요청 마감, 축소 응답 표시)를 복사해 실행합니다
+        futures = [self._executor.submit(contextvars.copy_context().run, self._embed_titan, text) for text in texts]
+        return [future.result() for future in futures]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self.model_id.startswith('cohere.'):
+            return self._embed_cohere(texts, 'search_document')
+        return self._embed_titan_many(texts)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        if self.model_id.startswith('cohere.'):
+            return self._embed_cohere(texts, 'search_query')
+        return self._embed_titan_many(texts)
+
+
+class HashingEmbedder(EmbeddingProvider):
+    """네트워크 없이 동작하는 결정적 로컬 임베더입니다.
+
+    어절별 글자 n-gram(기본 2~3글자, 어절 경계 포함)을 blake2b로 dimension개 칸에 해싱하고
+    부호 해싱으로 충돌을 상쇄한 뒤 L2 정규화합니다. 같은 입력은 프로세스와 관계없이 같은 벡터가 됩니다.
+    """
+
+    def __init__(self, dimension: int = 512, ngram_range: tuple = (2, 3)):
+        self.dimension = dimension
+        self.ngram_range = ngram_range
+        self.model_id = f"local-hash-ngram{ngram_range[0]}{ngram_range[1]}-{dimension}"
+
+    def _features(self, text: str) -> Dict[str, int]:
+        counts = {}
+        for word in re.findall(r'\w+', unicodedata.normalize('NFKC', text).lower()):
+            word = f"<{word}>"
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                for i in range(max(1, len(word) - n + 1)):
+                    gram = word[i:i + n]
+                    counts[gram] = counts.get(gram, 0) + 1
+        return counts
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimension
+        for gram, count in self._features(text).items():
+            digest = hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], 'little') % self.dimension
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign * (1 + math.log(count))
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+
+class CoalescingEmbedder(EmbeddingProvider):
+    """동시에 들어온 embed_query 요청을 모아 embed_documents 한 번으로 처리합니다.
+
+    첫 요청이 들어오면 max_wait_ms 동안(또는 max_batch개가 찰 때까지) 기다렸다가 한꺼번에 호출하며,
+    이미 처리 중인 같은 텍스트는 결과를 공유합니다.
+    """
+
+    def __init__(self, provider: EmbeddingProvider, max_batch: int = 32, max_wait_ms: float = 5):
+        self.provider = provider
+        self.model_id = provider.model_id
+        self.dimension = provider.dimension
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._flushing = False
+        self.stats = {'queries': 0, 'shared': 0, 'provider_calls': 0}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.provider.embed_documents(texts)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.provider.embed_queries(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self._lock:
+            self.stats['queries'] += 1
+            future = self._pending.get(text)
+            if future is not None:
+                self.stats['shared'] += 1
+            else:
+                future = Future()
+                self._pending[text] = future
+                if len(self._pending) >= self.max_batch:
+                    self._ready.notify()
+            leader = not self._flushing
+            if leader:
+                self._flushing = True
+
+        if leader:
+            self._flush()
+        return future.result()
+
+    def _flush(self):
+        """max_wait 동안 요청을 모은 뒤 한 번에 임베딩하고, 남은 요청이 없을 때까지 반복합니다."""
+        while True:
+            with self._lock:
+                if len(self._pending) < self.max_batch:
+                    self._ready.wait(self.max_wait)
+                batch = list(self._pending.items())[:self.max_batch]
+                for text, _ in batch:
+                    del self._pending[text]
+                self.stats['provider_calls'] += 1
+
+            try:
+                # 질문용 임베딩(Cohere는 input_type='search_query')으로 묶어 호출합니다
+                embeddings = self.provider.embed_queries([text for text, _ in batch])
+                for (_, future), embedding in zip(batch, embeddings):
+                    future.set_result(embedding)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+            with self._lock:
+                if not self._pending:
+                    self._flushing = False
+                    return
+
+    def report(self) -> Dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+def embedding_model_id(name: Optional[str] = None) -> str:
+    """create_embedding_provider가 만들 제공자의 model_id를 제공자를 만들지 않고(boto3 없이) 반환합니다."""
+    load_env()
+    name = name or os.environ.get('RAG_EMBEDDING_PROVIDER', 'bedrock')
+    if name == 'local':
+        return HashingEmbedder(dimension=int(os.environ.get('RAG_EMBEDDING_DIM', '512'))).model_id
+    if name == 'bedrock':
+        return os.environ.get('RAG_EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v1')
+    raise ValueError(f"지원하지 않는 임베딩 제공자입니다: {name}")
+
+
+def create_embedding_provider(name: Optional[str] = None) -> EmbeddingProvider:
+    """RAG_EMBEDDING_PROVIDER 설정(bedrock 기본, local)으로 임베딩 제공자를 만듭니다."""
+    load_env()
+    name = name or os.environ.get('RAG_EMBEDDING_PROVIDER', 'bedrock')
+    if name == 'local':
+        return HashingEmbedder(dimension=int(os.environ.get('RAG_EMBEDDING_DIM', '512')))
+    if name == 'bedrock':
+        return BedrockEmbeddingProvider(
+            model_id=os.environ.get('RAG_EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v1'),
+            region=os.environ.get('BEDROCK_REGION', 'us-east-1'),
+            max_workers=int(os.environ.get('RAG_EMBEDDING_WORKERS', '8'))
+        )
+    raise ValueError(f"지원하지 않는 임베딩 제공자입니다: {name}")
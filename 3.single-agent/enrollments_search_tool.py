@@ -1,8 +1,30 @@
-import os
-import mysql.connector
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
+from config import get_session_student_name
+from db import get_connection, FRESH_READ
+from repository import Repository
+from compact_output import is_compact_mode, encode_rows
+from tool_memo import memoize_tool_run
+from tracing import traced_tool_run
+
+# 압축 출력 모드의 열 이름 매핑
+ENROLLMENT_COMPACT_COLUMNS = {
+    '과목코드': 'code',
+    '과목명': 'name',
+    '취득학점': 'cr',
+    '성적': 'gr',
+    '이수학기': 'term',
+    '이수구분': 'etype',
+    '개설학과': 'dept'
+}
+ENROLLMENT_STATS_COMPACT_COLUMNS = {
+    '이수구분': 'etype',
+    '과목수': 'cnt',
+    '총이수과목수': 'total_cnt',
+    '총취득학점': 'total_cr',
+    '평균평점': 'gpa'
+}
 
 class EnrollmentsSearchToolInput(BaseModel):
     """Input schema for EnrollmentsSearchTool."""
@@ -106,158 +128,57 @@ class EnrollmentsSearchTool(BaseTool):
         
         return conditions
 
+    def _memo_key(self, query: str) -> dict:
+        """결과를 결정하는 요소(분기 키워드와 추출 조건)만으로 메모 키를 만듭니다."""
+        return {
+            'all': "내가 이수한" in query or "내 이수" in query or "들은 과목" in query,
+            'semester_branch': "학기" in query,
+            'grade_branch': "성적" in query or any(grade in query for grade in ['A+', 'A', 'B+', 'B', 'C+', 'C', 'D+', 'D', 'F']),
+            'stats': "통계" in query or "요약" in query,
+            'conditions': self._parse_query_conditions(query)
+        }
+
+    @traced_tool_run
+    @memoize_tool_run
     def _run(self, query: str) -> str:
         """Execute database query for authenticated student's enrollment information."""
         try:
             # Database connection
-            connection = mysql.connector.connect(
-                host=os.environ["RDS_HOST"],
-                port=int(os.environ["RDS_PORT"]),
-                database=os.environ["RDS_DATABASE"],
-                user=os.environ["RDS_USERNAME"],
-                password=os.environ["RDS_PASSWORD"]
-            )
-            cursor = connection.cursor(dictionary=True)
+            # 수강 신청 직후에도 최신 이수 내역이 보이도록 복제 지연이 작은 복제본(없으면 주 DB)에서 읽습니다
+            connection = get_connection(FRESH_READ)
+            repository = Repository(connection)
             
             # 현재 인증된 학생 (시뮬레이션용 - 실제로는 세션에서 가져옴)
-            # 테스트를 위해 다인장 학생으로 설정
-            authenticated_student = "다인장"
+            authenticated_student = get_session_student_name('enrollments')
             
             # 먼저 인증된 학생의 student_id 조회
-            student_query = "SELECT student_id FROM students WHERE name = %s"
-            cursor.execute(student_query, (authenticated_student,))
-            student_result = cursor.fetchone()
+            student_id = repository.student_id_by_name(authenticated_student)
             
-            if not student_result:
+            if not student_id:
                 return "인증된 학생 정보를 찾을 수 없습니다."
             
-            student_id = student_result['student_id']
-            
             # 학생의 이수 과목이 있는지 먼저 확인
-            check_query = "SELECT COUNT(DISTINCT course_code) as count FROM enrollments WHERE student_id = %s"
-            cursor.execute(check_query, (student_id,))
-            count_result = cursor.fetchone()
-            
-            if not count_result or count_result['count'] == 0:
+            if repository.enrollment_count(student_id) == 0:
                 return f"학번 {student_id}({authenticated_student}) 학생의 이수 과목 정보가 없습니다."
             
             # 자연어 쿼리 처리 - 개인정보 보호 준수
             if "내가 이수한" in query or "내 이수" in query or "들은 과목" in query:
                 # 전체 이수 과목 조회 (중복 제거)
-                sql_query = """
-                SELECT DISTINCT
-                    e.course_code as 과목코드,
-                    c.course_name as 과목명,
-                    e.earned_credits as 취득학점,
-                    e.enrollment_type as 이수구분,
-                    CASE 
-                        WHEN m.major_name IS NOT NULL THEN 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
-                        ELSE 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
-                    END as 개설학과,
-                    e.enrollment_semester as 이수학기,
-                    e.grade as 성적
-                FROM enrollments e
-                LEFT JOIN courses c ON e.course_code = c.course_code
-                LEFT JOIN major m ON e.offering_department = m.major_code
-                WHERE e.student_id = %s
-                ORDER BY e.enrollment_semester DESC, e.course_code
-                """
-                cursor.execute(sql_query, (student_id,))
-                results = cursor.fetchall()
+                results = repository.enrollments_for_student(student_id)
                 
             elif "학기별" in query or "학기" in query:
                 # 조건 파싱
                 conditions = self._parse_query_conditions(query)
-                
-                sql_query = """
-                SELECT 
-                    e.course_code as 과목코드,
-                    c.course_name as 과목명,
-                    e.earned_credits as 취득학점,
-                    e.enrollment_type as 이수구분,
-                    CASE 
-                        WHEN m.major_name IS NOT NULL THEN 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
-                        ELSE 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
-                    END as 개설학과,
-                    e.enrollment_semester as 이수학기,
-                    e.grade as 성적
-                FROM enrollments e
-                LEFT JOIN courses c ON e.course_code = c.course_code
-                LEFT JOIN major m ON e.offering_department = m.major_code
-                WHERE e.student_id = %s
-                """
-                params = [student_id]
-                
-                if conditions['semester']:
-                    sql_query += " AND e.enrollment_semester = %s"
-                    params.append(conditions['semester'])
-                
-                sql_query += " ORDER BY e.enrollment_semester DESC, e.course_code"
-                cursor.execute(sql_query, params)
-                results = cursor.fetchall()
+                results = repository.enrollments_in_semester(student_id, conditions['semester'])
                 
             elif "성적" in query or any(grade in query for grade in ['A+', 'A', 'B+', 'B', 'C+', 'C', 'D+', 'D', 'F']):
                 # 성적별 이수 과목 조회
                 conditions = self._parse_query_conditions(query)
-                
-                sql_query = """
-                SELECT 
-                    e.course_code as 과목코드,
-                    c.course_name as 과목명,
-                    e.earned_credits as 취득학점,
-                    e.enrollment_type as 이수구분,
-                    CASE 
-                        WHEN m.major_name IS NOT NULL THEN 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
-                        ELSE 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
-                    END as 개설학과,
-                    e.enrollment_semester as 이수학기,
-                    e.grade as 성적
-                FROM enrollments e
-                LEFT JOIN courses c ON e.course_code = c.course_code
-                LEFT JOIN major m ON e.offering_department = m.major_code
-                WHERE e.student_id = %s
-                """
-                params = [student_id]
-                
-                if conditions['grade']:
-                    sql_query += " AND e.grade = %s"
-                    params.append(conditions['grade'])
-                
-                sql_query += " ORDER BY e.enrollment_semester DESC, e.grade DESC"
-                cursor.execute(sql_query, params)
-                results = cursor.fetchall()
+                results = repository.enrollments_with_grade(student_id, conditions['grade'])
                 
             elif "통계" in query or "요약" in query:
                 # 이수 과목 통계 정보
-                sql_query = """
-                SELECT 
-                    COUNT(*) as 총이수과목수,
-                    SUM(e.earned_credits) as 총취득학점,
-                    AVG(CASE 
-                        WHEN e.grade = 'A+' THEN 4.5
-                        WHEN e.grade = 'A' THEN 4.0
-                        WHEN e.grade = 'B+' THEN 3.5
-                        WHEN e.grade = 'B' THEN 3.0
-                        WHEN e.grade = 'C+' THEN 2.5
-                        WHEN e.grade = 'C' THEN 2.0
-                        WHEN e.grade = 'D+' THEN 1.5
-                        WHEN e.grade = 'D' THEN 1.0
-                        ELSE 0
-                    END) as 평균평점,
-                    e.enrollment_type as 이수구분,
-                    COUNT(*) as 과목수
-                FROM enrollments e
-                WHERE e.student_id = %s
-                GROUP BY e.enrollment_type
-                """
-                cursor.execute(sql_query, (student_id,))
-                results = cursor.fetchall()
+                results = repository.enrollment_stats(student_id)
                 
             else:
                 return """
@@ -284,6 +205,12 @@ class EnrollmentsSearchTool(BaseTool):
             display_limit = 15
             display_results = results[:display_limit]
             
+            # 압축 출력 모드: 장식 없이 열 기반 JSON으로 반환 (문장 정리는 최종 답변 단계에서)
+            if is_compact_mode():
+                if "통계" in query or "요약" in query:
+                    return encode_rows('enroll_stats', results, ENROLLMENT_STATS_COMPACT_COLUMNS)
+                return encode_rows('enrollments', display_results, ENROLLMENT_COMPACT_COLUMNS, total_count)
+            
             # 결과 포맷팅
             if "통계" in query or "요약" in query:
                 # 통계 정보 포맷팅
@@ -334,6 +261,5 @@ class EnrollmentsSearchTool(BaseTool):
         except Exception as e:
             return f"데이터베이스 오류: {str(e)}"
         finally:
-            if 'connection' in locals() and connection.is_connected():
-                cursor.close()
+            if 'connection' in locals():
                 connection.close()
\ No newline at end of file
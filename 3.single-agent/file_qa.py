@@ -1,7 +1,163 @@
-from main import process_user_query
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# 일시적인 오류로 보고 재시도할 오류 메시지 패턴
+TRANSIENT_ERROR_PATTERNS = [
+    'throttl', 'timeout', 'timed out', 'too many requests', 'rate exceeded',
+    'serviceunavailable', 'service unavailable', '503', '502', 'connection', 'lost connection', 'degraded'
+]
+
+# 의존성 장애로 축소된 답변(final 이벤트의 degraded)은 정상 답변으로 저장하지 않고 재시도합니다
+DEGRADED_ERROR = "degraded: 학사 시스템 장애로 축소된 답변입니다"
+
+
+def is_transient_error(message: str) -> bool:
+    """재시도하면 성공할 수 있는 일시적 오류인지 판단합니다."""
+    lowered = message.lower()
+    return any(pattern in lowered for pattern in TRANSIENT_ERROR_PATTERNS)
+
+
+def load_questions(path: str) -> list:
+    """질문 파일을 읽습니다. 텍스트(한 줄에 한 질문) 또는 JSONL({"id", "question"})을 지원합니다."""
+    questions = []
+    with open(path, encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('{'):
+                item = json.loads(line)
+                questions.append({
+                    'id': str(item.get('id', line_no)),
+                    'question': item['question']
+                })
+            else:
+                questions.append({'id': str(line_no), 'question': line})
+    return questions
+
+
+def load_completed_ids(output_path: str) -> set:
+    """이미 성공적으로 처리된 질문 ID를 출력 파일에서 읽어옵니다 (체크포인트 재개용)."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 중단 시 마지막 줄이 잘렸을 수 있음
+                continue
+            if record.get('status') == 'ok':
+                completed.add(str(record['id']))
+    return completed
+
+
+def answer_question(item: dict, max_retries: int, backoff: float) -> dict:
+    """질문 하나를 처리하고 답변, 사용 도구, 지연 시간, 토큰 사용량을 기록합니다.
+
+    latency_s는 첫 시도부터 재시도 대기를 포함한 전체 시간, attempt_latency_s는 마지막 시도의 시간입니다.
+    스트림 시작 전에 발생한 예외도 이 질문의 오류로 기록합니다.
+    """
+    from main import stream_user_query
+
+    attempts = 0
+    started_at = time.perf_counter()
+    while True:
+        attempts += 1
+        attempt_started_at = time.perf_counter()
+        tools_used = []
+        answer, token_usage, error = None, {}, None
+
+        try:
+            for event in stream_user_query(item['question']):
+                if event['event'] == 'tool_end':
+                    tools_used.append(event['data']['tool'])
+                elif event['event'] == 'final':
+                    answer = event['data']['answer']
+                    token_usage = event['data']['token_usage']
+                    if event['data'].get('degraded'):
+                        error = DEGRADED_ERROR
+                elif event['event'] == 'error':
+                    error = event['data']['message']
+        except Exception as e:
+            error = f"{type(e).__name__}: {str(e)}"
+
+        attempt_latency = round(time.perf_counter() - attempt_started_at, 3)
+        if error is None or not is_transient_error(error) or attempts > max_retries:
+            break
+        # 지터를 준 지수 백오프
+        time.sleep(backoff * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5))
+
+    return {
+        'id': item['id'],
+        'question': item['question'],
+        'status': 'ok' if error is None else 'error',
+        'answer': answer,
+        'error': error,
+        'tools_used': tools_used,
+        'latency_s': round(time.perf_counter() - started_at, 3),
+        'attempt_latency_s': attempt_latency,
+        'token_usage': token_usage,
+        'attempts': attempts
+    }
+
+
+def run_batch(input_path: str, output_path: str, concurrency: int = 4,
+              max_retries: int = 2, backoff: float = 2.0) -> dict:
+    """질문 파일을 동시 실행 수를 제한해 처리하고, 끝나는 순서대로 JSONL에 기록합니다."""
+    questions = load_questions(input_path)
+    completed_ids = load_completed_ids(output_path)
+    pending = [q for q in questions if q['id'] not in completed_ids]
+
+    print(f"전체 {len(questions)}개 질문 중 {len(completed_ids)}개 완료, {len(pending)}개 처리 예정")
+
+    write_lock = threading.Lock()
+    summary = {'ok': 0, 'error': 0}
+    started_at = time.perf_counter()
+
+    with open(output_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(answer_question, item, max_retries, backoff): item for item in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                record = future.result()
+            except Exception as e:
+                # 한 질문의 실패로 일괄 처리 전체가 멈추지 않도록 오류 결과로 기록합니다
+                item = futures[future]
+                record = {'id': item['id'], 'question': item['question'], 'status': 'error', 'answer': None,
+                          'error': f"{type(e).__name__}: {str(e)}", 'tools_used': [], 'latency_s': 0.0,
+                          'attempt_latency_s': 0.0, 'token_usage': {}, 'attempts': 0}
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+            summary[record['status']] += 1
+            print(f"[{done}/{len(pending)}] {record['id']} {record['status']} ({record['latency_s']}초)")
+
+    summary['elapsed_s'] = round(time.perf_counter() - started_at, 3)
+    print(f"완료: 성공 {summary['ok']}개, 실패 {summary['error']}개, 소요 {summary['elapsed_s']}초")
+    return summary
+
 
 if __name__ == "__main__":
-    question = input("질문을 입력하세요: ").strip()
-    if question:
-        answer = process_user_query(question)
-        print(f"답변: {answer}") 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="파일 기반 질문 응답 (단일 질문 또는 일괄 처리)")
+    parser.add_argument('--input', help="질문 파일 경로 (텍스트 또는 JSONL). 없으면 질문 하나를 입력받습니다")
+    parser.add_argument('--output', default='qa_results.jsonl', help="결과 JSONL 경로 (기존 파일이 있으면 이어서 처리)")
+    parser.add_argument('--concurrency', type=int, default=4, help="동시에 처리할 질문 수")
+    parser.add_argument('--retries', type=int, default=2, help="일시적 오류 재시도 횟수")
+    parser.add_argument('--backoff', type=float, default=2.0, help="재시도 대기 기본 시간(초)")
+    args = parser.parse_args()
+
+    if args.input:
+        run_batch(args.input, args.output, args.concurrency, args.retries, args.backoff)
+    else:
+        from main import process_user_query
+
+        question = input("질문을 입력하세요: ").strip()
+        if question:
+            answer = process_user_query(question)
+            print(f"답변: {answer}")
@@ -1,16 +1,58 @@
 import os
-import json
-import psycopg2
-import psycopg2.extras
-import boto3
+import re
+import threading
 from crewai.tools import BaseTool
 from typing import Type, Dict, List
 from pydantic import BaseModel, Field
-from langchain_aws import BedrockEmbeddings
-from dotenv import load_dotenv
+from config import load_env
+from compact_output import is_compact_mode, to_compact_json
+from tool_memo import memoize_tool_run
+from tracing import traced_tool_run, span, is_tracing_enabled, TracedConnection
+from embedding_cache import create_embedding_cache, CachedEmbeddings
+from embedding_provider import create_embedding_provider, embedding_model_id, CoalescingEmbedder
+from bm25 import get_bm25_index, reciprocal_rank_fusion
+from vector_store import get_vector_store
+from context_compression import is_compression_enabled, select_context
+from cassette import get_cassette, CassetteEmbeddings
+from slow_query_log import wrap_connection
+from resilience import degradation_scope, is_dependency_failure, mark_degraded, remaining, resilient_call
 
-# .env 파일에서 환경변수 로드
-load_dotenv()
+# 임베딩 제공자는 첫 졸업 요건 질문 시 한 번만 생성합니다.
+_embeddings = None
+_embeddings_lock = threading.Lock()
+
+def get_embeddings():
+    """임베딩 제공자를 반환합니다 (RAG_EMBEDDING_PROVIDER=bedrock|local, boto3는 첫 사용 시 import).
+
+    동시에 들어온 질문 임베딩은 한 번의 배치 호출로 묶고, 반복되는 질문은 로컬 캐시(재시작 후에도 유지)에서 가져옵니다.
+    """
+    global _embeddings
+    if _embeddings is None:
+        with _embeddings_lock:
+            if _embeddings is None:
+                cassette = get_cassette()
+                if cassette is not None and cassette.mode == 'replay':
+                    # 재생 모드에서는 임베딩 제공자를 만들지 않고 녹화된 벡터만 사용합니다
+                    # (녹화 키는 모델 ID이므로 Titan/Cohere처럼 차원이 다른 모델의 벡터를 섞어 재생하지 않습니다)
+                    _embeddings = CassetteEmbeddings(None, cassette, embedding_model_id())
+                    return _embeddings
+                provider = create_embedding_provider()
+                embeddings = CoalescingEmbedder(
+                    provider,
+                    max_batch=int(os.environ.get('RAG_EMBEDDING_BATCH', '32')),
+                    max_wait_ms=float(os.environ.get('RAG_EMBEDDING_COALESCE_MS', '5'))
+                )
+                cache = create_embedding_cache()
+                if cache is not None:
+                    embeddings = CachedEmbeddings(embeddings, cache, provider.model_id)
+                if cassette is not None:
+                    embeddings = CassetteEmbeddings(embeddings, cassette, provider.model_id)
+                _embeddings = embeddings
+    return _embeddings
+
+def is_hybrid_search_enabled() -> bool:
+    """BM25 + 벡터 하이브리드 검색 사용 여부 (RAG_HYBRID=0이면 벡터 검색만 사용)."""
+    return os.environ.get('RAG_HYBRID', '1') != '0'
 
 class GraduationRAGToolInput(BaseModel):
     """Input schema for GraduationRAGTool."""
@@ -40,83 +82,174 @@ class GraduationRAGTool(BaseTool):
 
     def _get_db_connection(self):
         """데이터베이스 연결을 반환합니다."""
-        return psycopg2.connect(
-            host=os.environ.get('RAG_DB_HOST', 'localhost'),
-            port=os.environ.get('RAG_DB_PORT', '5432'),
-            database=os.environ.get('RAG_DB_NAME', 'rag_db'),
-            user=os.environ.get('RAG_DB_USER', 'postgres'),
-            password=os.environ.get('RAG_DB_PASSWORD', 'password')
-        )
-
-    def _search_vector_db(self, query: str, top_k: int = 5) -> List[Dict]:
-        """벡터 데이터베이스에서 유사한 문서를 검색합니다."""
+        import psycopg2
+
+        load_env()
+
+        def connect():
+            return psycopg2.connect(
+                host=os.environ.get('RAG_DB_HOST', 'localhost'),
+                port=os.environ.get('RAG_DB_PORT', '5432'),
+                database=os.environ.get('RAG_DB_NAME', 'rag_db'),
+                user=os.environ.get('RAG_DB_USER', 'postgres'),
+                password=os.environ.get('RAG_DB_PASSWORD', 'password'),
+                # 요청에 남은 시간 안에서 연결을 기다리고, 문장은 서버에서 statement_timeout이 지나면 중단됩니다
+                connect_timeout=max(1, int(remaining(float(os.environ.get('RAG_DB_CONNECT_TIMEOUT', '5'))))),
+                options=f"-c statement_timeout={int(os.environ.get('RAG_DB_STATEMENT_TIMEOUT_MS', '5000'))}"
+            )
+
+        with span('connect'):
+            conn = wrap_connection(resilient_call('postgres', connect), connect, 'postgres')
+        return TracedConnection(conn) if is_tracing_enabled() else conn
+
+    def _extract_filters(self, query: str) -> Dict:
+        """질문에서 학과명과 입학년도를 추출합니다."""
+        filters = {}
+
+        dept_match = re.search(r'([가-힣A-Za-z]+(?:학과|학부))', query)
+        if dept_match:
+            filters['department'] = dept_match.group(1)
+
+        year_match = re.search(r'(20\d{2})\s*(?:년도?)?\s*(?:입학|학번)', query)
+        short_year_match = re.search(r'(?<!\d)(\d{2})\s*학번', query)
+        if year_match:
+            filters['admission_year'] = int(year_match.group(1))
+        elif short_year_match:
+            filters['admission_year'] = 2000 + int(short_year_match.group(1))
+
+        return filters
+
+    def _get_student_filters(self) -> Dict:
+        """세션 학생의 학과와 입학년도를 학사 DB에서 조회합니다."""
+        from config import get_session_student_id
+        from db import get_connection, READ
+        from repository import Repository
+
+        student_id = get_session_student_id()
+        if not student_id:
+            return {}
+        try:
+            connection = get_connection(READ)
+            try:
+                row = Repository(connection).student_filters(student_id)
+            finally:
+                connection.close()
+        except Exception as e:
+            print(f"학생 정보 조회 중 오류: {str(e)}")
+            return {}
+
+        filters = {}
+        if row and row.get('department'):
+            filters['department'] = row['department']
+        if row and row.get('admission_year'):
+            filters['admission_year'] = int(row['admission_year'])
+        return filters
+
+    def _resolve_filters(self, query: str) -> Dict:
+        """질문에서 찾은 조건을 우선하고, 빠진 조건은 세션 학생 정보로 채웁니다."""
+        filters = self._extract_filters(query)
+        if len(filters) < 2:
+            for key, value in self._get_student_filters().items():
+                filters.setdefault(key, value)
+        return filters
+
+    def _search_vector_db(self, query: str, top_k: int = 5, filters: Dict = None) -> List[Dict]:
+        """벡터 저장소(pgvector 또는 로컬 색인)에서 유사한 문서를 검색합니다.
+
+        filters({'department': ..., 'admission_year': ...})가 있으면 해당 metadata를 가진 문서로 먼저 좁힌 뒤
+        유사도 순으로 정렬합니다.
+        """
         try:
-            # Bedrock 임베딩 클라이언트 초기화
-            bedrock_region = os.environ.get('BEDROCK_REGION', 'us-east-1')
-            embedding_model_id = os.environ.get('RAG_EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v1')
-            bedrock_client = boto3.client(service_name='bedrock-runtime', region_name=bedrock_region)
-            embeddings = BedrockEmbeddings(client=bedrock_client, model_id=embedding_model_id)
-            
             # 쿼리를 임베딩으로 변환
-            query_embedding = embeddings.embed_query(query)
-            
-            # PostgreSQL 연결
-            conn = self._get_db_connection()
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-            
-            # 벡터 유사도 검색 (코사인 유사도 사용)
-            cursor.execute("""
-                SELECT 
-                    content,
-                    metadata,
-                    1 - (embedding <=> %s::vector) as similarity
-                FROM documents 
-                ORDER BY embedding <=> %s::vector
-                LIMIT %s
-            """, (query_embedding, query_embedding, top_k))
-            
-            results = cursor.fetchall()
-            
-            # 결과를 딕셔너리 리스트로 변환
-            search_results = []
-            for row in results:
-                # metadata가 이미 dict인지 string인지 확인
-                metadata = row['metadata']
-                if isinstance(metadata, str):
-                    metadata = json.loads(metadata) if metadata else {}
-                elif metadata is None:
-                    metadata = {}
-                
-                search_results.append({
-                    'content': row['content'],
-                    'metadata': metadata,
-                    'similarity': float(row['similarity'])
-                })
-            
-            conn.close()
-            return search_results
-            
+            with span('embed'):
+                query_embedding = get_embeddings().embed_query(query)
+            with span('vector_search'):
+                return get_vector_store(self._get_db_connection).search(query_embedding, top_k=top_k, filters=filters)
+
         except Exception as e:
             print(f"벡터 DB 검색 중 오류: {str(e)}")
+            # 임베딩(Bedrock)이나 벡터 DB 장애면 BM25 결과만으로 답하도록 표시합니다
+            if is_dependency_failure(e):
+                mark_degraded('vector_search')
             return []
 
+    def _search_lexical(self, query: str, top_k: int = 5, filters: Dict = None) -> List[Dict]:
+        """BM25로 과목 코드, 학점 수, '졸업논문' 같은 정확한 표현이 들어간 문서를 검색합니다."""
+        # 색인 구축에 실패하면 이전 색인을 쓰므로 벡터 DB 장애 중에도 동작합니다
+        index = get_bm25_index(get_vector_store(self._get_db_connection).load_documents,
+                               float(os.environ.get('RAG_BM25_REFRESH_SECONDS', '600')),
+                               float(os.environ.get('RAG_BM25_RETRY_SECONDS', '30')))
+        if index is None:
+            return []
+        with span('bm25'):
+            return index.search(query, top_k=top_k, filters=filters)
+
+    def _search_hybrid(self, query: str, top_k: int = 5, filters: Dict = None) -> List[Dict]:
+        """벡터 검색과 BM25 검색 결과를 Reciprocal Rank Fusion으로 합친 후보(최대 2 × top_k)를 반환합니다."""
+        vector_results = self._search_vector_db(query, top_k=top_k, filters=filters)
+        lexical_results = self._search_lexical(query, top_k=top_k, filters=filters)
+        return reciprocal_rank_fusion([vector_results, lexical_results])
+
+    def _search_with_filters(self, query: str, top_k: int = 5) -> List[Dict]:
+        """학과/입학년도 조건으로 검색하고, 결과가 없으면 조건을 하나씩 완화합니다."""
+        filters = self._resolve_filters(query)
+        attempts = []
+        if filters:
+            attempts.append(filters)
+        if 'department' in filters and len(filters) > 1:
+            attempts.append({'department': filters['department']})
+        attempts.append(None)
+
+        search = self._search_hybrid if is_hybrid_search_enabled() else self._search_vector_db
+        with degradation_scope() as degraded:
+            for attempt in attempts:
+                search_results = search(query, top_k=top_k, filters=attempt)
+                if search_results:
+                    return search_results
+                # 장애로 비었으면 조건을 완화해도 같은 장애를 다시 기다리게 되므로 멈춥니다
+                if degraded:
+                    break
+        return []
+
+    def _select_relevant(self, query: str, search_results: List[Dict]) -> List[Dict]:
+        """답변에 사용할 문서를 고릅니다.
+
+        하이브리드 결과는 이미 두 검색의 순위를 합친 순서이므로 그대로 후보로 쓰고,
+        벡터 검색만 쓴 경우에는 유사도 임계값(0.7)을 넘는 문서만 후보로 씁니다.
+        압축을 사용하면 후보에서 MMR로 서로 겹치지 않는 3개를 고른 뒤 질문 관련 문장만 남깁니다.
+        """
+        if 'rrf_score' in search_results[0]:
+            candidates = search_results
+        else:
+            candidates = [doc for doc in search_results if doc['similarity'] > 0.7]
+        if candidates and is_compression_enabled():
+            with span('compress'):
+                return select_context(query, candidates, k=3)
+        return candidates[:3]
+
     def _format_rag_results(self, query: str, search_results: List[Dict]) -> str:
         """RAG 검색 결과를 포맷팅합니다."""
         if not search_results:
             return "죄송합니다. 해당 질문에 대한 졸업 요건 정보를 찾을 수 없습니다."
         
+        # 압축 출력 모드: 질문 반복과 머리말 없이 본문과 출처만 반환
+        if is_compact_mode():
+            relevant = self._select_relevant(query, search_results) or search_results[:1]
+            return to_compact_json({
+                't': 'grad',
+                'docs': [doc['content'] for doc in relevant],
+                'src': search_results[0]['metadata'].get('source_file') if search_results[0]['metadata'] else None
+            })
+        
         result = f"=== 졸업 요건 정보 ===\n\n"
         result += f"**질문**: {query}\n\n"
         
         # 가장 관련성 높은 결과들을 조합
-        relevant_content = []
-        for i, doc in enumerate(search_results):
-            if doc['similarity'] > 0.7:  # 유사도 임계값
-                relevant_content.append(doc['content'])
+        relevant_content = [doc['content'] for doc in self._select_relevant(query, search_results)]
         
         if relevant_content:
             result += "**관련 졸업 요건 정보**:\n\n"
-            for i, content in enumerate(relevant_content[:3], 1):  # 상위 3개만 표시
+            for i, content in enumerate(relevant_content, 1):  # 상위 3개만 표시
                 result += f"{i}. {content}\n\n"
         else:
             # 유사도가 낮더라도 가장 관련성 높은 결과 표시
@@ -131,14 +264,24 @@ class GraduationRAGTool(BaseTool):
         
         return result
 
+    @traced_tool_run
+    @memoize_tool_run
     def _run(self, query: str) -> str:
         """졸업 요건 정보를 검색하고 반환합니다."""
         try:
-            # 벡터 데이터베이스에서 관련 문서 검색
-            search_results = self._search_vector_db(query, top_k=5)
-            
+            # 학과/입학년도로 좁힌 뒤 관련 문서 검색 (하이브리드는 순위 융합으로 적은 후보로도 충분)
+            top_k = int(os.environ.get('RAG_TOP_K', '3' if is_hybrid_search_enabled() else '5'))
+            with degradation_scope() as degraded:
+                search_results = self._search_with_filters(query, top_k=top_k)
+
+            if degraded and not search_results:
+                return "졸업 요건 검색 서비스가 일시적으로 응답하지 않아 정보를 가져오지 못했습니다. 잠시 후 다시 시도해주세요."
+
             # 검색 결과를 포맷팅하여 반환
-            return self._format_rag_results(query, search_results)
+            result = self._format_rag_results(query, search_results)
+            if degraded:
+                result = "(벡터 검색 장애로 키워드 검색 결과만 사용했습니다)\n" + result
+            return result
             
         except Exception as e:
             return f"졸업 요건 정보 검색 중 오류가 발생했습니다: {str(e)}"
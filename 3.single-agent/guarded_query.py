@@ -0,0 +1,206 @@
+import os
+import re
+from typing import Dict, List, Set, Tuple
+
+# LLM이 만든 SELECT가 참조할 수 있는 테이블
+ALLOWED_TABLES = {'courses', 'major'}
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_FORBIDDEN = re.compile(
+    r'\b(INTO|UNION|FOR\s+UPDATE|LOCK\s+IN\s+SHARE\s+MODE|SLEEP|BENCHMARK|LOAD_FILE|GET_LOCK|'
+    r'INFORMATION_SCHEMA|PERFORMANCE_SCHEMA|SQLITE_MASTER)\b', re.I
+)
+# 토큰: 문자열, 따옴표 식별자(`..`, [..]), 단어, 숫자, 기호 한 글자
+_TOKEN = re.compile(
+    r"\s+|(?P<string>'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\")"
+    r"|(?P<quoted>`(?:[^`]|``)*`|\[[^\]]*\])|(?P<word>[^\W\d]\w*)|(?P<number>\d[\w.]*)|(?P<symbol>.)",
+    re.S
+)
+# FROM 절을 끝내는 키워드와, 뒤따르는 쉼표가 테이블 구분이 아닌 식(조인 조건, 인덱스 힌트)을 시작하는 키워드
+_FROM_END = {'WHERE', 'GROUP', 'ORDER', 'HAVING', 'LIMIT', 'WINDOW', 'UNION', 'INTO', 'FOR', 'LOCK'}
+_EXPRESSION_START = {'ON', 'USING', 'USE', 'FORCE', 'IGNORE'}
+_LIMIT = re.compile(r'\bLIMIT\s+(\d+)(?:\s*,\s*(\d+))?(?:\s+OFFSET\s+(\d+))?\s*$', re.I)
+
+
+class GuardedQueryError(ValueError):
+    """허용하지 않는 문장이거나 실행 계획이 지나치게 무거울 때 발생합니다."""
+
+
+def _strip_literals(sql: str) -> str:
+    return _STRING.sub("''", sql)
+
+
+def tokenize(sql: str) -> List[Tuple[str, str]]:
+    """sql을 (종류, 값) 토큰 목록으로 나눕니다. 종류는 string, quoted, word, number, symbol입니다."""
+    return [(match.lastgroup, match.group(match.lastgroup)) for match in _TOKEN.finditer(sql) if match.lastgroup]
+
+
+def _identifier(kind: str, value: str) -> str:
+    if kind in ('string', 'quoted'):
+        # SQLite는 FROM 뒤의 따옴표 문자열도 테이블 이름으로 받아들입니다
+        return value[1:-1]
+    return value
+
+
+def referenced_tables(sql: str) -> Set[str]:
+    """FROM 절에서 테이블 자리에 온 모든 이름을 반환합니다.
+
+    FROM, 모든 조인 키워드(JOIN, STRAIGHT_JOIN, NATURAL/CROSS JOIN 등), 조인 조건 밖의 쉼표 바로 뒤가 테이블 자리이며,
+    그 자리에 온 식별자는 별칭이나 키워드처럼 보여도 테이블로 셉니다 (허용 목록에 없으면 거부되도록).
+    """
+    tables = set()
+    tokens = tokenize(sql)
+    in_from = in_expression = expect_table = False
+    depth = 0
+    i = 0
+    while i < len(tokens):
+        kind, value = tokens[i]
+        upper = value.upper()
+        if kind == 'symbol' and value == '(':
+            depth += 1
+        elif kind == 'symbol' and value == ')':
+            depth = max(0, depth - 1)
+        elif expect_table and kind in ('word', 'quoted', 'string'):
+            # db.table 형태는 마지막 이름이 테이블입니다
+            name = _identifier(kind, value)
+            while i + 2 < len(tokens) and tokens[i + 1] == ('symbol', '.') and tokens[i + 2][0] in ('word', 'quoted', 'string'):
+                i += 2
+                name = _identifier(*tokens[i])
+            tables.add(name.lower())
+            expect_table = False
+        elif kind == 'word' and upper == 'FROM':
+            in_from, in_expression, expect_table = True, False, True
+        elif kind == 'word' and upper.endswith('JOIN'):
+            in_from, in_expression, expect_table = True, False, True
+        elif in_from and kind == 'word' and upper in _FROM_END and depth == 0:
+            in_from = in_expression = False
+        elif in_from and kind == 'word' and upper in _EXPRESSION_START:
+            in_expression = True
+        elif in_from and kind == 'symbol' and value == ',':
+            if depth == 0 or not in_expression:
+                in_expression, expect_table = False, True
+        else:
+            expect_table = expect_table and kind == 'symbol' and value == '('
+        i += 1
+    return tables
+
+
+def prepare_select(sql: str, max_rows: int, backend: str, timeout_ms: int) -> str:
+    """단일 SELECT만 허용하고 LIMIT(최대 max_rows+1행)과 MySQL MAX_EXECUTION_TIME 힌트를 넣은 문장을 반환합니다.
+
+    max_rows를 넘는 결과가 있는지 알 수 있도록 한 행을 더 가져옵니다.
+    """
+    statement = sql.strip().rstrip(';').strip()
+    bare = _strip_literals(statement)
+    if not re.match(r'SELECT\b', bare, re.I):
+        raise GuardedQueryError("SELECT 문만 실행할 수 있습니다.")
+    if ';' in bare:
+        raise GuardedQueryError("한 번에 하나의 문장만 실행할 수 있습니다.")
+    if '--' in bare or '/*' in bare or '#' in bare:
+        raise GuardedQueryError("주석이 포함된 쿼리는 실행할 수 없습니다.")
+    if len(re.findall(r'\bSELECT\b', bare, re.I)) > 1:
+        raise GuardedQueryError("하위 쿼리는 사용할 수 없습니다.")
+    forbidden = _FORBIDDEN.search(bare)
+    if forbidden:
+        raise GuardedQueryError(f"허용하지 않는 구문입니다: {forbidden.group(1).upper()}")
+    tables = referenced_tables(statement)
+    if 'courses' not in tables:
+        raise GuardedQueryError("courses 테이블을 조회하는 쿼리만 실행할 수 있습니다.")
+    if tables - ALLOWED_TABLES:
+        raise GuardedQueryError(f"허용하지 않는 테이블입니다: {', '.join(sorted(tables - ALLOWED_TABLES))}")
+
+    limit = max_rows + 1
+    match = _LIMIT.search(statement)
+    if match:
+        offset, count = (match.group(1), match.group(2)) if match.group(2) else (match.group(3), match.group(1))
+        limit = min(limit, int(count))
+        statement = statement[:match.start()].rstrip() + f" LIMIT {limit}" + (f" OFFSET {int(offset)}" if offset else '')
+    else:
+        statement += f" LIMIT {limit}"
+
+    if backend == 'mysql':
+        statement = re.sub(r'^SELECT\b', f"SELECT /*+ MAX_EXECUTION_TIME({int(timeout_ms)}) */", statement, count=1, flags=re.I)
+    return statement
+
+
+def check_plan(connection, statement: str, backend: str, max_examined_rows: int):
+    """EXPLAIN으로 조인 단계별 예상 행 수의 곱(MySQL) 또는 인덱스 없는 중첩 스캔(SQLite)을 확인해 카티전 곱 같은 계획을 거부합니다."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(("EXPLAIN QUERY PLAN " if backend == 'sqlite' else "EXPLAIN ") + statement)
+        columns = [column[0] for column in cursor.description or []]
+        plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+    if backend == 'sqlite':
+        scans = [row['detail'] for row in plan if str(row.get('detail', '')).startswith('SCAN ')]
+        if len(scans) > 1:
+            raise GuardedQueryError(f"인덱스 없이 여러 테이블을 중첩 스캔하는 쿼리입니다 ({'; '.join(scans)})")
+        return
+
+    examined = 1
+    for row in plan:
+        examined *= max(1, int(row.get('rows') or 1))
+    if examined > max_examined_rows:
+        raise GuardedQueryError(f"예상 검사 행 수({examined:,})가 한도({max_examined_rows:,})를 넘습니다. 조건을 추가하세요.")
+
+
+def _row_bytes(row) -> int:
+    values = row.values() if isinstance(row, dict) else row
+    return sum(len(str(value)) for value in values if value is not None)
+
+
+def run_guarded_select(connection, sql: str, backend: str) -> Dict:
+    """LLM이 만든 SELECT를 제한을 걸어 실행하고 {'rows', 'truncated', 'reason'}을 반환합니다.
+
+    - LIMIT: COURSE_SQL_MAX_ROWS(기본 200)행까지만 가져옵니다.
+    - 시간: COURSE_SQL_TIMEOUT_MS(기본 2000ms). MySQL은 MAX_EXECUTION_TIME 힌트, SQLite는 진행 핸들러로 중단합니다.
+    - 메모리: 서버 측(비버퍼) 커서로 COURSE_SQL_FETCH_SIZE행씩 가져오며 COURSE_SQL_MAX_BYTES(기본 256KB)를 넘으면 멈춥니다.
+    - 계획: 예상 검사 행 수가 COURSE_SQL_MAX_EXAMINED_ROWS(기본 100만)를 넘으면 실행하지 않습니다.
+    """
+    max_rows = int(os.environ.get('COURSE_SQL_MAX_ROWS', '200'))
+    timeout_ms = int(os.environ.get('COURSE_SQL_TIMEOUT_MS', '2000'))
+    max_bytes = int(os.environ.get('COURSE_SQL_MAX_BYTES', str(256 * 1024)))
+    fetch_size = int(os.environ.get('COURSE_SQL_FETCH_SIZE', '50'))
+
+    statement = prepare_select(sql, max_rows, backend, timeout_ms)
+    check_plan(connection, statement, backend, int(os.environ.get('COURSE_SQL_MAX_EXAMINED_ROWS', '1000000')))
+
+    if backend == 'sqlite':
+        connection.set_statement_timeout(timeout_ms)
+        cursor = connection.cursor(dictionary=True)
+    else:
+        cursor = connection.cursor(dictionary=True, buffered=False)
+    rows: List[Dict] = []
+    used, reason = 0, None
+    try:
+        cursor.execute(statement)
+        while True:
+            batch = cursor.fetchmany(fetch_size)
+            if not batch:
+                break
+            for row in batch:
+                if len(rows) >= max_rows:
+                    reason = f"최대 {max_rows}행까지만 조회했습니다"
+                    break
+                used += _row_bytes(row)
+                if used > max_bytes:
+                    reason = f"결과가 {max_bytes // 1024}KB를 넘어 {len(rows)}행까지만 조회했습니다"
+                    break
+                rows.append(row)
+            if reason:
+                # mysql.connector의 비버퍼 커서는 읽지 않은 행이 남으면 닫을 때 'Unread result found' 오류를 내므로
+                # 나머지를 읽어 버립니다 (LIMIT으로 최대 max_rows+1행이라 부담이 작습니다)
+                while cursor.fetchmany(fetch_size):
+                    pass
+                break
+    except Exception as e:
+        # MySQL 3024: MAX_EXECUTION_TIME 초과, SQLite: 진행 핸들러가 중단시키면 'interrupted'
+        if getattr(e, 'errno', None) == 3024 or 'interrupted' in str(e).lower():
+            raise GuardedQueryError(f"실행 시간이 {timeout_ms}ms를 넘어 중단했습니다.") from e
+        raise
+    finally:
+        cursor.close()
+        if backend == 'sqlite':
+            connection.set_statement_timeout(None)
+    return {'rows': rows, 'truncated': reason is not None, 'reason': reason}
@@ -0,0 +1,147 @@
+import argparse
+import json
+import re
+import sys
+import threading
+from typing import Callable, Dict, List, Optional
+
+from slow_query_log import fingerprint_sql
+
+_TABLE_ALIAS = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|LEFT\b|RIGHT\b|INNER\b|JOIN\b|GROUP\b|ORDER\b|LIMIT\b)(\w+))?', re.I)
+
+
+class CaptureLog:
+    """SlowQueryLog와 같은 record 인터페이스로 지문별 첫 문장과 실행 계획을 모읍니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries: Dict[str, Dict] = {}
+
+    def record(self, sql: str, params, duration_ms: float, rows: Optional[int], dialect: str,
+               explain: Optional[Callable] = None):
+        if explain is None:
+            return
+        fingerprint, normalized = fingerprint_sql(sql)
+        with self._lock:
+            entry = self.queries.get(fingerprint)
+            if entry is not None:
+                entry['count'] += 1
+                entry['total_ms'] += duration_ms
+                return
+            entry = self.queries[fingerprint] = {
+                'fingerprint': fingerprint, 'sql': normalized, 'raw_sql': sql, 'dialect': dialect,
+                'count': 1, 'total_ms': duration_ms
+            }
+        try:
+            entry['plan'] = explain(sql, params)
+        except Exception as e:
+            entry['plan_error'] = str(e)
+
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    """FROM/JOIN 절에서 별칭 → 테이블 이름 매핑을 만듭니다 (별칭이 없으면 테이블 이름 자신)."""
+    aliases = {}
+    for table, alias in _TABLE_ALIAS.findall(sql):
+        aliases[table.lower()] = table
+        if alias:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def full_scans(entry: Dict, table_rows: Dict[str, int], min_rows: int) -> List[str]:
+    """실행 계획에서 전체 테이블/인덱스 스캔을 찾아 '테이블(방식)' 목록으로 반환합니다. min_rows보다 작은 테이블은 제외합니다."""
+    aliases = table_aliases(entry['raw_sql'])
+    scans = []
+    for row in entry.get('plan', []):
+        if entry['dialect'] == 'sqlite':
+            detail = str(row.get('detail', '') if isinstance(row, dict) else row[-1])
+            match = re.match(r'SCAN (\w+)', detail)
+            if not match:
+                continue
+            table = aliases.get(match.group(1).lower(), match.group(1))
+            kind = 'full index scan' if 'INDEX' in detail else 'full scan'
+            rows = table_rows.get(table, min_rows)
+        elif entry['dialect'] == 'mysql':
+            if row.get('type') not in ('ALL', 'index'):
+                continue
+            table = aliases.get(str(row.get('table', '')).lower(), row.get('table'))
+            kind = 'full scan' if row['type'] == 'ALL' else 'full index scan'
+            rows = int(row.get('rows') or 0)
+        else:
+            text = ' '.join(str(value) for value in (row.values() if isinstance(row, dict) else row))
+            match = re.search(r'Seq Scan on (\w+)', text)
+            if not match:
+                continue
+            table, kind, rows = match.group(1), 'seq scan', table_rows.get(match.group(1), min_rows)
+        if rows >= min_rows:
+            scans.append(f"{table}({kind})")
+    return sorted(set(scans))
+
+
+def count_tables(tables: List[str]) -> Dict[str, int]:
+    """SQLite 실행 계획에는 행 수가 없으므로 테이블별 행 수를 직접 셉니다."""
+    from db import get_connection
+
+    connection = get_connection()
+    counts = {}
+    try:
+        cursor = connection.cursor()
+        for table in tables:
+            try:
+                cursor.execute(f"SELECT COUNT(*) FROM {table}")
+                counts[table] = cursor.fetchone()[0]
+            except Exception:
+                continue
+        cursor.close()
+    finally:
+        connection.close()
+    return counts
+
+
+def advise(include_rag: bool = False, min_rows: int = 1000) -> List[Dict]:
+    """도구 벤치마크 시나리오를 한 번씩 실행해 SQL 지문을 모으고, 실행 계획으로 전체 스캔 여부를 판정합니다."""
+    import os
+    import slow_query_log
+    from benchmark_tools import run_benchmarks
+    from db import get_db_backend
+
+    capture = CaptureLog()
+    os.environ['SLOW_QUERY_LOG'] = '1'
+    slow_query_log.set_slow_query_log(capture)
+    try:
+        run_benchmarks(iterations=1, warmup=0, include_rag=include_rag)
+    finally:
+        os.environ['SLOW_QUERY_LOG'] = '0'
+        slow_query_log.set_slow_query_log(None)
+
+    table_rows = {}
+    if get_db_backend() == 'sqlite':
+        table_rows = count_tables(['courses', 'enrollments', 'students', 'major'])
+    results = []
+    for entry in sorted(capture.queries.values(), key=lambda e: e['total_ms'], reverse=True):
+        entry['full_scans'] = full_scans(entry, table_rows, min_rows)
+        entry['total_ms'] = round(entry['total_ms'], 2)
+        results.append(entry)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="도구 SQL을 재실행해 전체 스캔하는 쿼리를 찾습니다 (migrations.py 적용 후 확인용)")
+    parser.add_argument('--include-rag', action='store_true', help="졸업 요건 PostgreSQL 쿼리도 점검")
+    parser.add_argument('--min-rows', type=int, default=1000, help="이보다 작은 테이블의 스캔은 무시")
+    parser.add_argument('--strict', action='store_true', help="전체 스캔 쿼리가 있으면 종료 코드 1")
+    parser.add_argument('--json', action='store_true', help="실행 계획 포함 JSON 출력")
+    args = parser.parse_args()
+
+    results = advise(args.include_rag, args.min_rows)
+    if args.json:
+        print(json.dumps([{k: v for k, v in entry.items() if k != 'raw_sql'} for entry in results], ensure_ascii=False, indent=2, default=str))
+    else:
+        print(f"\n{'fingerprint':<13} {'ms':>8}  {'상태':<40} sql")
+        for entry in results:
+            status = ('⚠️ ' + ', '.join(entry['full_scans'])) if entry['full_scans'] else ('❓ ' + entry['plan_error'][:40] if 'plan_error' in entry else '✅ 인덱스 사용')
+            print(f"{entry['fingerprint']:<13} {entry['total_ms']:>8}  {status:<40} {entry['sql'][:90]}")
+    scanning = [entry for entry in results if entry['full_scans']]
+    print(f"\n전체 스캔 {len(scanning)}건 / 점검 {len(results)}건")
+    if args.strict and scanning:
+        sys.exit(1)
@@ -0,0 +1,398 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+SUPPORTED_EXTENSIONS = ('.txt', '.md', '.html', '.htm', '.pdf')
+_SENTENCE_END = re.compile(r'(?<=[.!?。])\s+')
+
+
+class _TextExtractor(HTMLParser):
+    """HTML에서 script/style을 제외한 본문 텍스트만 모읍니다."""
+
+    BLOCK_TAGS = {'p', 'div', 'li', 'tr', 'br', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table', 'section'}
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+        elif tag in self.BLOCK_TAGS:
+            self.parts.append('\n\n')
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style') and self._skip:
+            self._skip -= 1
+        elif tag in ('td', 'th'):
+            self.parts.append(' | ')
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def read_document(path: str) -> str:
+    """PDF/HTML/텍스트 파일의 본문을 읽습니다 (PDF는 pypdf가 설치된 경우에만)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.pdf':
+        from pypdf import PdfReader
+        return '\n\n'.join(page.extract_text() or '' for page in PdfReader(path).pages)
+
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    if extension in ('.html', '.htm'):
+        extractor = _TextExtractor()
+        extractor.feed(text)
+        text = ''.join(extractor.parts)
+    return text
+
+
+def chunk_text(text: str, chunk_size: int = 800, overlap: int = 100) -> List[str]:
+    """문단 경계를 유지하며 chunk_size 글자 이하로 나눕니다.
+
+    긴 문단은 문장 단위로 나누고, 새 청크 앞에는 이전 청크 끝 overlap 글자를 붙여 문맥을 잇습니다.
+    """
+    paragraphs = [' '.join(p.split()) for p in re.split(r'\n\s*\n', unicodedata.normalize('NFKC', text))]
+    pieces = []
+    for paragraph in filter(None, paragraphs):
+        sentences = [paragraph] if len(paragraph) <= chunk_size else _SENTENCE_END.split(paragraph)
+        for sentence in filter(None, sentences):
+            # 문장 구분 없이 아주 긴 구간은 글자 수로 자릅니다
+            step = max(1, chunk_size - overlap)
+            pieces.extend(sentence[i:i + chunk_size] for i in range(0, len(sentence), step) if i == 0 or i + overlap < len(sentence))
+
+    chunks, current = [], ''
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > chunk_size:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ''
+            current = f"{tail} {piece}".strip() if len(tail) + len(piece) + 1 <= chunk_size else piece
+        else:
+            current = f"{current} {piece}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(' '.join(text.split()).encode('utf-8')).hexdigest()
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def infer_metadata(relative_path: str) -> Dict:
+    """경로에서 학과와 입학년도를 추정합니다 (예: handbooks/2020/영상디자인학과.pdf)."""
+    metadata = {'source_file': relative_path}
+    dept_match = re.search(r'([가-힣A-Za-z]+(?:학과|학부))', relative_path)
+    if dept_match:
+        metadata['department'] = dept_match.group(1)
+    year_match = re.search(r'(?<!\d)(20\d{2})(?!\d)', relative_path)
+    if year_match:
+        metadata['admission_year'] = int(year_match.group(1))
+    return metadata
+
+
+def scan_files(source_dir: str) -> List[str]:
+    paths = []
+    for root, _, files in os.walk(source_dir):
+        for name in files:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def ensure_schema(conn, dimension: int):
+    """documents 테이블과 증분 색인용 ingest_files 테이블을 준비합니다."""
+    cursor = conn.cursor()
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS documents (
+            id BIGSERIAL PRIMARY KEY,
+            content TEXT NOT NULL,
+            content_hash TEXT,
+            metadata JSONB NOT NULL DEFAULT '{{}}'::jsonb,
+            embedding vector({dimension})
+        )
+    """)
+    cursor.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS documents_content_hash_idx ON documents (content_hash)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS documents_source_file_idx ON documents ((metadata->>'source_file'))")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ingest_files (
+            source_file TEXT PRIMARY KEY,
+            file_hash TEXT NOT NULL,
+            chunk_count INTEGER NOT NULL,
+            ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+    """)
+    conn.commit()
+
+
+def _vector_literal(embedding: List[float]) -> str:
+    return '[' + ','.join(f"{value:.7g}" for value in embedding) + ']'
+
+
+class IngestStats:
+    """적재 처리량 지표입니다."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.files_scanned = 0
+        self.files_unchanged = 0
+        self.files_ingested = 0
+        self.files_failed = 0
+        self.files_pruned = 0
+        self.chunks = 0
+        self.chunks_duplicate = 0
+        self.embeddings_reused = 0
+        self.embeddings_requested = 0
+        self.embed_seconds = 0.0
+        self.copy_seconds = 0.0
+
+    def report(self) -> Dict:
+        elapsed = time.time() - self.started
+        return {
+            'files_scanned': self.files_scanned,
+            'files_unchanged': self.files_unchanged,
+            'files_ingested': self.files_ingested,
+            'files_failed': self.files_failed,
+            'files_pruned': self.files_pruned,
+            'chunks': self.chunks,
+            'chunks_duplicate': self.chunks_duplicate,
+            'embeddings_reused': self.embeddings_reused,
+            'embeddings_requested': self.embeddings_requested,
+            'embed_seconds': round(self.embed_seconds, 2),
+            'copy_seconds': round(self.copy_seconds, 2),
+            'elapsed_seconds': round(elapsed, 2),
+            'chunks_per_second': round(self.chunks / elapsed, 1) if elapsed else 0.0
+        }
+
+
+class DocumentIngestor:
+    """졸업 요건 문서를 청크 → 임베딩 → COPY로 documents 테이블에 적재합니다.
+
+    - 파일 해시가 ingest_files와 같으면 건너뛰고, 바뀐 파일만 기존 행을 지우고 다시 적재합니다.
+    - 이미 저장된 content_hash의 임베딩은 재사용하고, 새 청크만 batch_size 단위로 묶어 workers개 동시에 임베딩합니다.
+    """
+
+    def __init__(self, conn, embeddings, source_dir: str, batch_size: int = 32, workers: int = 4,
+                 chunk_size: int = 800, overlap: int = 100, dimension: int = 1536, retries: int = 2):
+        self.conn = conn
+        self.embeddings = embeddings
+        self.source_dir = source_dir
+        self.batch_size = batch_size
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.dimension = dimension
+        self.retries = retries
+        self.stats = IngestStats()
+
+    def _ingested_hashes(self) -> Dict[str, str]:
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT source_file, file_hash FROM ingest_files")
+        return dict(cursor.fetchall())
+
+    def _existing_embeddings(self, hashes: List[str]) -> Dict[str, str]:
+        """이미 저장된 같은 내용의 임베딩을 벡터 문자열로 반환합니다."""
+        if not hashes:
+            return {}
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT DISTINCT ON (content_hash) content_hash, embedding::text
+            FROM documents
+            WHERE content_hash = ANY(%s) AND embedding IS NOT NULL
+        """, (hashes,))
+        return dict(cursor.fetchall())
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.retries + 1):
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def _embed(self, texts: List[str]) -> List[str]:
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        started = time.time()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = list(executor.map(self._embed_batch, batches))
+        self.stats.embed_seconds += time.time() - started
+        self.stats.embeddings_requested += len(texts)
+        return [_vector_literal(vector) for batch in results for vector in batch]
+
+    def _copy_rows(self, rows: List[tuple]):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for content, hash_value, metadata, embedding in rows:
+            writer.writerow([content, hash_value, json.dumps(metadata, ensure_ascii=False), embedding])
+        buffer.seek(0)
+        started = time.time()
+        self.conn.cursor().copy_expert(
+            "COPY documents (content, content_hash, metadata, embedding) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+        self.stats.copy_seconds += time.time() - started
+
+    def ingest_file(self, path: str, current_hash: str, metadata_overrides: Optional[Dict] = None):
+        relative_path = os.path.relpath(path, self.source_dir)
+        base_metadata = {**infer_metadata(relative_path), **(metadata_overrides or {})}
+
+        chunks, seen = [], set()
+        for chunk in chunk_text(read_document(path), self.chunk_size, self.overlap):
+            hash_value = content_hash(chunk)
+            if hash_value in seen:
+                self.stats.chunks_duplicate += 1
+                continue
+            seen.add(hash_value)
+            chunks.append((chunk, hash_value))
+
+        reused = self._existing_embeddings([hash_value for _, hash_value in chunks])
+        new_chunks = [chunk for chunk, hash_value in chunks if hash_value not in reused]
+        new_embeddings = dict(zip(new_chunks, self._embed(new_chunks))) if new_chunks else {}
+        self.stats.embeddings_reused += len(chunks) - len(new_chunks)
+
+        rows = [
+            (chunk, hash_value, {**base_metadata, 'chunk_index': index}, reused.get(hash_value) or new_embeddings[chunk])
+            for index, (chunk, hash_value) in enumerate(chunks)
+        ]
+
+        # 같은 트랜잭션에서 이전 버전 삭제 + 새 청크 적재 + 파일 해시 기록
+        cursor = self.conn.cursor()
+        cursor.execute("DELETE FROM documents WHERE metadata->>'source_file' = %s", (relative_path,))
+        if rows:
+            self._copy_rows(rows)
+        cursor.execute("""
+            INSERT INTO ingest_files (source_file, file_hash, chunk_count, ingested_at)
+            VALUES (%s, %s, %s, now())
+            ON CONFLICT (source_file) DO UPDATE
+            SET file_hash = EXCLUDED.file_hash, chunk_count = EXCLUDED.chunk_count, ingested_at = now()
+        """, (relative_path, current_hash, len(rows)))
+        self.conn.commit()
+        self.stats.chunks += len(rows)
+
+    def prune(self, present: List[str]):
+        """원본에서 사라진 파일의 청크를 삭제합니다."""
+        cursor = self.conn.cursor()
+        for source_file in set(self._ingested_hashes()) - set(present):
+            cursor.execute("DELETE FROM documents WHERE metadata->>'source_file' = %s", (source_file,))
+            cursor.execute("DELETE FROM ingest_files WHERE source_file = %s", (source_file,))
+            self.stats.files_pruned += 1
+        self.conn.commit()
+
+    def run(self, force: bool = False, prune: bool = False, metadata_overrides: Optional[Dict] = None) -> Dict:
+        ensure_schema(self.conn, self.dimension)
+        ingested = {} if force else self._ingested_hashes()
+        paths = scan_files(self.source_dir)
+
+        for path in paths:
+            self.stats.files_scanned += 1
+            relative_path = os.path.relpath(path, self.source_dir)
+            current_hash = file_hash(path)
+            if ingested.get(relative_path) == current_hash:
+                self.stats.files_unchanged += 1
+                continue
+            try:
+                self.ingest_file(path, current_hash, metadata_overrides)
+                self.stats.files_ingested += 1
+                print(f"✅ {relative_path}")
+            except Exception as e:
+                self.conn.rollback()
+                self.stats.files_failed += 1
+                print(f"❌ {relative_path}: {str(e)}")
+
+        if prune:
+            self.prune([os.path.relpath(path, self.source_dir) for path in paths])
+        if self.stats.files_ingested or self.stats.files_pruned:
+            self.conn.cursor().execute("ANALYZE documents")
+            self.conn.commit()
+        return self.stats.report()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="졸업 요건 문서를 pgvector documents 테이블에 적재")
+    parser.add_argument('--source', default='handbooks', help="문서 디렉터리 (PDF/HTML/TXT/MD)")
+    parser.add_argument('--department', help="모든 문서에 지정할 학과 (기본: 경로에서 추정)")
+    parser.add_argument('--admission-year', type=int, help="모든 문서에 지정할 입학년도 (기본: 경로에서 추정)")
+    parser.add_argument('--batch-size', type=int, default=32, help="임베딩 요청당 청크 수")
+    parser.add_argument('--workers', type=int, default=4, help="동시 임베딩 요청 수")
+    parser.add_argument('--chunk-size', type=int, default=800, help="청크 최대 글자 수")
+    parser.add_argument('--overlap', type=int, default=100, help="청크 간 겹치는 글자 수")
+    parser.add_argument('--force', action='store_true', help="변경 여부와 관계없이 모두 다시 적재")
+    parser.add_argument('--prune', action='store_true', help="원본에서 사라진 파일의 청크 삭제")
+    parser.add_argument('--dry-run', action='store_true', help="DB/임베딩 호출 없이 청크 수만 출력")
+    parser.add_argument('--local-index', help="PostgreSQL 대신 이 디렉터리에 로컬 벡터 색인을 새로 생성")
+    parser.add_argument('--quantize', action='store_true', help="로컬 색인에 int8 양자화 행렬도 생성")
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.department:
+        overrides['department'] = args.department
+    if args.admission_year:
+        overrides['admission_year'] = args.admission_year
+
+    if args.dry_run:
+        total = 0
+        for path in scan_files(args.source):
+            relative_path = os.path.relpath(path, args.source)
+            count = len(chunk_text(read_document(path), args.chunk_size, args.overlap))
+            total += count
+            print(f"{relative_path}: {count}개 청크 {json.dumps({**infer_metadata(relative_path), **overrides}, ensure_ascii=False)}")
+        print(f"\n총 {total}개 청크")
+    elif args.local_index:
+        from graduation_rag_tool import get_embeddings
+        from vector_store import LocalVectorStore
+
+        ingestor = DocumentIngestor(None, get_embeddings(), args.source, batch_size=args.batch_size,
+                                    workers=args.workers, chunk_size=args.chunk_size, overlap=args.overlap)
+        rows = []
+        for path in scan_files(args.source):
+            relative_path = os.path.relpath(path, args.source)
+            metadata = {**infer_metadata(relative_path), **overrides}
+            chunks = list(dict.fromkeys(chunk_text(read_document(path), args.chunk_size, args.overlap)))
+            vectors = ingestor._embed(chunks) if chunks else []
+            rows.extend(
+                (chunk, {**metadata, 'chunk_index': index}, json.loads(vector))
+                for index, (chunk, vector) in enumerate(zip(chunks, vectors))
+            )
+            ingestor.stats.files_ingested += 1
+            ingestor.stats.chunks += len(chunks)
+        LocalVectorStore.build(args.local_index, rows, quantize=args.quantize)
+        print(f"✅ 로컬 색인 생성: {args.local_index}")
+        for key, value in ingestor.stats.report().items():
+            print(f"{key}: {value}")
+    else:
+        from graduation_rag_tool import GraduationRAGTool, get_embeddings
+
+        conn = GraduationRAGTool()._get_db_connection()
+        try:
+            ingestor = DocumentIngestor(
+                conn, get_embeddings(), args.source,
+                batch_size=args.batch_size, workers=args.workers,
+                chunk_size=args.chunk_size, overlap=args.overlap,
+                dimension=getattr(get_embeddings(), 'dimension', None) or int(os.environ.get('RAG_EMBEDDING_DIM', '1536'))
+            )
+            report = ingestor.run(force=args.force, prune=args.prune, metadata_overrides=overrides)
+        finally:
+            conn.close()
+        print("\n=== 적재 결과 ===")
+        for key, value in report.items():
+            print(f"{key}: {value}")
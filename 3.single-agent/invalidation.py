@@ -0,0 +1,56 @@
+import threading
+from typing import Callable, Dict, Iterable, List
+
+# 변경 범위: 'catalog'(과목/학과) 또는 'student:<학번>'(학생 정보/이수 내역)
+CATALOG_SCOPE = 'catalog'
+STUDENT_SCOPE_PREFIX = 'student:'
+
+
+def student_scope(student_id: str) -> str:
+    return f"{STUDENT_SCOPE_PREFIX}{student_id}"
+
+
+def scope_student_id(scope: str):
+    """'student:<학번>' 범위의 학번을 반환합니다 (다른 범위면 None)."""
+    return scope[len(STUDENT_SCOPE_PREFIX):] if scope.startswith(STUDENT_SCOPE_PREFIX) else None
+
+
+class InvalidationBus:
+    """도구 프로세스 안의 캐시 무효화 알림입니다.
+
+    데이터 변경을 감지한 쪽(change_tracking.VersionWatcher)이 바뀐 범위 목록을 publish하면
+    구독한 캐시(답변 캐시, 세션 도구 메모 등)가 해당 범위의 항목만 지웁니다.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Callable[[str], None]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, name: str, callback: Callable[[str], None]):
+        """같은 name으로 다시 구독하면 이전 콜백을 바꿉니다."""
+        with self._lock:
+            self._subscribers[name] = callback
+
+    def unsubscribe(self, name: str):
+        with self._lock:
+            self._subscribers.pop(name, None)
+
+    def publish(self, scopes: Iterable[str]):
+        scopes: List[str] = list(scopes)
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+            self.published += len(scopes)
+        for scope in scopes:
+            for name, callback in subscribers:
+                try:
+                    callback(scope)
+                except Exception as e:
+                    print(f"캐시 무효화 중 오류 ({name}, {scope}): {str(e)}")
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {'subscribers': sorted(self._subscribers), 'published': self.published}
+
+
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Dict, List
+
+DEFAULT_QUESTIONS = [
+    "내 정보를 조회해주세요",
+    "내가 이수한 과목 보여주세요",
+    "다음 학기 개설 과목 알려줘",
+    "내 전공 졸업 요건 알려줘",
+    "다음 학기 수강 추천해줘",
+    "나와 비슷한 학생들 정보",
+]
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def install_stub_llm(think_ms: float, jitter_ms: float, scripts: List[Dict] = None, student_id: str = '', seed: int = 42):
+    """main의 공용 LLM을 StubLLM으로 바꾸고 에이전트를 다시 만들게 합니다."""
+    import main
+    from stub_llm import StubLLM
+
+    with main._init_lock:
+        main._llm = StubLLM(scripts=scripts, think_ms=think_ms, jitter_ms=jitter_ms, student_id=student_id, seed=seed)
+        main._agent = None
+    return main._llm
+
+
+def run_level(concurrency: int, duration: float, questions: List[str]) -> Dict:
+    """concurrency명의 학생이 duration초 동안 쉬지 않고 질문하는 닫힌 부하를 걸고 결과를 집계합니다."""
+    import db
+    from main import process_user_query
+    from resilience import breaker_report
+    from stub_llm import stub_llm_stats
+
+    db.connection_pool.reset()
+    stub_llm_stats.reset()
+    latencies, errors = [], []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def student(worker: int):
+        index = worker
+        while time.perf_counter() < deadline:
+            question = questions[index % len(questions)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                answer = process_user_query(question)
+                failed = None if answer and answer.strip() else "빈 답변"
+            except Exception as e:
+                failed = f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if failed:
+                    errors.append(failed)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=student, args=(i,), daemon=True) for i in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    llm = stub_llm_stats.report()
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'throughput_per_s': round(len(latencies) / wall, 2) if wall else 0.0,
+        'p50_ms': round(_percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(_percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 1),
+        'error_rate': round(len(errors) / len(latencies), 4) if latencies else 0.0,
+        'tool_error_rate': round(llm['tool_errors'] / llm['tool_steps'], 4) if llm['tool_steps'] else 0.0,
+        'llm_calls': llm['calls'],
+        'db_pool': db.connection_pool.report(),
+        'db_replicas': db.get_replica_report(),
+        'breakers': breaker_report(),
+        'sample_errors': sorted(set(errors))[:5]
+    }
+
+
+def print_level(result: Dict):
+    pool = result['db_pool']
+    print(f"동시 {result['concurrency']:>3}명 | {result['throughput_per_s']:>7}/s | "
+          f"p50 {result['p50_ms']:>8}ms p95 {result['p95_ms']:>8}ms p99 {result['p99_ms']:>8}ms | "
+          f"오류 {result['error_rate']:.1%} (도구 {result['tool_error_rate']:.1%}) | "
+          f"DB 최대 {pool['peak_in_use']}개, 대기 {pool['waits']}회 {pool['wait_ms_total']}ms, 초과 {pool['timeouts']}회")
+    if result['db_replicas']:
+        routed = ', '.join(f"{replica['target']} {replica['routed']}회" for replica in result['db_replicas']['replicas'])
+        print(f"    복제본 누적: {routed}, 주 DB 대체 {result['db_replicas']['primary_fallbacks']}회")
+    opened = {name: breaker for name, breaker in result['breakers'].items() if breaker['opened'] or breaker['retries']}
+    for name, breaker in opened.items():
+        print(f"    차단기 {name}: {breaker['state']}, 재시도 {breaker['retries']}회, 열림 {breaker['opened']}회, 거절 {breaker['rejected']}회")
+    for error in result['sample_errors']:
+        print(f"    - {error}")
+
+
+def find_saturation(levels: List[Dict], min_gain: float = 0.1) -> Dict:
+    """동시 사용자를 늘려도 처리량이 min_gain 이상 늘지 않는 첫 단계를 포화 지점으로 봅니다."""
+    for previous, current in zip(levels, levels[1:]):
+        if current['throughput_per_s'] < previous['throughput_per_s'] * (1 + min_gain):
+            return previous
+    return levels[-1] if levels else {}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="stub LLM으로 에이전트+도구 전체 경로의 동시 부하 테스트")
+    parser.add_argument('--ramp', type=int, nargs='+', default=[1, 2, 4, 8, 16], help="단계별 동시 학생 수")
+    parser.add_argument('--duration', type=float, default=30, help="단계별 측정 시간(초)")
+    parser.add_argument('--questions', help="질문 목록 파일 (한 줄에 하나)")
+    parser.add_argument('--think-ms', type=float, default=800, help="stub LLM 호출당 대기 시간")
+    parser.add_argument('--jitter-ms', type=float, default=200, help="대기 시간 흔들림 폭")
+    parser.add_argument('--script', help="도구 호출 스크립트 JSON 경로 ([{keywords, steps}] 형식)")
+    parser.add_argument('--sqlite-path', help="합성 데이터 SQLite 경로 (지정하면 DB_BACKEND=sqlite)")
+    parser.add_argument('--local-rag', action='store_true', help="로컬 벡터 색인 + 로컬 임베딩 사용")
+    parser.add_argument('--pool-size', type=int, default=0, help="동시 DB 연결 상한 (0이면 제한 없이 측정만)")
+    parser.add_argument('--pool-timeout', type=float, default=10, help="DB 연결 대기 한도(초)")
+    parser.add_argument('--answer-cache', action='store_true', help="답변 캐시 사용 (기본은 꺼서 매번 전체 경로 실행)")
+    parser.add_argument('--save', help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    if args.sqlite_path:
+        os.environ['DB_BACKEND'] = 'sqlite'
+        os.environ['SQLITE_PATH'] = args.sqlite_path
+    if args.local_rag:
+        os.environ['RAG_VECTOR_STORE'] = 'local'
+        os.environ['RAG_EMBEDDING_PROVIDER'] = 'local'
+    if not args.answer_cache:
+        os.environ['ANSWER_CACHE'] = '0'
+
+    import db
+    from benchmark_tools import _lookup_student_id
+
+    db.set_connection_limit(args.pool_size, args.pool_timeout)
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding='utf-8') as f:
+            questions = [line.strip() for line in f if line.strip()]
+    scripts = None
+    if args.script:
+        with open(args.script, encoding='utf-8') as f:
+            scripts = json.load(f)
+    install_stub_llm(args.think_ms, args.jitter_ms, scripts, student_id=_lookup_student_id())
+
+    levels = []
+    for concurrency in args.ramp:
+        result = run_level(concurrency, args.duration, questions)
+        print_level(result)
+        levels.append(result)
+
+    knee = find_saturation(levels)
+    if knee:
+        print(f"\n처리량 포화 지점: 동시 {knee['concurrency']}명 ({knee['throughput_per_s']}/s, p95 {knee['p95_ms']}ms)")
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'think_ms': args.think_ms, 'pool_size': args.pool_size, 'levels': levels}, f, ensure_ascii=False, indent=2)
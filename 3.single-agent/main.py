@@ -1,52 +1,81 @@
 import os
-from crewai import Agent, Crew, Task, Process, LLM
-from dotenv import load_dotenv
-from datetime import datetime
-from student_db_tool import StudentDBTool
-from course_search_tool import CourseSearchTool, get_current_semester_info
-from enrollments_search_tool import EnrollmentsSearchTool
-from graduation_rag_tool import GraduationRAGTool
-from recommendation_engine_tool import RecommendationEngineTool
-
-# Load environment variables
-load_dotenv()
-
-# 현재 날짜와 학기 정보 가져오기
-semester_info = get_current_semester_info()
-
-# AWS Bedrock configuration using CrewAI LLM
-model_id = os.environ["BEDROCK_MODEL_ID"]
-
-# Create LLM instance with Bedrock
-llm = LLM(
-    model=f"bedrock/{model_id}",
-    temperature=0.2,
-    max_tokens=1000
-)
-
-# Create tool instances
-student_db_tool = StudentDBTool()
-course_search_tool = CourseSearchTool()
-enrollments_search_tool = EnrollmentsSearchTool()
-graduation_rag_tool = GraduationRAGTool()
-recommendation_engine_tool = RecommendationEngineTool()
-
-# Create Agent with both tools and current date context
-agent = Agent(
-    role='학생 정보 및 강의 상담사',
-    goal='데이터베이스 조회 결과만을 사용하여 정확한 정보를 제공하며, 절대로 추측하거나 임의의 정보를 생성하지 않습니다',
-    backstory=f'''당신은 데이터베이스 조회 결과만을 사용하는 엄격한 상담사입니다.
-    
-    📅 현재 날짜 정보:
-    - 오늘 날짜: {semester_info['current_date']}
-    - 현재 학기: {"방학 기간" if not semester_info['current_semester'] else f"{semester_info['current_semester_year']}년 {semester_info['current_semester']}학기"}
-    - 다음 학기: {semester_info['next_semester_year']}년 {semester_info['next_semester']}학기
-    - 지난 학기: {semester_info['prev_semester_year']}년 {semester_info['prev_semester']}학기
+import threading
+import time
+from config import get_bedrock_model_id, get_session_student_id, SESSION_STUDENT_NAMES
+from streaming import stream_kickoff, astream, print_stream
+
+# crewai, 도구 모듈, DB/Bedrock 드라이버는 첫 질문이 들어올 때 로드합니다.
+_llm = None
+_tools = None
+_agent = None
+_init_lock = threading.RLock()
+# 도구가 조회하는 학생 이름 → 학번 (이름과 학번의 대응은 바뀌지 않으므로 한 번만 조회)
+_student_ids = {}
+
+# DB/Bedrock 장애로 답변을 만들지 못했을 때 반환하는 안내 (답변 캐시에 저장하지 않음)
+DEGRADED_ANSWER = "현재 일부 학사 시스템이 일시적으로 응답하지 않아 답변을 완성하지 못했습니다. 잠시 후 다시 질문해주세요."
+
+def create_llm(stream: bool = False):
+    """Bedrock LLM 인스턴스를 생성합니다. stream=True이면 토큰 단위 스트리밍을 사용합니다.
+
+    정적 system 접두부는 모델이 지원하면 제공자 측 프롬프트 캐시에 올립니다.
+    """
+    from prompt_cache import CachingLLM
+
+    # AWS Bedrock configuration using CrewAI LLM
+    return CachingLLM(
+        model=f"bedrock/{get_bedrock_model_id()}",
+        temperature=0.2,
+        max_tokens=1000,
+        stream=stream,
+        # LLM 호출 한 번(hop)의 제한 시간입니다. 요청 전체는 REQUEST_DEADLINE_SECONDS로 제한됩니다
+        timeout=float(os.environ.get('BEDROCK_TIMEOUT_SECONDS', '30'))
+    )
+
+def get_llm():
+    """공용 LLM 인스턴스를 반환합니다 (첫 호출 시 생성)."""
+    global _llm
+    with _init_lock:
+        if _llm is None:
+            _llm = create_llm()
+    return _llm
+
+def get_tools() -> list:
+    """도구 인스턴스 목록을 반환합니다 (첫 호출 시 생성)."""
+    global _tools
+    with _init_lock:
+        if _tools is None:
+            from student_db_tool import StudentDBTool
+            from course_search_tool import CourseSearchTool
+            from enrollments_search_tool import EnrollmentsSearchTool
+            from graduation_rag_tool import GraduationRAGTool
+            from recommendation_engine_tool import RecommendationEngineTool
+
+            _tools = [
+                StudentDBTool(),
+                CourseSearchTool(),
+                EnrollmentsSearchTool(),
+                GraduationRAGTool(),
+                RecommendationEngineTool()
+            ]
+    return _tools
+
+def build_backstory() -> str:
+    """에이전트 배경 설명(정적 접두부)을 생성합니다.
+
+    날짜처럼 매번 바뀌는 정보는 넣지 않아야 모든 LLM 호출에서 같은 접두부가 되어
+    제공자 측 프롬프트 캐시를 재사용할 수 있습니다. 날짜 정보는 build_date_context()가 Task에 붙입니다.
+    """
+    from compact_output import is_compact_mode, COMPACT_OUTPUT_GUIDE
+
+    # 압축 출력 모드에서는 도구 결과 해석 방법을 안내합니다
+    output_guide = f"\n    \n    {COMPACT_OUTPUT_GUIDE}" if is_compact_mode() else ""
+
+    return f'''당신은 데이터베이스 조회 결과만을 사용하는 엄격한 상담사입니다.
     
     📚 학기 일정:
     - 1학기: 3월 ~ 6월 20일
     - 2학기: 9월 ~ 12월 20일
-    - 현재는 {"방학 기간" if not semester_info['current_semester'] else "학기 중"}입니다.
     
     🔧 도구별 역할:
     - StudentDBTool: 학생 정보 조회/열람 전용 (추천 기능 없음)
@@ -65,35 +94,231 @@ agent = Agent(
     7. 이수 과목 질문 → EnrollmentsSearchTool 사용
     8. 졸업 요건 질문 → GraduationRAGTool 사용
     9. 수강 추천 질문 → RecommendationEngineTool 사용 (먼저 StudentDBTool로 학생 정보 확인 필요)
-    10. 위에 제공된 현재 날짜와 학기 정보를 활용하여 정확한 시간 기준으로 답변합니다
+    10. 작업 설명에 제공된 현재 날짜와 학기 정보를 활용하여 정확한 시간 기준으로 답변합니다
     
-    답변 형식: 도구 조회 결과를 그대로 전달하되, 사용자가 이해하기 쉽게 정리해서 제공합니다.''',
-    llm=llm,
-    tools=[student_db_tool, course_search_tool, enrollments_search_tool, graduation_rag_tool, recommendation_engine_tool],
-    verbose=True
-)
+    답변 형식: 도구 조회 결과를 그대로 전달하되, 사용자가 이해하기 쉽게 정리해서 제공합니다.{output_guide}'''
+
+def build_date_context() -> str:
+    """현재 날짜와 학기 정보(동적 접미부)를 생성합니다."""
+    from course_search_tool import get_current_semester_info
+
+    # 현재 날짜와 학기 정보 가져오기
+    semester_info = get_current_semester_info()
+
+    return f'''📅 현재 날짜 정보:
+    - 오늘 날짜: {semester_info['current_date']}
+    - 현재 학기: {"방학 기간" if not semester_info['current_semester'] else f"{semester_info['current_semester_year']}년 {semester_info['current_semester']}학기"}
+    - 다음 학기: {semester_info['next_semester_year']}년 {semester_info['next_semester']}학기
+    - 지난 학기: {semester_info['prev_semester_year']}년 {semester_info['prev_semester']}학기
+    - 현재는 {"방학 기간" if not semester_info['current_semester'] else "학기 중"}입니다.'''
+
+def create_agent(agent_llm=None, step_callback=None):
+    """도구를 갖춘 상담 에이전트를 생성합니다 (배경 설명은 캐시 가능한 정적 접두부)."""
+    from crewai import Agent
+
+    return Agent(
+        role='학생 정보 및 강의 상담사',
+        goal='데이터베이스 조회 결과만을 사용하여 정확한 정보를 제공하며, 절대로 추측하거나 임의의 정보를 생성하지 않습니다',
+        backstory=build_backstory(),
+        llm=agent_llm or get_llm(),
+        tools=get_tools(),
+        step_callback=step_callback,
+        verbose=True
+    )
+
+def get_agent():
+    """공용 에이전트를 반환합니다 (첫 호출 시 생성)."""
+    global _agent
+    with _init_lock:
+        if _agent is None:
+            _agent = create_agent()
+    return _agent
 
-def create_query_task(user_question: str) -> Task:
+def create_query_task(user_question: str, task_agent=None):
     """사용자 질문에 따라 동적으로 Task를 생성합니다."""
+    from crewai import Task
+
     return Task(
-        description=f"사용자의 질문에 답해주세요: {user_question}",
-        agent=agent,
+        description=f"{build_date_context()}\n\n사용자의 질문에 답해주세요: {user_question}",
+        agent=task_agent or get_agent(),
         expected_output="사용자 질문에 대한 정확하고 간결한 답변"
     )
 
-def process_user_query(question: str) -> str:
-    """사용자 질문을 받아서 적절한 도구를 사용하여 답변을 제공합니다."""
-    task = create_query_task(question)
+def build_crew(question: str, crew_agent=None):
+    """질문 하나를 처리할 Crew를 구성합니다."""
+    from crewai import Crew, Process
+
+    crew_agent = crew_agent or get_agent()
+    task = create_query_task(question, crew_agent)
     
-    crew = Crew(
-        agents=[agent],
+    return Crew(
+        agents=[crew_agent],
         tasks=[task],
         process=Process.sequential,
         verbose=True
     )
-    
-    result = crew.kickoff()
-    return result
+
+def _session_student_key(student_id: str = None) -> str:
+    """이 요청의 도구가 조회하는 학생들의 학번을 쉼표로 이은 값을 반환합니다 (학번을 알 수 없으면 '').
+
+    도구는 인증된 학생을 이름(config.SESSION_STUDENT_NAMES)으로 조회하므로 같은 이름으로 학번을 찾고,
+    student_id 또는 NXT_STUDENT_ID(졸업 요건 필터)가 있으면 함께 넣습니다.
+    """
+    from db import get_connection, READ
+    from repository import Repository
+
+    ids = {student_id or get_session_student_id()}
+    missing = [name for name in SESSION_STUDENT_NAMES.values() if name not in _student_ids]
+    if missing:
+        try:
+            connection = get_connection(READ)
+            try:
+                repository = Repository(connection)
+                for name in missing:
+                    found = repository.student_id_by_name(name)
+                    if found:
+                        _student_ids[name] = str(found)
+            finally:
+                connection.close()
+        except Exception as e:
+            print(f"세션 학생 학번 조회 중 오류: {str(e)}")
+            return ''
+    for name in SESSION_STUDENT_NAMES.values():
+        if name not in _student_ids:
+            return ''
+        ids.add(_student_ids[name])
+    return ','.join(sorted(sid for sid in ids if sid))
+
+def _answer_cache_scope(student_id: str = None):
+    """답변 캐시 키의 (학번, 학기, 데이터 버전) 부분을 반환합니다.
+
+    학번이나 데이터 버전을 알 수 없으면 캐시할 수 없으므로 None을 반환합니다.
+    """
+    from course_search_tool import get_current_semester_info
+    from answer_cache import get_data_version, is_known_version
+
+    student_key = _session_student_key(student_id)
+    if not student_key:
+        return None
+    data_version = get_data_version().current(student_key)
+    if not is_known_version(data_version):
+        return None
+    semester_info = get_current_semester_info()
+    semester = f"{semester_info['current_semester_year']}-{semester_info['current_semester']}/{semester_info['next_semester_year']}-{semester_info['next_semester']}"
+    return student_key, semester, data_version
+
+def kickoff_with_tool_memo(crew, student_id: str = None):
+    """도구 호출 메모이제이션 범위 안에서 crew.kickoff()를 실행합니다.
+
+    TOOL_MEMO_SESSION_TTL(초)이 설정되면 같은 학생의 여러 요청에 걸쳐 결과를 재사용합니다.
+    """
+    from tool_memo import tool_memo_scope, get_session_memo
+
+    session_ttl = float(os.environ.get('TOOL_MEMO_SESSION_TTL', '0'))
+    # 세션 메모는 데이터 변경 알림(student:<학번>)으로 비울 수 있도록 도구가 조회하는 학생들의 학번으로 나눕니다
+    session_key = _session_student_key(student_id) if session_ttl > 0 else ''
+    memo = get_session_memo(session_key, session_ttl) if session_key else None
+    with tool_memo_scope(memo):
+        return crew.kickoff()
+
+def kickoff_with_deadline(crew, student_id: str = None) -> tuple:
+    """요청 마감(REQUEST_DEADLINE_SECONDS, 기본 90초) 안에서 kickoff_with_tool_memo를 실행하고 (결과, 축소 여부)를 반환합니다.
+
+    DB/Bedrock 장애(회로 열림, 마감 초과, 재시도 후에도 남은 일시적 오류)로 실패하면 오류 대신 DEGRADED_ANSWER를,
+    도구가 장애로 일부 결과만 썼으면 축소 여부 True를 반환합니다. 축소된 답변은 캐시하지 않습니다.
+    """
+    from resilience import deadline_scope, degradation_scope, is_dependency_failure
+
+    with deadline_scope(float(os.environ.get('REQUEST_DEADLINE_SECONDS', '90'))), degradation_scope() as degraded:
+        try:
+            result = kickoff_with_tool_memo(crew, student_id)
+        except Exception as e:
+            if not is_dependency_failure(e):
+                raise
+            print(f"의존성 장애로 축소된 답변을 반환합니다: {str(e)}")
+            return DEGRADED_ANSWER, True
+    return result, bool(degraded)
+
+def _cache_answer(question: str, scope: tuple, answer: str, latency: float):
+    """답변을 캐시에 저장합니다. 저장 실패는 이미 만든 답변을 버리지 않도록 기록만 합니다."""
+    from answer_cache import get_answer_cache
+
+    try:
+        get_answer_cache().put(question, *scope, answer, latency)
+    except Exception as e:
+        print(f"답변 캐시 저장 중 오류: {str(e)}")
+
+def process_user_query(question: str, student_id: str = None) -> str:
+    """사용자 질문을 받아서 적절한 도구를 사용하여 답변을 제공합니다.
+
+    같은 학생·학기·데이터 버전에서 이미 답한 질문은 답변 캐시에서 바로 반환합니다.
+    """
+    from answer_cache import get_answer_cache, is_answer_cache_enabled
+    from tracing import start_trace, span
+
+    with start_trace(question):
+        scope = None
+        if is_answer_cache_enabled():
+            with span('answer_cache'):
+                scope = _answer_cache_scope(student_id)
+                cached = get_answer_cache().get(question, *scope) if scope else None
+            if cached is not None:
+                return cached
+
+        started_at = time.perf_counter()
+        crew = build_crew(question)
+        result, degraded = kickoff_with_deadline(crew, student_id)
+        result = str(result)
+
+        if scope and not degraded:
+            _cache_answer(question, scope, result, time.perf_counter() - started_at)
+        return result
+
+def stream_user_query(question: str, student_id: str = None):
+    """도구 진행 이벤트와 최종 답변 토큰을 생성되는 즉시 반환하는 제너레이터입니다.
+
+    요청마다 스트리밍 LLM과 에이전트를 따로 만들어 동시 요청의 이벤트가 섞이지 않게 합니다.
+    답변 캐시에 있으면 start, final(cached=True) 이벤트만 반환합니다.
+    """
+    from answer_cache import get_answer_cache, is_answer_cache_enabled
+    from tracing import start_trace
+
+    scope = _answer_cache_scope(student_id) if is_answer_cache_enabled() else None
+    if scope:
+        cached = get_answer_cache().get(question, *scope)
+        if cached is not None:
+            yield {'event': 'start', 'data': {}, 'elapsed': 0.0}
+            yield {'event': 'final', 'data': {'answer': cached, 'token_usage': {}, 'cached': True, 'degraded': False}, 'elapsed': 0.0}
+            return
+
+    state = {'degraded': False}
+
+    def run_crew(crew):
+        # 크루는 스트리밍 작업 스레드에서 실행되므로 추적과 마감도 그 스레드에서 시작합니다
+        with start_trace(question):
+            result, state['degraded'] = kickoff_with_deadline(crew, student_id)
+            return result
+
+    stream_llm = create_llm(stream=True)
+    events = stream_kickoff(
+        lambda step_callback: build_crew(question, create_agent(stream_llm, step_callback)),
+        stream_llm,
+        run_crew
+    )
+    for event in events:
+        if event['event'] != 'final':
+            yield event
+            continue
+        # 장애로 축소된 답변은 호출한 쪽(file_qa 등)이 정상 답변과 구분할 수 있게 표시합니다
+        event['data']['degraded'] = state['degraded']
+        # 최종 답변을 먼저 보내고 캐시에 저장합니다
+        yield event
+        if scope and not state['degraded']:
+            _cache_answer(question, scope, event['data']['answer'], event['elapsed'])
+
+def astream_user_query(question: str, student_id: str = None):
+    """stream_user_query의 비동기 이터레이터 버전입니다 (HTTP SSE 엔드포인트용)."""
+    return astream(stream_user_query(question, student_id))
 
 if __name__ == "__main__":
     # 테스트용 예시들
@@ -119,9 +344,19 @@ if __name__ == "__main__":
     while True:
         user_input = input("\n질문: ").strip()
         if user_input.lower() in ['quit', 'exit', '종료']:
+            from prompt_cache import prompt_cache_stats
+            from answer_cache import get_answer_cache
+            from tool_memo import tool_memo_stats
+            from context_compression import compression_stats
+            print(f"프롬프트 캐시 현황: {prompt_cache_stats.report()}")
+            print(f"답변 캐시 현황: {get_answer_cache().report()}")
+            print(f"도구 호출 중복 제거 현황: {tool_memo_stats.report()}")
+            print(f"졸업 요건 컨텍스트 압축 현황: {compression_stats.report()}")
+            from tracing import is_tracing_enabled, metrics, print_summary
+            if is_tracing_enabled():
+                print_summary(metrics.to_json(include_traces=False)['stages'])
             break
         if user_input:
-            result = process_user_query(user_input)
-            print(f"답변: {result}")
+            print_stream(stream_user_query(user_input))
         else:
             print("질문을 입력해주세요.")
\ No newline at end of file
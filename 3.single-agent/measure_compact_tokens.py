@@ -0,0 +1,71 @@
+import argparse
+import os
+from compact_output import estimate_tokens
+
+# 질문별로 에이전트가 일반적으로 호출하는 도구 순서
+SCENARIOS = [
+    ("내 정보를 조회해주세요", [('student_db_tool', {'query': '내 정보 조회'})]),
+    ("내가 이수한 과목 보여주세요", [('enrollments_search_tool', {'query': '내가 이수한 과목'})]),
+    ("이수 과목 통계 알려줘", [('enrollments_search_tool', {'query': '이수 과목 통계'})]),
+    ("다음 학기 개설 과목 알려줘", [('course_search_tool', {'query': '다음 학기 개설 과목'})]),
+    ("심리학 관련 강의 검색해줘", [('course_search_tool', {'query': '심리학 관련 강의'})]),
+    ("내 전공 졸업 요건 알려줘", [
+        ('student_db_tool', {'query': '내 정보 조회'}),
+        ('graduation_rag_tool', {'query': '내 전공 졸업 요건'})
+    ]),
+]
+
+
+def build_tools() -> dict:
+    """측정에 사용할 도구 인스턴스를 이름별로 반환합니다."""
+    from main import get_tools
+    return {tool.name: tool for tool in get_tools()}
+
+
+def run_tool_calls(tools: dict, calls: list, mode: str) -> list:
+    """지정한 출력 모드로 도구들을 실행하고 각 결과의 추정 토큰 수를 반환합니다."""
+    os.environ['TOOL_OUTPUT_MODE'] = mode
+    return [estimate_tokens(tools[name]._run(**kwargs)) for name, kwargs in calls]
+
+
+def prompt_tokens(output_tokens: list) -> int:
+    """도구 결과가 이후 모든 LLM 호출에 다시 포함된다고 보고 누적 프롬프트 토큰을 계산합니다.
+
+    k개의 도구 호출이 있으면 i번째 결과는 (k - i + 1)번의 LLM 호출에 다시 읽힙니다.
+    """
+    k = len(output_tokens)
+    return sum(tokens * (k - i) for i, tokens in enumerate(output_tokens))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="도구 출력 모드별 프롬프트 토큰 측정")
+    parser.add_argument('--student-id', help="추천 시나리오에 사용할 학번 (없으면 추천 시나리오 생략)")
+    args = parser.parse_args()
+
+    scenarios = list(SCENARIOS)
+    if args.student_id:
+        scenarios.append(("다음 학기 수강 추천해줘", [
+            ('student_db_tool', {'query': '내 정보 조회'}),
+            ('recommendation_engine_tool', {'student_id': args.student_id})
+        ]))
+
+    tools = build_tools()
+    original_mode = os.environ.get('TOOL_OUTPUT_MODE')
+    total_text, total_compact = 0, 0
+
+    print(f"{'질문':<30} {'text':>8} {'compact':>8} {'감소율':>8}")
+    for question, calls in scenarios:
+        text_tokens = prompt_tokens(run_tool_calls(tools, calls, 'text'))
+        compact_tokens = prompt_tokens(run_tool_calls(tools, calls, 'compact'))
+        total_text += text_tokens
+        total_compact += compact_tokens
+        reduction = (1 - compact_tokens / text_tokens) if text_tokens else 0
+        print(f"{question:<30} {text_tokens:>8} {compact_tokens:>8} {reduction:>8.1%}")
+
+    if total_text:
+        print(f"\n전체: {total_text} → {total_compact} 토큰 ({1 - total_compact / total_text:.1%} 감소)")
+
+    if original_mode is None:
+        os.environ.pop('TOOL_OUTPUT_MODE', None)
+    else:
+        os.environ['TOOL_OUTPUT_MODE'] = original_mode
@@ -0,0 +1,167 @@
+import argparse
+import sys
+import time
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class Index(NamedTuple):
+    table: str
+    name: str
+    columns: Tuple[str, ...]
+    kind: str = 'btree'   # btree | fulltext (MySQL ngram 파서, 다른 DB에서는 건너뜀)
+
+
+# (버전, 설명, 인덱스 목록) — 도구 SQL의 조회 경로별로 필요한 인덱스입니다. 한 번 배포한 버전은 고치지 말고 새 버전을 추가합니다.
+MIGRATIONS = [
+    (1, "학기별 개설 과목 조회 (다음/지난/이번 학기)", [
+        Index('courses', 'idx_courses_offered_term', ('offered_year', 'offered_semester')),
+    ]),
+    (2, "학과별 개설 과목과 교양 과목 조회 (추천, 학과 조인)", [
+        Index('courses', 'idx_courses_department', ('department',)),
+        Index('courses', 'idx_courses_type', ('course_type',)),
+        Index('major', 'idx_major_code', ('major_code',)),
+    ]),
+    (3, "학생별 이수 내역 조회", [
+        Index('enrollments', 'idx_enrollments_student_semester', ('student_id', 'enrollment_semester')),
+    ]),
+    (4, "인증 학생 조회와 같은 학과·입학년도 통계", [
+        Index('students', 'idx_students_name', ('name',)),
+        Index('students', 'idx_students_major_admission', ('major_code', 'admission_year')),
+    ]),
+    (5, "과목명/학과명 부분 검색 (MySQL ngram FULLTEXT)", [
+        Index('courses', 'ft_courses_name', ('course_name',), 'fulltext'),
+        Index('major', 'ft_major_names', ('department', 'major_name'), 'fulltext'),
+    ]),
+]
+
+
+def _index_exists(cursor, backend: str, index: Index) -> bool:
+    if backend == 'sqlite':
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = %s", (index.name,))
+    else:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+            (index.table, index.name)
+        )
+    return cursor.fetchone() is not None
+
+
+def create_index_sql(backend: str, index: Index) -> str:
+    columns = ', '.join(index.columns)
+    if index.kind == 'fulltext':
+        return f"ALTER TABLE {index.table} ADD FULLTEXT INDEX {index.name} ({columns}) WITH PARSER ngram"
+    if backend == 'mysql':
+        # 운영 중인 RDS에서도 쓰기를 막지 않도록 온라인 DDL로 만듭니다
+        return f"CREATE INDEX {index.name} ON {index.table} ({columns}) ALGORITHM=INPLACE LOCK=NONE"
+    return f"CREATE INDEX {index.name} ON {index.table} ({columns})"
+
+
+def drop_index_sql(backend: str, index: Index) -> str:
+    if backend == 'sqlite':
+        return f"DROP INDEX {index.name}"
+    return f"DROP INDEX {index.name} ON {index.table}"
+
+
+def _supported(backend: str, index: Index) -> bool:
+    return index.kind != 'fulltext' or backend == 'mysql'
+
+
+def ensure_migration_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(200),
+            applied_at VARCHAR(20)
+        )
+    """)
+
+
+def applied_versions(cursor) -> Dict[int, str]:
+    ensure_migration_table(cursor)
+    cursor.execute("SELECT version, applied_at FROM schema_migrations ORDER BY version")
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def migrate_up(connection, backend: str, target: int = None) -> List[int]:
+    """target 버전(기본: 최신)까지 적용되지 않은 마이그레이션을 순서대로 적용합니다.
+
+    이미 같은 이름의 인덱스가 있으면 만들지 않으므로 수동으로 만든 인덱스가 있어도 안전합니다.
+    """
+    cursor = connection.cursor()
+    applied = applied_versions(cursor)
+    done = []
+    for version, description, indexes in MIGRATIONS:
+        if version in applied or (target is not None and version > target):
+            continue
+        for index in indexes:
+            if not _supported(backend, index):
+                print(f"  - {index.name}: {backend}에서는 지원하지 않아 건너뜀")
+                continue
+            if _index_exists(cursor, backend, index):
+                print(f"  - {index.name}: 이미 있음")
+                continue
+            started = time.time()
+            cursor.execute(create_index_sql(backend, index))
+            print(f"  - {index.name} 생성 ({time.time() - started:.1f}초)")
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, description, applied_at) VALUES (%s, %s, %s)",
+            (version, description, time.strftime('%Y-%m-%d %H:%M:%S'))
+        )
+        connection.commit()
+        print(f"✅ {version}: {description}")
+        done.append(version)
+    cursor.close()
+    return done
+
+
+def migrate_down(connection, backend: str, target: int) -> List[int]:
+    """target 버전보다 새로 적용된 마이그레이션의 인덱스를 역순으로 삭제합니다."""
+    cursor = connection.cursor()
+    applied = applied_versions(cursor)
+    undone = []
+    for version, description, indexes in reversed(MIGRATIONS):
+        if version <= target or version not in applied:
+            continue
+        for index in reversed(indexes):
+            if _supported(backend, index) and _index_exists(cursor, backend, index):
+                cursor.execute(drop_index_sql(backend, index))
+                print(f"  - {index.name} 삭제")
+        cursor.execute("DELETE FROM schema_migrations WHERE version = %s", (version,))
+        connection.commit()
+        print(f"↩️ {version}: {description}")
+        undone.append(version)
+    cursor.close()
+    return undone
+
+
+def print_status(connection):
+    cursor = connection.cursor()
+    applied = applied_versions(cursor)
+    cursor.close()
+    for version, description, indexes in MIGRATIONS:
+        mark = f"적용됨 {applied[version]}" if version in applied else "미적용"
+        print(f"{version:>3}  {mark:<26} {description} ({', '.join(index.name for index in indexes)})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="학사 DB 인덱스 마이그레이션 (DB_BACKEND=mysql|sqlite)")
+    parser.add_argument('command', choices=['status', 'up', 'down'])
+    parser.add_argument('--to', type=int, help="up: 이 버전까지 적용, down: 이 버전까지 되돌림 (0이면 전부)")
+    args = parser.parse_args()
+
+    from db import get_connection, get_db_backend
+
+    connection = get_connection()
+    try:
+        if args.command == 'status':
+            print_status(connection)
+        elif args.command == 'up':
+            migrate_up(connection, get_db_backend(), args.to)
+        else:
+            if args.to is None:
+                print("down은 --to 버전을 지정해야 합니다.")
+                sys.exit(1)
+            migrate_down(connection, get_db_backend(), args.to)
+    finally:
+        connection.close()
@@ -0,0 +1,172 @@
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List
+
+from crewai import LLM
+from cassette import get_cassette
+from compact_output import estimate_tokens
+from resilience import resilient_call
+from tracing import span
+
+# Bedrock에서 프롬프트 캐싱을 지원하는 모델 ID 패턴
+PROMPT_CACHE_MODEL_PATTERNS = [
+    'claude-3-5-haiku', 'claude-3-7-sonnet', 'claude-sonnet-4', 'claude-opus-4',
+    'claude-haiku-4', 'amazon.nova'
+]
+# 제공자 측 캐시 유지 시간 (Bedrock 기본 5분)
+PROMPT_CACHE_TTL_SECONDS = 300
+
+
+def supports_prompt_caching(model: str) -> bool:
+    """모델이 제공자 측 프롬프트 캐싱을 지원하는지 반환합니다 (PROMPT_CACHE=on/off로 강제 가능)."""
+    setting = os.environ.get('PROMPT_CACHE', 'auto').lower()
+    if setting in ('on', 'true', '1'):
+        return True
+    if setting in ('off', 'false', '0'):
+        return False
+    return any(pattern in model for pattern in PROMPT_CACHE_MODEL_PATTERNS)
+
+
+class PromptCacheStats:
+    """요청별 프롬프트 토큰 중 캐시에서 처리된 양을 집계합니다.
+
+    estimated_*: 정적 접두부가 TTL 안에 다시 쓰였는지로 로컬에서 추정한 값
+    reported_*: 제공자(litellm 사용량)가 실제로 보고한 값
+    """
+
+    def __init__(self, history_size: int = 200):
+        self._lock = threading.Lock()
+        self._prefix_last_seen = {}
+        self.history = deque(maxlen=history_size)
+        self.requests = 0
+        self.estimated_prompt_tokens = 0
+        self.estimated_cached_tokens = 0
+        self.reported_prompt_tokens = 0
+        self.reported_cache_read_tokens = 0
+        self.reported_cache_write_tokens = 0
+
+    def record_request(self, prefix: str, prompt_text: str) -> Dict:
+        """LLM 요청 하나의 정적 접두부/전체 토큰을 기록합니다."""
+        prefix_tokens = estimate_tokens(prefix)
+        prompt_tokens = estimate_tokens(prompt_text)
+        prefix_key = hashlib.sha256(prefix.encode('utf-8')).hexdigest()
+        now = time.time()
+
+        with self._lock:
+            last_seen = self._prefix_last_seen.get(prefix_key)
+            cached = prefix_tokens if last_seen and now - last_seen < PROMPT_CACHE_TTL_SECONDS else 0
+            self._prefix_last_seen[prefix_key] = now
+            self.requests += 1
+            self.estimated_prompt_tokens += prompt_tokens
+            self.estimated_cached_tokens += cached
+            entry = {
+                'prefix_tokens': prefix_tokens,
+                'prompt_tokens': prompt_tokens,
+                'estimated_cached_tokens': cached
+            }
+            self.history.append(entry)
+        return entry
+
+    def record_usage(self, usage):
+        """제공자가 보고한 토큰 사용량(캐시 읽기/쓰기 포함)을 기록합니다."""
+        if usage is None:
+            return
+        details = getattr(usage, 'prompt_tokens_details', None)
+        cache_read = getattr(usage, 'cache_read_input_tokens', None)
+        if cache_read is None and details is not None:
+            cache_read = getattr(details, 'cached_tokens', 0)
+        with self._lock:
+            self.reported_prompt_tokens += getattr(usage, 'prompt_tokens', 0) or 0
+            self.reported_cache_read_tokens += cache_read or 0
+            self.reported_cache_write_tokens += getattr(usage, 'cache_creation_input_tokens', 0) or 0
+
+    def report(self) -> Dict:
+        """누적 캐시 적중 현황을 반환합니다."""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'estimated_prompt_tokens': self.estimated_prompt_tokens,
+                'estimated_cached_tokens': self.estimated_cached_tokens,
+                'estimated_cached_ratio': round(self.estimated_cached_tokens / self.estimated_prompt_tokens, 3)
+                if self.estimated_prompt_tokens else 0.0,
+                'reported_prompt_tokens': self.reported_prompt_tokens,
+                'reported_cache_read_tokens': self.reported_cache_read_tokens,
+                'reported_cache_write_tokens': self.reported_cache_write_tokens,
+                'reported_cached_ratio': round(self.reported_cache_read_tokens / self.reported_prompt_tokens, 3)
+                if self.reported_prompt_tokens else 0.0
+            }
+
+
+prompt_cache_stats = PromptCacheStats()
+_usage_callback_registered = False
+_usage_callback_lock = threading.Lock()
+
+
+def _register_usage_callback():
+    """litellm 성공 콜백으로 제공자가 보고한 캐시 사용량을 수집합니다."""
+    global _usage_callback_registered
+    with _usage_callback_lock:
+        if _usage_callback_registered:
+            return
+        try:
+            import litellm
+        except ImportError:
+            return
+
+        def _on_success(kwargs, response, start_time, end_time):
+            prompt_cache_stats.record_usage(getattr(response, 'usage', None))
+
+        litellm.success_callback.append(_on_success)
+        _usage_callback_registered = True
+
+
+def _message_text(message: Dict) -> str:
+    content = message.get('content', '')
+    if isinstance(content, list):
+        return ''.join(block.get('text', '') for block in content if isinstance(block, dict))
+    return str(content)
+
+
+def mark_static_prefix(messages: List[Dict]) -> List[Dict]:
+    """마지막 system 메시지(정적 접두부)에 cache_control 지점을 표시한 새 메시지 목록을 반환합니다."""
+    marked = [dict(message) for message in messages]
+    for message in reversed(marked):
+        if message.get('role') == 'system':
+            message['content'] = [{
+                'type': 'text',
+                'text': _message_text(message),
+                'cache_control': {'type': 'ephemeral'}
+            }]
+            break
+    return marked
+
+
+class CachingLLM(LLM):
+    """정적 system 접두부를 제공자 측 프롬프트 캐시에 올리고 캐시 사용량을 집계하는 LLM입니다."""
+
+    def call(self, messages, *args, **kwargs):
+        if isinstance(messages, str):
+            messages = [{'role': 'user', 'content': messages}]
+
+        # CASSETTE_MODE=record|replay면 응답을 요청 지문별로 녹화하거나 녹화본에서 재생합니다
+        cassette = get_cassette()
+        if cassette is not None:
+            return cassette.llm_call(self.model, messages, lambda: self._call_provider(messages, *args, **kwargs))
+        return self._call_provider(messages, *args, **kwargs)
+
+    def _call_provider(self, messages, *args, **kwargs):
+        prefix = ''.join(_message_text(m) for m in messages if m.get('role') == 'system')
+        prompt_cache_stats.record_request(prefix, ''.join(_message_text(m) for m in messages))
+
+        if prefix and supports_prompt_caching(self.model):
+            _register_usage_callback()
+            messages = mark_static_prefix(messages)
+        # 에이전트 루프의 LLM 호출(hop) 하나당 한 번 기록됩니다
+        # 스트리밍 중 재시도하면 이미 보낸 토큰이 중복되므로 스트리밍은 차단기만 거칩니다
+        provider_call = super().call
+        with span('llm', component='agent'):
+            return resilient_call('bedrock', lambda: provider_call(messages, *args, **kwargs),
+                                  retries=0 if self.stream else None)
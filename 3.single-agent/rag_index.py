@@ -0,0 +1,103 @@
+import argparse
+import math
+
+# documents 테이블의 인덱스 이름
+EMBEDDING_INDEX_NAMES = {
+    'hnsw': 'documents_embedding_hnsw_idx',
+    'ivfflat': 'documents_embedding_ivfflat_idx'
+}
+METADATA_GIN_INDEX = 'documents_metadata_gin_idx'
+
+
+def get_rag_connection():
+    """RAG(pgvector) 데이터베이스 연결을 반환합니다."""
+    from graduation_rag_tool import GraduationRAGTool
+    return GraduationRAGTool()._get_db_connection()
+
+
+def _ivfflat_lists(row_count: int) -> int:
+    """pgvector 권장값: 100만 행 이하는 rows/1000, 그 이상은 sqrt(rows)."""
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return int(math.sqrt(row_count))
+
+
+def ensure_rag_indexes(conn, method: str = 'hnsw', rebuild: bool = False) -> list:
+    """졸업 요건 검색에 필요한 인덱스를 만들고, 실행한 DDL 목록을 반환합니다.
+
+    - metadata JSONB GIN 인덱스: metadata @> '{"department": ..., "admission_year": ...}' 사전 필터용
+    - 임베딩 ANN 인덱스: hnsw(기본) 또는 ivfflat, 다른 방식의 인덱스는 제거
+    """
+    executed = []
+    cursor = conn.cursor()
+
+    def run(sql):
+        cursor.execute(sql)
+        executed.append(sql)
+
+    run("CREATE EXTENSION IF NOT EXISTS vector")
+
+    # metadata가 json/text이면 GIN(@>)을 쓸 수 없으므로 jsonb로 변환합니다.
+    cursor.execute("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_name = 'documents' AND column_name = 'metadata'
+    """)
+    column = cursor.fetchone()
+    if column and column[0] != 'jsonb':
+        run("ALTER TABLE documents ALTER COLUMN metadata TYPE jsonb USING metadata::jsonb")
+
+    run(f"CREATE INDEX IF NOT EXISTS {METADATA_GIN_INDEX} ON documents USING gin (metadata jsonb_path_ops)")
+
+    for other_method, index_name in EMBEDDING_INDEX_NAMES.items():
+        if other_method != method or rebuild:
+            run(f"DROP INDEX IF EXISTS {index_name}")
+
+    index_name = EMBEDDING_INDEX_NAMES[method]
+    if method == 'hnsw':
+        run(f"""CREATE INDEX IF NOT EXISTS {index_name}
+                ON documents USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64)""")
+    else:
+        # ivfflat은 데이터가 있어야 클러스터를 학습하므로 행 수에 맞춰 lists를 정합니다.
+        cursor.execute("SELECT COUNT(*) FROM documents")
+        lists = _ivfflat_lists(cursor.fetchone()[0])
+        run(f"""CREATE INDEX IF NOT EXISTS {index_name}
+                ON documents USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})""")
+
+    run("ANALYZE documents")
+    conn.commit()
+    return executed
+
+
+def index_status(conn) -> dict:
+    """documents 테이블의 행 수와 인덱스 정의를 반환합니다."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM documents")
+    row_count = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT indexname, indexdef, pg_size_pretty(pg_relation_size(indexname::regclass))
+        FROM pg_indexes WHERE tablename = 'documents'
+    """)
+    return {
+        'rows': row_count,
+        'indexes': [{'name': name, 'definition': definition, 'size': size} for name, definition, size in cursor.fetchall()]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="졸업 요건 RAG(pgvector) 인덱스 관리")
+    parser.add_argument('--method', choices=['hnsw', 'ivfflat'], default='hnsw', help="임베딩 ANN 인덱스 방식")
+    parser.add_argument('--rebuild', action='store_true', help="임베딩 인덱스를 다시 생성 (ivfflat은 데이터가 크게 늘었을 때)")
+    parser.add_argument('--status', action='store_true', help="인덱스 현황만 출력")
+    args = parser.parse_args()
+
+    conn = get_rag_connection()
+    try:
+        if not args.status:
+            for sql in ensure_rag_indexes(conn, args.method, args.rebuild):
+                print(f"✅ {' '.join(sql.split())}")
+        status = index_status(conn)
+        print(f"\n문서 수: {status['rows']}")
+        for index in status['indexes']:
+            print(f"- {index['name']} ({index['size']}): {index['definition']}")
+    finally:
+        conn.close()
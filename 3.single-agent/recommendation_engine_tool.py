@@ -1,13 +1,11 @@
-import os
-import json
-import mysql.connector
 from crewai.tools import BaseTool
 from typing import Type, Dict, List, Optional
 from pydantic import BaseModel, Field
-from dotenv import load_dotenv
-
-# .env 파일에서 환경변수 로드
-load_dotenv()
+from db import get_connection, READ, FRESH_READ
+from repository import Repository
+from compact_output import is_compact_mode, to_compact_json
+from tool_memo import memoize_tool_run
+from tracing import traced_tool_run
 
 class RecommendationEngineToolInput(BaseModel):
     """Input schema for RecommendationEngineTool."""
@@ -40,39 +38,18 @@ class RecommendationEngineTool(BaseTool):
     """
     args_schema: Type[BaseModel] = RecommendationEngineToolInput
 
-    def _get_db_connection(self):
-        """MySQL 데이터베이스 연결을 반환합니다."""
-        return mysql.connector.connect(
-            host=os.environ.get('RDS_HOST', 'localhost'),
-            port=int(os.environ.get('RDS_PORT', '3306')),
-            database=os.environ.get('RDS_DATABASE', 'nxtclass_db'),
-            user=os.environ.get('RDS_USERNAME', 'admin'),
-            password=os.environ.get('RDS_PASSWORD', 'password')
-        )
+    def _get_db_connection(self, route: str = READ):
+        """MySQL 데이터베이스 연결을 반환합니다 (기본: 읽기 복제본)."""
+        return get_connection(route)
 
     def _get_student_info(self, student_id: str) -> Dict:
         """학생 기본 정보를 조회합니다."""
         try:
             conn = self._get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT 
-                    s.student_id, 
-                    s.name, 
-                    s.major_code,
-                    s.admission_year, 
-                    s.completed_semester,
-                    m.major_name,
-                    m.college,
-                    m.department
-                FROM students s
-                LEFT JOIN major m ON s.major_code = m.major_code
-                WHERE s.student_id = %s
-            """, (student_id,))
-            
-            student_info = cursor.fetchone()
-            conn.close()
+            try:
+                student_info = Repository(conn).student_detail(student_id)
+            finally:
+                conn.close()
             
             return student_info if student_info else {}
             
@@ -83,30 +60,12 @@ class RecommendationEngineTool(BaseTool):
     def _get_completed_courses(self, student_id: str) -> List[Dict]:
         """학생의 수강 완료 과목 목록을 조회합니다."""
         try:
-            conn = self._get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            cursor.execute("""
-                SELECT 
-                    e.course_code,
-                    c.course_name,
-                    c.credits,
-                    c.course_type,
-                    c.department,
-                    e.grade,
-                    e.enrollment_semester as semester
-                FROM enrollments e
-                JOIN courses c ON e.course_code = c.course_code
-                WHERE e.student_id = %s 
-                AND e.grade IS NOT NULL 
-                AND e.grade NOT IN ('F', 'NP')
-                ORDER BY e.enrollment_semester
-            """, (student_id,))
-            
-            completed_courses = cursor.fetchall()
-            conn.close()
-            
-            return completed_courses
+            # 방금 받은 성적이 빠지지 않도록 복제 지연이 작은 곳에서 읽습니다
+            conn = self._get_db_connection(FRESH_READ)
+            try:
+                return Repository(conn).completed_courses(student_id)
+            finally:
+                conn.close()
             
         except Exception as e:
             print(f"수강 완료 과목 조회 중 오류: {str(e)}")
@@ -116,25 +75,10 @@ class RecommendationEngineTool(BaseTool):
         """특정 학기에 개설되는 과목 목록을 조회합니다."""
         try:
             conn = self._get_db_connection()
-            cursor = conn.cursor(dictionary=True)
-            
-            # 다음 학기 개설 과목이 있는지 확인 (실제 스키마에 맞게 수정)
-            cursor.execute("""
-                SELECT DISTINCT
-                    c.course_code,
-                    c.course_name,
-                    c.credits,
-                    c.course_type,
-                    c.department,
-                    c.note as description
-                FROM courses c
-                WHERE c.department = %s
-                OR c.course_type IN ('교양기초', '교양선택', '핵심교양')
-                ORDER BY c.course_type, c.course_name
-                LIMIT 50
-            """, (major_code,))
-            
-            available_courses = cursor.fetchall()
+            try:
+                available_courses = Repository(conn).available_courses(major_code)
+            finally:
+                conn.close()
             
             # 앞 5자리 기준으로 중복 제거
             unique_courses = []
@@ -146,7 +90,6 @@ class RecommendationEngineTool(BaseTool):
                     unique_courses.append(course)
                     seen_prefixes.add(course_prefix)
             
-            conn.close()
             return unique_courses
             
         except Exception as e:
@@ -283,6 +226,24 @@ class RecommendationEngineTool(BaseTool):
         if not recommendations:
             return f"죄송합니다. {semester} 학기에 추천할 수 있는 과목을 찾을 수 없습니다."
         
+        # 압축 출력 모드: 진행 상황과 추천 목록만 열 기반 JSON으로 반환
+        if is_compact_mode():
+            return to_compact_json({
+                't': 'recs',
+                'ctx': {'term': semester, 'max_cr': max_credits},
+                'prog': {
+                    'total': [progress['total_credits'], progress['required_total']],
+                    'major': [progress['major_credits'], progress['required_major']],
+                    'liberal': [progress['liberal_credits'], progress['required_liberal']]
+                },
+                'cols': ['code', 'name', 'cr', 'type', 'why'],
+                'rows': [
+                    [rec['course']['course_code'], rec['course']['course_name'], rec['course']['credits'],
+                     rec['course']['course_type'], rec['reason']]
+                    for rec in recommendations
+                ]
+            })
+        
         result = f"=== {student_info.get('name', '학생')}님의 {semester} 학기 수강 추천 ===\n\n"
         
         # 졸업 진행 상황
@@ -317,6 +278,12 @@ class RecommendationEngineTool(BaseTool):
         
         return result
 
+    def _memo_key(self, student_id: str, semester: Optional[str] = None, max_credits: Optional[int] = None) -> list:
+        """기본값을 채운 입력으로 메모 키를 만듭니다 (max_credits 생략과 21은 같은 요청)."""
+        return [str(student_id).strip(), (semester or '').strip(), max_credits or 21]
+
+    @traced_tool_run
+    @memoize_tool_run
     def _run(self, student_id: str, semester: Optional[str] = None, max_credits: Optional[int] = None) -> str:
         """수강 추천을 실행합니다."""
         try:
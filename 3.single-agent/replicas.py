@@ -0,0 +1,205 @@
+import itertools
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from resilience import DeadlineExceeded
+
+
+class Replica:
+    """읽기 복제본 하나의 상태 (복제 지연, 확인 왕복 시간, 라우팅 횟수)입니다."""
+
+    def __init__(self, target: str):
+        self.target = target
+        self.lag_seconds: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.healthy = False
+        self.checked_at = 0.0
+        self.error: Optional[str] = None
+        self.routed = 0
+        self.check_lock = threading.Lock()
+
+    def report(self) -> Dict:
+        return {
+            'target': self.target,
+            'healthy': self.healthy,
+            'lag_seconds': self.lag_seconds,
+            'latency_ms': None if self.latency_ms is None else round(self.latency_ms, 2),
+            'routed': self.routed,
+            'error': self.error
+        }
+
+
+def read_replica_lag(connection, dialect: str) -> float:
+    """복제 지연(초)을 조회합니다. 복제 상태가 없으면(복제본이 아니거나 SQLite) 0, 복제가 멈췄으면 예외를 냅니다."""
+    if dialect == 'sqlite':
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchall()
+        cursor.close()
+        return 0.0
+
+    cursor = connection.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+            column = 'Seconds_Behind_Source'
+        except Exception:
+            # MySQL 8.0.22 이전 (RDS 5.7 복제본 포함)
+            cursor.execute("SHOW SLAVE STATUS")
+            column = 'Seconds_Behind_Master'
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if not rows:
+        return 0.0
+    lag = rows[0].get(column)
+    if lag is None:
+        raise RuntimeError("복제가 중지되어 있습니다 (SQL/IO 스레드 확인)")
+    return float(lag)
+
+
+class ReplicaRouter:
+    """읽기 요청을 복제본으로 보내고, 복제 지연이 허용치를 넘는 복제본은 건너뜁니다.
+
+    - strategy: round_robin(차례대로) 또는 least_latency(상태 확인 왕복 시간의 지수 평균이 가장 작은 복제본)
+    - 일반 읽기는 지연 max_lag초, 신선도가 중요한 읽기(fresh, 예: 수강 신청 직후의 이수 내역)는 fresh_lag초까지만 허용합니다.
+    - 쓸 수 있는 복제본이 없으면 None을 반환하고, 호출하는 쪽은 주 DB를 사용합니다.
+    - 상태는 start()로 띄운 백그라운드 스레드가 check_seconds마다 확인하므로 라우팅(사용자 요청)은 확인을 기다리지 않습니다.
+      첫 확인이 끝나기 전에는 주 DB를 사용합니다.
+    """
+
+    def __init__(self, targets: List[str], connect: Callable, dialect: str, strategy: str = 'round_robin',
+                 max_lag: float = 30.0, fresh_lag: float = 1.0, check_seconds: float = 5.0):
+        self.replicas = [Replica(target) for target in targets]
+        self.connect = connect
+        self.dialect = dialect
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.fresh_lag = fresh_lag
+        self.check_seconds = check_seconds
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.primary_fallbacks = 0
+        self.fresh_fallbacks = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self, replica: Replica):
+        if not replica.check_lock.acquire(blocking=False):
+            return
+        try:
+            started = time.perf_counter()
+            connection = self.connect(replica.target)
+            try:
+                lag = read_replica_lag(connection, self.dialect)
+            finally:
+                connection.close()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            replica.latency_ms = elapsed_ms if replica.latency_ms is None else 0.7 * replica.latency_ms + 0.3 * elapsed_ms
+            replica.lag_seconds = lag
+            replica.healthy = True
+            replica.error = None
+        except DeadlineExceeded:
+            # 확인한 쪽의 시간이 다 된 것이므로 복제본 상태는 그대로 둡니다
+            pass
+        except Exception as e:
+            replica.healthy = False
+            replica.error = str(e)
+        finally:
+            replica.checked_at = time.time()
+            replica.check_lock.release()
+
+    def check_all(self):
+        for replica in self.replicas:
+            self.check(replica)
+
+    def _check_loop(self):
+        while not self._stop.is_set():
+            self.check_all()
+            self._stop.wait(self.check_seconds)
+
+    def start(self):
+        """복제본 상태 확인 스레드를 시작합니다 (이미 실행 중이면 무시)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._check_loop, name='replica-check', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def mark_failed(self, target: str, error: Exception):
+        """연결에 실패한 복제본을 다음 확인 때까지 제외합니다."""
+        for replica in self.replicas:
+            if replica.target == target:
+                replica.healthy = False
+                replica.error = str(error)
+                replica.checked_at = time.time()
+
+    def choose(self, fresh: bool = False) -> Optional[str]:
+        limit = self.fresh_lag if fresh else self.max_lag
+        candidates = [replica for replica in self.replicas
+                      if replica.healthy and replica.lag_seconds is not None and replica.lag_seconds <= limit]
+        if not candidates:
+            with self._lock:
+                self.primary_fallbacks += 1
+                if fresh and any(replica.healthy for replica in self.replicas):
+                    self.fresh_fallbacks += 1
+            return None
+
+        if self.strategy == 'least_latency':
+            chosen = min(candidates, key=lambda replica: replica.latency_ms or 0.0)
+        else:
+            chosen = candidates[next(self._counter) % len(candidates)]
+        with self._lock:
+            chosen.routed += 1
+        return chosen.target
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                'strategy': self.strategy,
+                'primary_fallbacks': self.primary_fallbacks,
+                'fresh_fallbacks': self.fresh_fallbacks,
+                'replicas': [replica.report() for replica in self.replicas]
+            }
+
+
+_router: Optional[ReplicaRouter] = None
+_router_lock = threading.Lock()
+
+
+def replica_targets(dialect: str) -> List[str]:
+    """RDS_REPLICA_HOSTS(host[:port], 쉼표 구분) 또는 SQLite면 SQLITE_REPLICA_PATHS의 복제본 목록입니다."""
+    value = os.environ.get('SQLITE_REPLICA_PATHS' if dialect == 'sqlite' else 'RDS_REPLICA_HOSTS', '')
+    return [target.strip() for target in value.split(',') if target.strip()]
+
+
+def get_replica_router(connect: Callable, dialect: str) -> Optional[ReplicaRouter]:
+    """복제본이 설정되어 있으면 공용 라우터를, 없으면 None을 반환합니다."""
+    global _router
+    with _router_lock:
+        if _router is None:
+            targets = replica_targets(dialect)
+            if not targets:
+                return None
+            _router = ReplicaRouter(
+                targets, connect, dialect,
+                strategy=os.environ.get('DB_REPLICA_STRATEGY', 'round_robin'),
+                max_lag=float(os.environ.get('DB_REPLICA_MAX_LAG_SECONDS', '30')),
+                fresh_lag=float(os.environ.get('DB_REPLICA_FRESH_LAG_SECONDS', '1')),
+                check_seconds=float(os.environ.get('DB_REPLICA_CHECK_SECONDS', '5'))
+            )
+            _router.start()
+    return _router
+
+
+def set_replica_router(router: Optional[ReplicaRouter]):
+    """공용 라우터를 바꿉니다. 이전 라우터의 확인 스레드는 멈추고, 새 라우터는 start()한 뒤 넘깁니다."""
+    global _router
+    with _router_lock:
+        if _router is not None and _router is not router:
+            _router.stop()
+        _router = router
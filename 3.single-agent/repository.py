@@ -0,0 +1,289 @@
+import os
+from typing import Dict, List, Optional, Sequence
+
+from db import PRIMARY, dependency_name
+from resilience import is_dependency_failure, mark_degraded, resilient_call
+from tracing import span
+
+# 개설학과/소속 표시용 "단과대학 학과 전공" 문자열 (전공이 없으면 "단과대학 학과")
+DEPT_LABEL = """
+    CASE
+        WHEN m.major_name IS NOT NULL THEN
+            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
+        ELSE
+            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
+    END"""
+
+COURSE_COLUMNS = f"""
+    c.course_code as 과목코드,
+    c.course_name as 과목명,
+    c.credits as 학점,
+    c.course_type as 과목구분,
+    {DEPT_LABEL} as 개설학과,
+    c.professor as 교수,
+    c.target_grade as 대상학년"""
+
+ENROLLMENT_COLUMNS = f"""
+    e.course_code as 과목코드,
+    c.course_name as 과목명,
+    e.earned_credits as 취득학점,
+    e.enrollment_type as 이수구분,
+    {DEPT_LABEL} as 개설학과,
+    e.enrollment_semester as 이수학기,
+    e.grade as 성적"""
+
+ENROLLMENT_FROM = """
+    FROM enrollments e
+    LEFT JOIN courses c ON e.course_code = c.course_code
+    LEFT JOIN major m ON e.offering_department = m.major_code
+    WHERE e.student_id = %s"""
+
+LIBERAL_COURSE_TYPES = ('교양기초', '교양선택', '핵심교양')
+
+
+def is_prepared_enabled() -> bool:
+    """서버 측 prepared statement 사용 여부 (DB_PREPARED, 기본 1)."""
+    return os.environ.get('DB_PREPARED', '1') == '1'
+
+
+class Repository:
+    """도구들이 쓰는 학사 DB 조회를 모은 데이터 접근 계층입니다.
+
+    모든 조회는 _execute를 거치므로 문장마다 이름이 붙은 span(query.<이름>)으로 측정되고,
+    같은 문장은 풀의 연결에 캐시된 prepared 커서(db.PooledConnection)를 재사용합니다.
+    결과는 열 이름(별칭)을 키로 하는 dict 목록으로 반환합니다.
+    """
+
+    def __init__(self, connection, prepared: Optional[bool] = None):
+        self.connection = connection
+        self.prepared = is_prepared_enabled() if prepared is None else prepared
+        self.dependency = dependency_name(getattr(connection, 'target', PRIMARY))
+
+    def _execute(self, name: str, sql: str, params: Sequence = (), statement: Optional[str] = None) -> List[Dict]:
+        """sql을 실행해 모든 행을 읽습니다. statement는 prepared 커서 캐시 키이며 기본값은 name입니다."""
+        with span(f'query.{name}'):
+            if self.prepared:
+                cursor = self.connection.cursor(prepared=True, statement=statement or name)
+            else:
+                cursor = self.connection.cursor()
+
+            def run():
+                cursor.execute(sql, tuple(params))
+                columns = [column[0] for column in cursor.description or []]
+                # 읽지 않은 결과가 남으면 같은 연결의 다음 문장이 막히므로 항상 끝까지 읽습니다
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+            try:
+                # 연결이 끊긴 뒤에는 같은 연결로 재시도할 수 없으므로 차단기 집계와 마감 확인만 합니다
+                return resilient_call(self.dependency, run, retries=0)
+            except Exception as e:
+                if is_dependency_failure(e):
+                    mark_degraded('mysql')
+                raise
+            finally:
+                # prepared 커서는 연결이 풀에서 닫힐 때 함께 해제됩니다
+                if not self.prepared:
+                    cursor.close()
+
+    def _first(self, name: str, sql: str, params: Sequence = ()) -> Optional[Dict]:
+        rows = self._execute(name, sql, params)
+        return rows[0] if rows else None
+
+    # 학생
+
+    def student_id_by_name(self, name: str) -> Optional[str]:
+        row = self._first('student_id_by_name', "SELECT student_id FROM students WHERE name = %s", (name,))
+        return row['student_id'] if row else None
+
+    def student_profile(self, name: str) -> List[Dict]:
+        """이름으로 학생의 학적 정보(학생이름, 학번, 이수학기, 입학년도, 소속)를 조회합니다."""
+        return self._execute('student_profile', f"""
+            SELECT
+                s.name as 학생이름,
+                s.student_id as 학번,
+                s.completed_semester as 이수학기,
+                s.admission_year as 입학년도,
+                {DEPT_LABEL} as 소속
+            FROM students s
+            LEFT JOIN major m ON s.major_code = m.major_code
+            WHERE s.name = %s
+        """, (name,))
+
+    def student_keys(self, name: str) -> Optional[Dict]:
+        return self._first('student_keys', """
+            SELECT s.major_code, s.completed_semester, s.admission_year
+            FROM students s
+            WHERE s.name = %s
+        """, (name,))
+
+    def similar_student_stats(self, major_code: str, admission_year: int) -> List[Dict]:
+        """같은 전공·입학년도 학생의 익명 통계(학생수, 소속, 평균이수학기)를 조회합니다."""
+        return self._execute('similar_student_stats', f"""
+            SELECT
+                COUNT(*) as 학생수,
+                {DEPT_LABEL} as 소속,
+                AVG(s.completed_semester) as 평균이수학기
+            FROM students s
+            LEFT JOIN major m ON s.major_code = m.major_code
+            WHERE s.major_code = %s AND s.admission_year = %s
+            GROUP BY s.major_code, m.college, m.department, m.major_name
+        """, (major_code, admission_year))
+
+    def student_detail(self, student_id: str) -> Optional[Dict]:
+        return self._first('student_detail', """
+            SELECT
+                s.student_id,
+                s.name,
+                s.major_code,
+                s.admission_year,
+                s.completed_semester,
+                m.major_name,
+                m.college,
+                m.department
+            FROM students s
+            LEFT JOIN major m ON s.major_code = m.major_code
+            WHERE s.student_id = %s
+        """, (student_id,))
+
+    def student_filters(self, student_id: str) -> Optional[Dict]:
+        return self._first('student_filters', """
+            SELECT s.admission_year, m.department
+            FROM students s
+            LEFT JOIN major m ON s.major_code = m.major_code
+            WHERE s.student_id = %s
+        """, (student_id,))
+
+    # 개설 과목
+
+    def courses_by_semester(self, year: int, semester: int) -> List[Dict]:
+        return self._execute('courses_by_semester', f"""
+            SELECT {COURSE_COLUMNS},
+                c.offered_year as 개설년도,
+                c.offered_semester as 개설학기
+            FROM courses c
+            LEFT JOIN major m ON c.department = m.major_code
+            WHERE c.offered_year = %s AND c.offered_semester = %s
+            ORDER BY m.college, m.department, c.course_name
+        """, (year, semester))
+
+    def all_courses(self) -> List[Dict]:
+        return self._execute('all_courses', f"""
+            SELECT {COURSE_COLUMNS}
+            FROM courses c
+            LEFT JOIN major m ON c.department = m.major_code
+            ORDER BY m.college, m.department, c.course_name
+        """)
+
+    def search_courses(self, where: str, params: Sequence) -> List[Dict]:
+        """검색 조건(where, 'AND ...' 절)으로 과목을 찾습니다. 조건 조합마다 문장이 달라 SQL 문자열을 캐시 키로 씁니다."""
+        sql = f"""
+            SELECT {COURSE_COLUMNS},
+                c.note as 비고
+            FROM courses c
+            LEFT JOIN major m ON c.department = m.major_code
+            WHERE 1=1{where}
+            ORDER BY m.college, m.department, c.course_name
+        """
+        return self._execute('search_courses', sql, params, statement=sql)
+
+    def available_courses(self, major_code: str, limit: int = 50) -> List[Dict]:
+        """학과 개설 과목과 교양 과목을 조회합니다 (추천 후보)."""
+        return self._execute('available_courses', f"""
+            SELECT DISTINCT
+                c.course_code,
+                c.course_name,
+                c.credits,
+                c.course_type,
+                c.department,
+                c.note as description
+            FROM courses c
+            WHERE c.department = %s
+            OR c.course_type IN ({', '.join(['%s'] * len(LIBERAL_COURSE_TYPES))})
+            ORDER BY c.course_type, c.course_name
+            LIMIT {int(limit)}
+        """, (major_code, *LIBERAL_COURSE_TYPES))
+
+    # 이수 내역
+
+    def enrollment_count(self, student_id: str) -> int:
+        row = self._first('enrollment_count',
+                          "SELECT COUNT(DISTINCT course_code) as count FROM enrollments WHERE student_id = %s",
+                          (student_id,))
+        return row['count'] if row else 0
+
+    def enrollments_for_student(self, student_id: str) -> List[Dict]:
+        """학생의 전체 이수 과목을 최근 학기부터 조회합니다 (중복 제거)."""
+        return self._execute('enrollments_for_student', f"""
+            SELECT DISTINCT {ENROLLMENT_COLUMNS}
+            {ENROLLMENT_FROM}
+            ORDER BY e.enrollment_semester DESC, e.course_code
+        """, (student_id,))
+
+    def enrollments_in_semester(self, student_id: str, semester: Optional[str] = None) -> List[Dict]:
+        if semester:
+            return self._execute('enrollments_in_semester', f"""
+                SELECT {ENROLLMENT_COLUMNS}
+                {ENROLLMENT_FROM} AND e.enrollment_semester = %s
+                ORDER BY e.enrollment_semester DESC, e.course_code
+            """, (student_id, semester))
+        return self._execute('enrollments_by_semester', f"""
+            SELECT {ENROLLMENT_COLUMNS}
+            {ENROLLMENT_FROM}
+            ORDER BY e.enrollment_semester DESC, e.course_code
+        """, (student_id,))
+
+    def enrollments_with_grade(self, student_id: str, grade: Optional[str] = None) -> List[Dict]:
+        if grade:
+            return self._execute('enrollments_with_grade', f"""
+                SELECT {ENROLLMENT_COLUMNS}
+                {ENROLLMENT_FROM} AND e.grade = %s
+                ORDER BY e.enrollment_semester DESC, e.grade DESC
+            """, (student_id, grade))
+        return self._execute('enrollments_by_grade', f"""
+            SELECT {ENROLLMENT_COLUMNS}
+            {ENROLLMENT_FROM}
+            ORDER BY e.enrollment_semester DESC, e.grade DESC
+        """, (student_id,))
+
+    def enrollment_stats(self, student_id: str) -> List[Dict]:
+        """이수구분별 과목 수, 취득 학점, 평균 평점(4.5 만점)을 조회합니다."""
+        return self._execute('enrollment_stats', """
+            SELECT
+                COUNT(*) as 총이수과목수,
+                SUM(e.earned_credits) as 총취득학점,
+                AVG(CASE
+                    WHEN e.grade = 'A+' THEN 4.5
+                    WHEN e.grade = 'A' THEN 4.0
+                    WHEN e.grade = 'B+' THEN 3.5
+                    WHEN e.grade = 'B' THEN 3.0
+                    WHEN e.grade = 'C+' THEN 2.5
+                    WHEN e.grade = 'C' THEN 2.0
+                    WHEN e.grade = 'D+' THEN 1.5
+                    WHEN e.grade = 'D' THEN 1.0
+                    ELSE 0
+                END) as 평균평점,
+                e.enrollment_type as 이수구분,
+                COUNT(*) as 과목수
+            FROM enrollments e
+            WHERE e.student_id = %s
+            GROUP BY e.enrollment_type
+        """, (student_id,))
+
+    def completed_courses(self, student_id: str) -> List[Dict]:
+        """F/NP를 제외하고 성적이 나온 이수 과목을 학기 순으로 조회합니다."""
+        return self._execute('completed_courses', """
+            SELECT
+                e.course_code,
+                c.course_name,
+                c.credits,
+                c.course_type,
+                c.department,
+                e.grade,
+                e.enrollment_semester as semester
+            FROM enrollments e
+            JOIN courses c ON e.course_code = c.course_code
+            WHERE e.student_id = %s
+            AND e.grade IS NOT NULL
+            AND e.grade NOT IN ('F', 'NP')
+            ORDER BY e.enrollment_semester
+        """, (student_id,))
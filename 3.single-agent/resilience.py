@@ -0,0 +1,239 @@
+import contextvars
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, Set
+
+# 현재 요청의 절대 마감 시각(time.monotonic 기준)과 장애로 축소 응답한 의존성 목록
+_deadline = contextvars.ContextVar('resilience_deadline', default=None)
+_degraded = contextvars.ContextVar('resilience_degraded', default=None)
+
+# MySQL: 연결 실패/끊김, 잠금 대기 초과, 교착 상태
+MYSQL_TRANSIENT_ERRNOS = {1205, 1213, 2003, 2005, 2006, 2013, 2055}
+# PostgreSQL SQLSTATE: 직렬화 실패, 교착 상태, 연결 예외(08xxx)
+POSTGRES_TRANSIENT_CODES = {'40001', '40P01'}
+# Bedrock(botocore)과 litellm이 던지는 일시적 오류
+TRANSIENT_ERROR_NAMES = {
+    'ThrottlingException', 'TooManyRequestsException', 'ServiceUnavailableException', 'ModelNotReadyException',
+    'InternalServerException', 'ModelTimeoutException', 'ReadTimeoutError', 'ConnectTimeoutError',
+    'EndpointConnectionError', 'RateLimitError', 'ServiceUnavailableError', 'Timeout', 'APITimeoutError',
+    'APIConnectionError', 'InternalServerError'
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """요청에 남은 시간이 없어 의존성 호출을 시작하지 않았습니다."""
+
+
+class CircuitOpenError(RuntimeError):
+    """최근 연속 실패로 회로가 열려 의존성을 호출하지 않고 바로 실패합니다."""
+
+    def __init__(self, dependency: str, retry_in: float):
+        super().__init__(f"{dependency} 일시 장애로 호출을 중단했습니다 ({retry_in:.1f}초 후 재시도)")
+        self.dependency = dependency
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]):
+    """블록 안의 의존성 호출이 seconds 안에 끝나도록 마감 시각을 정합니다 (바깥 마감이 더 이르면 그대로 유지)."""
+    if not seconds:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(deadline if outer is None else min(outer, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _time_left() -> float:
+    deadline = _deadline.get()
+    return float('inf') if deadline is None else deadline - time.monotonic()
+
+
+def remaining(default: float) -> float:
+    """남은 시간(초)과 default 중 작은 값을 반환합니다. 마감이 지났으면 DeadlineExceeded."""
+    left = _time_left()
+    if left <= 0:
+        raise DeadlineExceeded("요청 처리 시간이 초과되었습니다")
+    return min(default, left)
+
+
+@contextmanager
+def degradation_scope():
+    """블록 안에서 축소 응답한 의존성 이름을 모읍니다 (축소된 답변은 캐시하지 않기 위해 사용).
+
+    안쪽 범위에서 모은 이름은 끝날 때 바깥 범위에도 더해집니다.
+    """
+    degraded: Set[str] = set()
+    outer = _degraded.get()
+    token = _degraded.set(degraded)
+    try:
+        yield degraded
+    finally:
+        _degraded.reset(token)
+        if outer is not None:
+            outer.update(degraded)
+
+
+def mark_degraded(dependency: str):
+    degraded = _degraded.get()
+    if degraded is not None:
+        degraded.add(dependency)
+
+
+def is_transient(error: BaseException) -> bool:
+    """다시 시도하면 성공할 수 있는 오류인지 판단합니다 (드라이버를 import하지 않고 속성으로 확인)."""
+    if isinstance(error, (DeadlineExceeded, CircuitOpenError)):
+        return False
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if getattr(error, 'errno', None) in MYSQL_TRANSIENT_ERRNOS:
+        return True
+    pgcode = getattr(error, 'pgcode', None)
+    if pgcode in POSTGRES_TRANSIENT_CODES or (pgcode or '').startswith('08'):
+        return True
+    if type(error).__name__ == 'OperationalError' and type(error).__module__.startswith('psycopg2'):
+        return True
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict) and response.get('Error', {}).get('Code') in TRANSIENT_ERROR_NAMES:
+        return True
+    return type(error).__name__ in TRANSIENT_ERROR_NAMES
+
+
+def is_dependency_failure(error: BaseException) -> bool:
+    """의존성 장애(마감 초과, 회로 열림, 일시적 오류)인지 판단합니다. 이때는 축소된 답변을 돌려줍니다."""
+    return isinstance(error, (DeadlineExceeded, CircuitOpenError)) or is_transient(error)
+
+
+class CircuitBreaker:
+    """의존성별 회로 차단기입니다.
+
+    연속 failure_threshold번 실패하면 reset_seconds 동안 열려 호출 없이 CircuitOpenError를 냅니다.
+    그 뒤 한 번의 시험 호출(half-open)이 성공하면 닫히고, 실패하면 다시 열립니다.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.stats = {'calls': 0, 'failures': 0, 'retries': 0, 'rejected': 0, 'opened': 0}
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            self.stats['calls'] += 1
+            if self.state == 'open':
+                retry_in = self.opened_at + self.reset_seconds - time.monotonic()
+                if retry_in > 0:
+                    self.stats['rejected'] += 1
+                    raise CircuitOpenError(self.name, retry_in)
+                self.state = 'half_open'
+            elif self.state == 'half_open':
+                # 시험 호출이 끝날 때까지 다른 호출은 거절합니다
+                self.stats['rejected'] += 1
+                raise CircuitOpenError(self.name, 0)
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.stats['failures'] += 1
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state != 'open':
+                    self.stats['opened'] += 1
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def record_abandoned(self):
+        """호출이 결과 없이 끝났을 때(KeyboardInterrupt 같은 BaseException) 시험 호출 자리를 되돌려 다음 호출이 다시 시험하게 합니다."""
+        with self._lock:
+            if self.state == 'half_open':
+                self.state = 'open'
+
+    def record_retry(self):
+        with self._lock:
+            self.stats['retries'] += 1
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {'state': self.state, 'consecutive_failures': self.failures, **self.stats}
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def _env_name(dependency: str) -> str:
+    return dependency.split(':')[0].upper().replace('-', '_')
+
+
+def get_breaker(dependency: str) -> CircuitBreaker:
+    """의존성 이름별 공용 차단기입니다 (<이름>_BREAKER_FAILURES, <이름>_BREAKER_RESET_SECONDS, 예: MYSQL_BREAKER_FAILURES)."""
+    with _breakers_lock:
+        breaker = _breakers.get(dependency)
+        if breaker is None:
+            prefix = _env_name(dependency)
+            breaker = _breakers[dependency] = CircuitBreaker(
+                dependency,
+                failure_threshold=int(os.environ.get(f'{prefix}_BREAKER_FAILURES', '5')),
+                reset_seconds=float(os.environ.get(f'{prefix}_BREAKER_RESET_SECONDS', '30'))
+            )
+    return breaker
+
+
+def breaker_report() -> Dict[str, Dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.report() for breaker in breakers}
+
+
+def resilient_call(dependency: str, call: Callable, retries: Optional[int] = None,
+                   base_delay: float = 0.1, max_delay: float = 2.0):
+    """차단기와 마감 시각을 지키며 call()을 실행하고, 일시적 오류는 지터를 준 지수 백오프로 재시도합니다.
+
+    재시도 횟수는 retries 또는 <이름>_RETRIES(기본 2)이며, 다음 시도까지 기다릴 시간이 마감을 넘으면 재시도하지 않습니다.
+    일시적이지 않은 오류(SQL 문법 오류 등)는 차단기에 실패로 세지 않고 그대로 전달합니다.
+    """
+    breaker = get_breaker(dependency)
+    if retries is None:
+        retries = int(os.environ.get(f'{_env_name(dependency)}_RETRIES', '2'))
+    attempt = 0
+    while True:
+        remaining(float('inf'))
+        breaker.before_call()
+        recorded = False
+        try:
+            result = call()
+            breaker.record_success()
+            recorded = True
+            return result
+        except Exception as e:
+            if not is_transient(e):
+                breaker.record_success()
+                recorded = True
+                raise
+            breaker.record_failure()
+            recorded = True
+            # full jitter: 0 ~ min(max_delay, base_delay * 2^attempt)
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            if attempt >= retries or breaker.state == 'open' or _time_left() <= delay:
+                raise
+        finally:
+            # BaseException으로 빠져나가도 half-open 시험 호출이 끝났음을 남깁니다
+            if not recorded:
+                breaker.record_abandoned()
+        attempt += 1
+        breaker.record_retry()
+        time.sleep(delay)
@@ -0,0 +1,363 @@
+import argparse
+import atexit
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Dict, List, Optional, Tuple
+
+from tracing import current_trace_id
+
+_COMMENT = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint_sql(sql: str) -> Tuple[str, str]:
+    """리터럴과 자리표시자를 ?로 바꾸고 공백을 정리한 SQL과 그 지문(12자리)을 반환합니다.
+
+    IN (?, ?, ?)처럼 길이만 다른 목록은 IN (?+)로 묶어 같은 형태의 쿼리를 하나로 집계합니다.
+    """
+    normalized = _COMMENT.sub(' ', sql)
+    normalized = _STRING.sub('?', normalized)
+    normalized = _NUMBER.sub('?', normalized)
+    normalized = _PLACEHOLDER.sub('?', normalized)
+    normalized = _IN_LIST.sub('(?+)', normalized)
+    normalized = _WHITESPACE.sub(' ', normalized).strip()
+    return hashlib.md5(normalized.lower().encode('utf-8')).hexdigest()[:12], normalized
+
+
+def param_shape(params) -> List[str]:
+    """파라미터 값 대신 타입과 길이만 남깁니다 (학번 등 개인정보를 로그에 남기지 않음)."""
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        params = list(params.values())
+    shape = []
+    for value in params:
+        if isinstance(value, str):
+            shape.append(f"str({len(value)})")
+        elif isinstance(value, (list, tuple)):
+            shape.append(f"{type(value).__name__}[{len(value)}]")
+        else:
+            shape.append(type(value).__name__)
+    return shape
+
+
+class QueryStats:
+    """지문별 실행 횟수와 소요 시간을 누적합니다 (요약은 주기적으로 로그에 기록 후 초기화)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.by_fingerprint: Dict[str, Dict] = {}
+
+    def add(self, fingerprint: str, sql: str, duration_ms: float, slow: bool):
+        with self._lock:
+            entry = self.by_fingerprint.get(fingerprint)
+            if entry is None:
+                entry = self.by_fingerprint[fingerprint] = {'sql': sql, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'slow': 0}
+            entry['count'] += 1
+            entry['total_ms'] += duration_ms
+            entry['max_ms'] = max(entry['max_ms'], duration_ms)
+            entry['slow'] += slow
+
+    def drain(self) -> Dict[str, Dict]:
+        with self._lock:
+            drained, self.by_fingerprint = self.by_fingerprint, {}
+        return drained
+
+
+class SlowQueryLog:
+    """느린 쿼리의 EXPLAIN과 파라미터 형태를 회전 로그(JSON 줄)에 기록합니다.
+
+    모든 쿼리는 지문별로 메모리에 집계했다가 summary_seconds마다(및 종료 시) summary 줄로 남기고,
+    threshold_ms를 넘는 쿼리만 slow 줄로 남깁니다. 같은 지문의 EXPLAIN은 explain_interval초에 한 번만 실행합니다.
+    """
+
+    def __init__(self, path: str, threshold_ms: float = 200, max_bytes: int = 10 * 1024 * 1024,
+                 backup_count: int = 5, explain_interval: float = 300, summary_seconds: float = 60):
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.explain_interval = explain_interval
+        self.summary_seconds = summary_seconds
+        self.stats = QueryStats()
+        self._explained: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._last_summary = time.time()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._logger = logging.getLogger(f"slow_query_log.{path}")
+        self._logger.setLevel(logging.INFO)
+        self._logger.propagate = False
+        if not self._logger.handlers:
+            handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self._logger.addHandler(handler)
+        atexit.register(self.flush_summary)
+
+    def _write(self, record: Dict):
+        self._logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def _should_explain(self, fingerprint: str) -> bool:
+        now = time.time()
+        with self._lock:
+            if now - self._explained.get(fingerprint, 0) < self.explain_interval:
+                return False
+            self._explained[fingerprint] = now
+        return True
+
+    def record(self, sql: str, params, duration_ms: float, rows: Optional[int], dialect: str,
+               explain: Optional[Callable[[str, object], List]] = None):
+        fingerprint, normalized = fingerprint_sql(sql)
+        slow = duration_ms >= self.threshold_ms
+        self.stats.add(fingerprint, normalized, duration_ms, slow)
+        if slow:
+            entry = {
+                'type': 'slow',
+                'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'fingerprint': fingerprint,
+                'duration_ms': round(duration_ms, 2),
+                'rows': rows,
+                'dialect': dialect,
+                'sql': normalized,
+                'param_shape': param_shape(params),
+                'trace_id': current_trace_id()
+            }
+            if explain is not None and self._should_explain(fingerprint):
+                try:
+                    entry['explain'] = explain(sql, params)
+                except Exception as e:
+                    entry['explain_error'] = str(e)
+            self._write(entry)
+        if time.time() - self._last_summary >= self.summary_seconds:
+            self.flush_summary()
+
+    def flush_summary(self):
+        self._last_summary = time.time()
+        drained = self.stats.drain()
+        if drained:
+            self._write({'type': 'summary', 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'queries': drained})
+
+
+def _is_select(sql: str) -> bool:
+    return _COMMENT.sub(' ', sql).lstrip().lower().startswith(('select', 'with'))
+
+
+class LoggedCursor:
+    """execute부터 결과를 다 가져올 때까지의 시간을 문장 단위로 재서 SlowQueryLog에 넘기는 커서 래퍼입니다.
+
+    문장은 다음 execute, close, 또는 연결 close 때 마감됩니다.
+    """
+
+    def __init__(self, cursor, connection: 'LoggedConnection'):
+        self._cursor = cursor
+        self._connection = connection
+        self._pending = None   # [sql, params, 누적 초, 행 수]
+
+    def _finish(self):
+        if self._pending is None:
+            return
+        sql, params, seconds, rows = self._pending
+        self._pending = None
+        self._connection.log.record(sql, params, seconds * 1000, rows, self._connection.dialect,
+                                    self._connection.explain if _is_select(sql) else None)
+
+    def execute(self, sql, params=None, *args, **kwargs):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            if params is None:
+                return self._cursor.execute(sql, *args, **kwargs)
+            return self._cursor.execute(sql, params, *args, **kwargs)
+        finally:
+            self._pending = [sql, params, time.perf_counter() - started, None]
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        rows = fetch(*args)
+        if self._pending is not None:
+            self._pending[2] += time.perf_counter() - started
+            count = len(rows) if isinstance(rows, list) else (0 if rows is None else 1)
+            self._pending[3] = (self._pending[3] or 0) + count
+        return rows
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+
+    def fetchmany(self, *args):
+        return self._timed_fetch(self._cursor.fetchmany, *args)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class LoggedConnection:
+    """cursor()가 LoggedCursor를 반환하는 연결 래퍼입니다.
+
+    EXPLAIN은 결과를 아직 읽지 않은 커서와 충돌하지 않도록 explain_connect로 연 별도 연결에서 실행합니다.
+    """
+
+    EXPLAIN_PREFIX = {'sqlite': 'EXPLAIN QUERY PLAN ', 'mysql': 'EXPLAIN ', 'postgres': 'EXPLAIN '}
+
+    def __init__(self, connection, log: SlowQueryLog, explain_connect: Optional[Callable], dialect: str):
+        self._connection = connection
+        self.log = log
+        self.dialect = dialect
+        self._explain_connect = explain_connect
+        self._cursors = []
+
+    def cursor(self, *args, **kwargs):
+        cursor = LoggedCursor(self._connection.cursor(*args, **kwargs), self)
+        self._cursors.append(cursor)
+        return cursor
+
+    def explain(self, sql: str, params) -> List:
+        if self._explain_connect is None:
+            return []
+        connection = self._explain_connect()
+        try:
+            cursor = connection.cursor()
+            prefix = self.EXPLAIN_PREFIX.get(self.dialect, 'EXPLAIN ')
+            if params is None:
+                cursor.execute(prefix + sql)
+            else:
+                cursor.execute(prefix + sql, params)
+            columns = [column[0] for column in cursor.description or []]
+            plan = [dict(zip(columns, row)) if columns else list(row) for row in cursor.fetchall()]
+            cursor.close()
+            return plan
+        finally:
+            connection.close()
+
+    def close(self):
+        for cursor in self._cursors:
+            cursor._finish()
+        self._cursors = []
+        return self._connection.close()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def is_slow_query_log_enabled() -> bool:
+    """느린 쿼리 로그 사용 여부 (SLOW_QUERY_LOG=1)."""
+    return os.environ.get('SLOW_QUERY_LOG', '0') == '1'
+
+
+def _default_log_path() -> str:
+    return os.environ.get('SLOW_QUERY_LOG_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'slow_query.log'))
+
+
+_slow_query_log = None
+_slow_query_log_lock = threading.Lock()
+
+
+def get_slow_query_log() -> SlowQueryLog:
+    global _slow_query_log
+    with _slow_query_log_lock:
+        if _slow_query_log is None:
+            _slow_query_log = SlowQueryLog(
+                _default_log_path(),
+                threshold_ms=float(os.environ.get('SLOW_QUERY_MS', '200')),
+                max_bytes=int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+                backup_count=int(os.environ.get('SLOW_QUERY_LOG_BACKUPS', '5')),
+                explain_interval=float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', '300'))
+            )
+    return _slow_query_log
+
+
+def set_slow_query_log(log):
+    """공용 로그를 바꿉니다 (인덱스 점검기처럼 문장을 직접 모을 때 같은 record 인터페이스의 객체를 넣음)."""
+    global _slow_query_log
+    with _slow_query_log_lock:
+        _slow_query_log = log
+
+
+def wrap_connection(connection, explain_connect: Optional[Callable], dialect: str):
+    """SLOW_QUERY_LOG=1이면 LoggedConnection으로 감싸고, 아니면 그대로 반환합니다."""
+    if not is_slow_query_log_enabled():
+        return connection
+    return LoggedConnection(connection, get_slow_query_log(), explain_connect, dialect)
+
+
+def read_log(path: str) -> List[Dict]:
+    """회전된 파일(.1, .2 ...)까지 포함해 오래된 순서로 로그 줄을 읽습니다."""
+    rotated = [p for p in glob.glob(f"{path}.*") if p.rsplit('.', 1)[-1].isdigit()]
+    files = sorted(rotated, key=lambda p: int(p.rsplit('.', 1)[-1]), reverse=True)
+    if os.path.exists(path):
+        files.append(path)
+    records = []
+    for file in files:
+        with open(file, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def build_report(records: List[Dict]) -> List[Dict]:
+    """summary 줄로 지문별 총 시간을 합산하고, slow 줄에서 최근 EXPLAIN과 파라미터 형태를 붙여 총 시간 순으로 정렬합니다."""
+    report: Dict[str, Dict] = {}
+    for record in records:
+        if record.get('type') == 'summary':
+            for fingerprint, stats in record['queries'].items():
+                entry = report.setdefault(fingerprint, {'fingerprint': fingerprint, 'sql': stats['sql'], 'count': 0,
+                                                        'total_ms': 0.0, 'max_ms': 0.0, 'slow': 0})
+                entry['count'] += stats['count']
+                entry['total_ms'] += stats['total_ms']
+                entry['max_ms'] = max(entry['max_ms'], stats['max_ms'])
+                entry['slow'] += stats['slow']
+        elif record.get('type') == 'slow':
+            entry = report.setdefault(record['fingerprint'], {'fingerprint': record['fingerprint'], 'sql': record['sql'],
+                                                              'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'slow': 0})
+            entry['param_shape'] = record.get('param_shape')
+            if 'explain' in record:
+                entry['explain'] = record['explain']
+    ranked = sorted(report.values(), key=lambda e: e['total_ms'], reverse=True)
+    for entry in ranked:
+        entry['total_ms'] = round(entry['total_ms'], 1)
+        entry['avg_ms'] = round(entry['total_ms'] / entry['count'], 2) if entry['count'] else 0.0
+        entry['max_ms'] = round(entry['max_ms'], 1)
+    return ranked
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="느린 쿼리 로그 보고서 (지문별 총 소요 시간 순)")
+    parser.add_argument('--path', default=_default_log_path(), help="로그 경로 (회전된 .1, .2 ... 포함)")
+    parser.add_argument('--top', type=int, default=20, help="출력할 지문 수")
+    parser.add_argument('--explain', metavar='FINGERPRINT', help="지문 하나의 SQL, 파라미터 형태, EXPLAIN 전체 출력")
+    parser.add_argument('--json', action='store_true', help="JSON으로 출력")
+    args = parser.parse_args()
+
+    ranked = build_report(read_log(args.path))
+    if args.explain:
+        ranked = [entry for entry in ranked if entry['fingerprint'].startswith(args.explain)]
+        print(json.dumps(ranked, ensure_ascii=False, indent=2, default=str))
+    elif args.json:
+        print(json.dumps(ranked[:args.top], ensure_ascii=False, indent=2, default=str))
+    else:
+        print(f"{'fingerprint':<13} {'count':>7} {'total_ms':>11} {'avg_ms':>9} {'max_ms':>9} {'slow':>5}  sql")
+        for entry in ranked[:args.top]:
+            print(f"{entry['fingerprint']:<13} {entry['count']:>7} {entry['total_ms']:>11} {entry['avg_ms']:>9} "
+                  f"{entry['max_ms']:>9} {entry['slow']:>5}  {entry['sql'][:100]}")
+        print("\n지문별 EXPLAIN: uv run slow_query_log.py --explain <fingerprint>")
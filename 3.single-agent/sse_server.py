@@ -0,0 +1,81 @@
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from main import stream_user_query
+from streaming import to_sse
+from tracing import metrics
+
+
+class StreamingQAHandler(BaseHTTPRequestHandler):
+    """질문을 받아 상담 에이전트의 진행 이벤트를 SSE로 전송하는 HTTP 핸들러입니다.
+
+    GET  /stream?q=질문
+    POST /stream  {"question": "질문"}
+    GET  /metrics          단계별 소요 시간 (Prometheus 텍스트, TRACING=1일 때 수집)
+    GET  /metrics?format=json
+    """
+
+    def _send_stream(self, question: str):
+        if not question:
+            self.send_error(400, "question is required")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "keep-alive")
+        self.end_headers()
+
+        try:
+            for event in stream_user_query(question):
+                self.wfile.write(to_sse(event).encode("utf-8"))
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 연결을 끊은 경우
+            pass
+
+    def _send_metrics(self, output_format: str):
+        if output_format == "json":
+            body = json.dumps(metrics.to_json(), ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        else:
+            body = metrics.to_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/metrics":
+            self._send_metrics(parse_qs(parsed.query).get("format", ["prometheus"])[0])
+            return
+        if parsed.path != "/stream":
+            self.send_error(404)
+            return
+        question = parse_qs(parsed.query).get("q", [""])[0].strip()
+        self._send_stream(question)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/stream":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self.send_error(400, "invalid JSON body")
+            return
+        self._send_stream(str(body.get("question", "")).strip())
+
+
+if __name__ == "__main__":
+    host = os.environ.get("SSE_HOST", "0.0.0.0")
+    port = int(os.environ.get("SSE_PORT", "8000"))
+    server = ThreadingHTTPServer((host, port), StreamingQAHandler)
+    print(f"SSE 상담 서버 실행 중: http://{host}:{port}/stream?q=질문")
+    server.serve_forever()
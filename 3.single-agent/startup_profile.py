@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# 첫 질문 전에 로드되면 안 되는 무거운 의존성
+HEAVY_MODULES = ['crewai', 'litellm', 'boto3', 'botocore', 'langchain_aws', 'psycopg2', 'mysql.connector']
+
+
+def profile_import(module: str = 'main') -> dict:
+    """새 인터프리터에서 모듈을 import하며 -X importtime 결과를 수집합니다."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=here,
+        capture_output=True,
+        text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{completed.stderr[-2000:]}")
+
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append({
+            'module': name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': depth
+        })
+
+    top_level = [e for e in entries if e['depth'] == 1]
+    loaded = {e['module'] for e in entries}
+    return {
+        'module': module,
+        'total_ms': round(sum(e['cumulative_us'] for e in top_level) / 1000, 1),
+        'module_count': len(entries),
+        'heavy_loaded': [m for m in HEAVY_MODULES if m in loaded],
+        'slowest': sorted(
+            ({'module': e['module'], 'cumulative_ms': round(e['cumulative_us'] / 1000, 1)} for e in entries),
+            key=lambda e: e['cumulative_ms'],
+            reverse=True
+        )[:15]
+    }
+
+
+def print_report(report: dict):
+    """프로파일 결과를 출력합니다."""
+    print(f"=== '{report['module']}' import 시간 ===")
+    print(f"총 import 시간: {report['total_ms']}ms ({report['module_count']}개 모듈)")
+    if report['heavy_loaded']:
+        print(f"⚠️ 시작 시 로드된 무거운 의존성: {', '.join(report['heavy_loaded'])}")
+    else:
+        print("무거운 의존성은 첫 사용 시까지 로드되지 않습니다.")
+    print("\n누적 시간 상위 모듈:")
+    for entry in report['slowest']:
+        print(f"- {entry['module']}: {entry['cumulative_ms']}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CLI 시작(import) 시간 프로파일 및 회귀 검사")
+    parser.add_argument('--module', default='main', help="프로파일할 모듈 (기본값: main)")
+    parser.add_argument('--budget-ms', type=float, help="허용 최대 import 시간(ms). 초과하면 종료 코드 1")
+    parser.add_argument('--baseline', help="비교할 이전 결과 JSON 경로")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="기준 대비 허용 증가율 (기본값: 0.2 = 20%%)")
+    parser.add_argument('--save', help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    report = profile_import(args.module)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    failures = []
+    if report['heavy_loaded']:
+        failures.append(f"무거운 의존성이 import 시점에 로드됨: {', '.join(report['heavy_loaded'])}")
+    if args.budget_ms is not None and report['total_ms'] > args.budget_ms:
+        failures.append(f"import 시간 {report['total_ms']}ms가 예산 {args.budget_ms}ms를 초과")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        limit = baseline['total_ms'] * (1 + args.tolerance)
+        if report['total_ms'] > limit:
+            failures.append(f"import 시간 {report['total_ms']}ms가 기준 {baseline['total_ms']}ms 대비 {args.tolerance:.0%} 이상 증가")
+
+    if failures:
+        print("\n❌ 시작 시간 회귀:")
+        for failure in failures:
+            print(f"- {failure}")
+        sys.exit(1)
+    print("\n✅ 시작 시간 검사 통과")
@@ -0,0 +1,207 @@
+import json
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator
+
+FINAL_ANSWER_MARKER = "Final Answer:"
+TOOL_OUTPUT_PREVIEW = 300
+
+_DONE = object()
+_sinks: Dict[int, "StreamSink"] = {}
+_sinks_lock = threading.Lock()
+_handlers_registered = False
+
+
+class StreamSink:
+    """하나의 스트리밍 요청에서 발생하는 이벤트를 큐에 모읍니다."""
+
+    def __init__(self):
+        self.events = queue.Queue()
+        self.started_at = time.perf_counter()
+        self._buffer = ""
+        self._final_emitted = 0
+        self._tool_announced = False
+
+    def put(self, event: str, data: Any):
+        """이벤트를 경과 시간과 함께 큐에 넣습니다."""
+        self.events.put({
+            'event': event,
+            'data': data,
+            'elapsed': round(time.perf_counter() - self.started_at, 3)
+        })
+
+    def on_chunk(self, chunk: str):
+        """LLM 토큰 청크를 받아 'Final Answer:' 이후 부분만 token 이벤트로 내보냅니다."""
+        self._buffer += chunk
+        marker_index = self._buffer.find(FINAL_ANSWER_MARKER)
+        if marker_index < 0:
+            return
+        final_text = self._buffer[marker_index + len(FINAL_ANSWER_MARKER):].lstrip()
+        new_text = final_text[self._final_emitted:]
+        if new_text:
+            self._final_emitted = len(final_text)
+            self.put('token', new_text)
+
+    def on_llm_response(self, response: str):
+        """LLM 호출 한 번이 끝나면 도구 호출 여부를 판단해 tool_start 이벤트를 보냅니다."""
+        text = response or self._buffer
+        if FINAL_ANSWER_MARKER in text:
+            return
+        tool_name, tool_input = _parse_action(text)
+        if tool_name:
+            self._tool_announced = True
+            self.put('tool_start', {'tool': tool_name, 'input': tool_input})
+
+    def on_step(self, step: Any):
+        """에이전트 스텝 콜백입니다. 도구 실행이 끝나면 tool_end 이벤트를 보냅니다."""
+        tool_name = getattr(step, 'tool', None)
+        if tool_name:
+            if not self._tool_announced:
+                self.put('tool_start', {'tool': tool_name, 'input': getattr(step, 'tool_input', '')})
+            output = str(getattr(step, 'result', '') or '')
+            self.put('tool_end', {
+                'tool': tool_name,
+                'output': output[:TOOL_OUTPUT_PREVIEW] + ('...' if len(output) > TOOL_OUTPUT_PREVIEW else '')
+            })
+        # 다음 LLM 호출을 위해 버퍼를 초기화합니다.
+        self._buffer = ""
+        self._final_emitted = 0
+        self._tool_announced = False
+
+
+def _parse_action(text: str) -> tuple:
+    """ReAct 형식 응답에서 Action / Action Input을 추출합니다."""
+    tool_name, tool_input = None, ''
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('Action:'):
+            tool_name = line[len('Action:'):].strip()
+        elif line.startswith('Action Input:'):
+            tool_input = line[len('Action Input:'):].strip()
+    return tool_name, tool_input
+
+
+def _lookup_sink(source: Any):
+    with _sinks_lock:
+        return _sinks.get(id(source))
+
+
+def _register_event_handlers():
+    """LLM 스트리밍 이벤트 핸들러를 한 번만 등록합니다 (LLM 인스턴스별로 라우팅)."""
+    global _handlers_registered
+    if _handlers_registered:
+        return
+
+    # CrewAI 이벤트 버스는 버전에 따라 위치가 다르므로 있으면 사용합니다.
+    try:
+        from crewai.events import crewai_event_bus, LLMStreamChunkEvent, LLMCallCompletedEvent
+    except ImportError:
+        try:
+            from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent, LLMCallCompletedEvent
+        except ImportError:
+            return
+
+    @crewai_event_bus.on(LLMStreamChunkEvent)
+    def _on_chunk(source, event):
+        sink = _lookup_sink(source)
+        if sink:
+            sink.on_chunk(event.chunk)
+
+    @crewai_event_bus.on(LLMCallCompletedEvent)
+    def _on_call_completed(source, event):
+        sink = _lookup_sink(source)
+        if sink:
+            sink.on_llm_response(str(getattr(event, 'response', '') or ''))
+
+    _handlers_registered = True
+
+
+def _token_usage_dict(result: Any) -> Dict:
+    """CrewOutput의 토큰 사용량을 딕셔너리로 변환합니다."""
+    usage = getattr(result, 'token_usage', None)
+    if usage is None:
+        return {}
+    if hasattr(usage, 'model_dump'):
+        return usage.model_dump()
+    return dict(vars(usage))
+
+
+def stream_kickoff(crew_factory: Callable, stream_llm: Any, run_crew: Callable = None) -> Iterator[Dict]:
+    """crew.kickoff()를 백그라운드 스레드에서 실행하며 진행 이벤트를 순서대로 반환합니다.
+
+    crew_factory(step_callback)는 stream_llm을 사용하는 Crew를 만들어 반환해야 합니다.
+    run_crew(crew)를 주면 crew.kickoff() 대신 사용합니다 (요청 단위 설정 적용용).
+    이벤트: start, tool_start, tool_end, token, final, error
+    """
+    _register_event_handlers()
+    sink = StreamSink()
+    with _sinks_lock:
+        _sinks[id(stream_llm)] = sink
+
+    def worker():
+        try:
+            crew = crew_factory(sink.on_step)
+            result = run_crew(crew) if run_crew else crew.kickoff()
+            sink.put('final', {
+                'answer': str(getattr(result, 'raw', result)),
+                'token_usage': _token_usage_dict(result)
+            })
+        except Exception as e:
+            sink.put('error', {'message': str(e)})
+        finally:
+            sink.events.put(_DONE)
+
+    sink.put('start', {})
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    try:
+        while True:
+            event = sink.events.get()
+            if event is _DONE:
+                break
+            yield event
+    finally:
+        with _sinks_lock:
+            _sinks.pop(id(stream_llm), None)
+
+
+async def astream(events: Iterator[Dict]) -> AsyncIterator[Dict]:
+    """동기 이벤트 제너레이터를 이벤트 루프를 막지 않는 비동기 이터레이터로 감쌉니다."""
+    import asyncio
+
+    while True:
+        event = await asyncio.to_thread(next, events, _DONE)
+        if event is _DONE:
+            break
+        yield event
+
+
+def to_sse(event: Dict) -> str:
+    """이벤트를 Server-Sent Events 형식 문자열로 변환합니다."""
+    data = json.dumps({'data': event['data'], 'elapsed': event['elapsed']}, ensure_ascii=False)
+    return f"event: {event['event']}\ndata: {data}\n\n"
+
+
+def print_stream(events: Iterator[Dict]) -> str:
+    """CLI에서 도구 진행 상황과 답변 토큰을 즉시 출력하고, 최종 답변을 반환합니다."""
+    answer = ""
+    printed_tokens = False
+    for event in events:
+        if event['event'] == 'tool_start':
+            print(f"🔧 {event['data']['tool']} 실행 중...", flush=True)
+        elif event['event'] == 'tool_end':
+            print(f"✅ {event['data']['tool']} 완료 ({event['elapsed']}초)", flush=True)
+        elif event['event'] == 'token':
+            if not printed_tokens:
+                print("답변: ", end="", flush=True)
+                printed_tokens = True
+            print(event['data'], end="", flush=True)
+        elif event['event'] == 'final':
+            answer = event['data']['answer']
+            if not printed_tokens:
+                print(f"답변: {answer}", end="")
+            print(flush=True)
+        elif event['event'] == 'error':
+            print(f"오류: {event['data']['message']}", flush=True)
+    return answer
@@ -0,0 +1,119 @@
+import json
+import random
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+
+from crewai import BaseLLM
+
+from tracing import span
+
+# 질문 키워드 → 순서대로 호출할 (도구 이름, 입력). 입력의 {question}, {student_id}는 실행 시 채워집니다.
+DEFAULT_SCRIPTS = [
+    {'keywords': ['추천'], 'steps': [
+        ['student_db_tool', {'query': "내 정보 조회"}],
+        ['recommendation_engine_tool', {'student_id': "{student_id}"}]
+    ]},
+    {'keywords': ['졸업'], 'steps': [['graduation_rag_tool', {'query': "{question}"}]]},
+    {'keywords': ['이수', '들은 과목', '성적'], 'steps': [['enrollments_search_tool', {'query': "{question}"}]]},
+    {'keywords': ['내 정보', '학적', '비슷한'], 'steps': [['student_db_tool', {'query': "{question}"}]]},
+    {'keywords': ['과목', '강의', '학기'], 'steps': [['course_search_tool', {'query': "{question}"}]]},
+]
+_QUESTION_PATTERN = re.compile(r'사용자의 질문에 답해주세요:\s*(.+)', re.S)
+
+
+class StubLLMStats:
+    """stub LLM 호출 수와 도구 결과 오류 수를 집계합니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.calls = 0
+            self.tool_steps = 0
+            self.tool_errors = 0
+
+    def record(self, tool_step: bool, tool_error: bool):
+        with self._lock:
+            self.calls += 1
+            self.tool_steps += tool_step
+            self.tool_errors += tool_error
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {'calls': self.calls, 'tool_steps': self.tool_steps, 'tool_errors': self.tool_errors}
+
+
+stub_llm_stats = StubLLMStats()
+
+
+def _message_text(message) -> str:
+    content = message.get('content', '') if isinstance(message, dict) else str(message)
+    if isinstance(content, list):
+        return ''.join(block.get('text', '') for block in content if isinstance(block, dict))
+    return str(content)
+
+
+class StubLLM(BaseLLM):
+    """Bedrock 대신 미리 정한 순서로 도구를 호출하는 로컬 LLM입니다 (부하 테스트용).
+
+    질문 키워드로 스크립트를 고르고, 대화에 쌓인 assistant 메시지 수로 현재 단계를 판단해
+    ReAct 형식(Action/Action Input 또는 Final Answer) 텍스트를 반환합니다.
+    호출마다 think_ms ± jitter_ms 동안 대기해 모델 응답 시간을 흉내 냅니다.
+    """
+
+    def __init__(self, scripts: Optional[List[Dict]] = None, think_ms: float = 800, jitter_ms: float = 200,
+                 student_id: str = '', seed: Optional[int] = None):
+        super().__init__(model='stub/scripted', temperature=0)
+        self.scripts = scripts or DEFAULT_SCRIPTS
+        self.think_ms = think_ms
+        self.jitter_ms = jitter_ms
+        self.student_id = student_id
+        self._random = random.Random(seed)
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def supports_stop_words(self) -> bool:
+        return True
+
+    def get_context_window_size(self) -> int:
+        return 8192
+
+    def _steps_for(self, question: str) -> List:
+        for script in self.scripts:
+            if any(keyword in question for keyword in script['keywords']):
+                return script['steps']
+        return []
+
+    def _fill(self, value: str, question: str) -> str:
+        return value.replace('{question}', question).replace('{student_id}', self.student_id)
+
+    def call(self, messages, *args, **kwargs) -> str:
+        if isinstance(messages, str):
+            messages = [{'role': 'user', 'content': messages}]
+        with span('llm', component='agent'):
+            delay = max(0.0, self.think_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms))
+            time.sleep(delay / 1000)
+
+            text = '\n'.join(_message_text(m) for m in messages if m.get('role') == 'user')
+            match = _QUESTION_PATTERN.search(text)
+            question = match.group(1).strip().splitlines()[0] if match else text[-200:]
+            steps = self._steps_for(question)
+            history = [_message_text(m) for m in messages if m.get('role') == 'assistant']
+            last_observation = history[-1].split('Observation:')[-1].strip() if history else ''
+
+            if len(history) < len(steps):
+                tool_name, tool_input = steps[len(history)]
+                tool_input = {key: self._fill(value, question) for key, value in tool_input.items()}
+                stub_llm_stats.record(tool_step=True, tool_error='오류' in last_observation)
+                return (f"Thought: {tool_name} 도구로 조회합니다.\n"
+                        f"Action: {tool_name}\n"
+                        f"Action Input: {json.dumps(tool_input, ensure_ascii=False)}")
+
+            stub_llm_stats.record(tool_step=False, tool_error='오류' in last_observation)
+            answer = last_observation[:500] or "해당 정보를 찾을 수 없습니다"
+            return f"Thought: 조회 결과로 답변합니다.\nFinal Answer: {answer}"
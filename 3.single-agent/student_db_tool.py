@@ -1,8 +1,26 @@
-import os
-import mysql.connector
 from crewai.tools import BaseTool
 from typing import Type
 from pydantic import BaseModel, Field
+from config import get_session_student_name
+from db import get_connection, READ
+from repository import Repository
+from compact_output import is_compact_mode, encode_rows
+from tool_memo import memoize_tool_run
+from tracing import traced_tool_run
+
+# 압축 출력 모드의 열 이름 매핑
+STUDENT_COMPACT_COLUMNS = {
+    '학생이름': 'name',
+    '학번': 'sid',
+    '이수학기': 'sems',
+    '입학년도': 'adm',
+    '소속': 'dept'
+}
+STUDENT_STATS_COMPACT_COLUMNS = {
+    '소속': 'dept',
+    '학생수': 'cnt',
+    '평균이수학기': 'avg_sems'
+}
 
 class StudentDBToolInput(BaseModel):
     """Input schema for StudentDBTool."""
@@ -24,79 +42,46 @@ class StudentDBTool(BaseTool):
     """
     args_schema: Type[BaseModel] = StudentDBToolInput
 
+    def _classify_query(self, query: str) -> str:
+        """자연어 쿼리를 처리 분기(my_info, similar, help)로 분류합니다."""
+        if "내" in query and ("정보" in query or "학적" in query):
+            return 'my_info'
+        if "나와 비슷한" in query or "같은 조건" in query:
+            return 'similar'
+        return 'help'
+
+    def _memo_key(self, query: str) -> str:
+        """같은 분기로 처리되는 입력은 같은 결과를 내므로 분기 이름을 메모 키로 사용합니다."""
+        return self._classify_query(query)
+
+    @traced_tool_run
+    @memoize_tool_run
     def _run(self, query: str) -> str:
         """Execute database query for authenticated student information."""
         try:
             # Database connection
-            connection = mysql.connector.connect(
-                host=os.environ["RDS_HOST"],
-                port=int(os.environ["RDS_PORT"]),
-                database=os.environ["RDS_DATABASE"],
-                user=os.environ["RDS_USERNAME"],
-                password=os.environ["RDS_PASSWORD"]
-            )
-            cursor = connection.cursor(dictionary=True)
+            connection = get_connection(READ)
+            repository = Repository(connection)
             
             # 현재 인증된 학생 (시뮬레이션용 - 실제로는 세션에서 가져옴)
-            # 테스트를 위해 도윤정 학생으로 설정
-            authenticated_student = "도윤정"
+            authenticated_student = get_session_student_name('student_db')
             
             # 자연어 쿼리 처리 - 개인정보 보호 준수
-            if "내" in query and ("정보" in query or "학적" in query):
+            query_type = self._classify_query(query)
+            if query_type == 'my_info':
                 # 본인 정보 조회
-                sql_query = """
-                SELECT 
-                    s.name as 학생이름,
-                    s.student_id as 학번,
-                    s.completed_semester as 이수학기,
-                    s.admission_year as 입학년도,
-                    CASE 
-                        WHEN m.major_name IS NOT NULL THEN 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
-                        ELSE 
-                            CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
-                    END as 소속
-                FROM students s
-                LEFT JOIN major m ON s.major_code = m.major_code
-                WHERE s.name = %s
-                """
-                cursor.execute(sql_query, (authenticated_student,))
-                results = cursor.fetchall()
+                results = repository.student_profile(authenticated_student)
                 
-            elif "나와 비슷한" in query or "같은 조건" in query:
+            elif query_type == 'similar':
                 # 본인과 비슷한 조건의 학생들 통계 (익명화)
                 # 먼저 본인 정보 조회
-                sql_query = """
-                SELECT s.major_code, s.completed_semester, s.admission_year
-                FROM students s
-                WHERE s.name = %s
-                """
-                cursor.execute(sql_query, (authenticated_student,))
-                my_info = cursor.fetchone()
+                my_info = repository.student_keys(authenticated_student)
                 
                 if my_info:
                     # 비슷한 조건의 학생 수 조회 (개인정보 제외)
-                    sql_query = """
-                    SELECT 
-                        COUNT(*) as 학생수,
-                        CASE 
-                            WHEN m.major_name IS NOT NULL THEN 
-                                CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''), ' ', m.major_name)
-                            ELSE 
-                                CONCAT(COALESCE(m.college, ''), ' ', COALESCE(m.department, ''))
-                        END as 소속,
-                        AVG(s.completed_semester) as 평균이수학기
-                    FROM students s
-                    LEFT JOIN major m ON s.major_code = m.major_code
-                    WHERE s.major_code = %s AND s.admission_year = %s
-                    GROUP BY s.major_code, m.college, m.department, m.major_name
-                    """
-                    cursor.execute(sql_query, (my_info['major_code'], my_info['admission_year']))
-                    results = cursor.fetchall()
+                    results = repository.similar_student_stats(my_info['major_code'], my_info['admission_year'])
                 else:
                     return "본인 정보를 찾을 수 없습니다."
-                    
-
             
             else:
                 return """
@@ -113,6 +98,12 @@ class StudentDBTool(BaseTool):
             if not results:
                 return "조회된 데이터가 없습니다."
             
+            # 압축 출력 모드: 장식 없이 열 기반 JSON으로 반환 (문장 정리는 최종 답변 단계에서)
+            if is_compact_mode():
+                if '학생수' in results[0]:
+                    return encode_rows('student_stats', results, STUDENT_STATS_COMPACT_COLUMNS, dept_column='소속')
+                return encode_rows('student', results, STUDENT_COMPACT_COLUMNS, dept_column='소속')
+            
             # 결과 포맷팅
             if len(results) == 1:
                 # 단일 정보 상세 표시
@@ -132,6 +123,5 @@ class StudentDBTool(BaseTool):
         except Exception as e:
             return f"데이터베이스 오류: {str(e)}"
         finally:
-            if 'connection' in locals() and connection.is_connected():
-                cursor.close()
+            if 'connection' in locals():
                 connection.close()
\ No newline at end of file
@@ -0,0 +1,268 @@
+import argparse
+import random
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List
+
+# 단과대학 → [(학과, 전공)] (전공이 없으면 None)
+COLLEGES = {
+    '인문대학': [('국어국문학과', None), ('영어영문학과', None), ('중어중문학과', None), ('한국역사학과', None), ('철학과', None)],
+    '사회과학대학': [('심리학과', None), ('경제학과', None), ('사회학과', None), ('정치외교학과', None)],
+    '경영대학': [('경영학과', '경영학'), ('경영학과', '회계학'), ('국제통상학과', None)],
+    '자연과학대학': [('수학과', None), ('물리학과', None), ('화학과', None), ('생명과학과', None), ('통계학과', None)],
+    '공과대학': [('컴퓨터공학과', None), ('소프트웨어학과', None), ('전자공학과', None), ('기계공학과', None), ('화학공학과', None)],
+    '예술대학': [('영상디자인학과', None), ('시각디자인학과', None), ('음악학과', '피아노'), ('음악학과', '성악'), ('체육학과', None)],
+}
+SUBJECT_STEMS = ['개론', '기초', '이론', '실습', '세미나', '특강', '연구방법론', '응용', '고급', '캡스톤디자인', '프로젝트', '원론', '입문', '분석', '설계']
+GENERAL_COURSES = ['글쓰기', '대학영어', '컴퓨팅사고', '인공지능과사회', '통계와데이터', '세계사의이해', '철학의이해', '심리학입문',
+                   '경제생활', '과학기술과윤리', '한국문화', '생활체육', '음악감상', '미술의이해', '창업과혁신', '리더십']
+GENERAL_TYPES = ['교양기초', '교양선택', '핵심교양']
+SURNAMES = '김이박최정강조윤장임한오서신권황안송류홍전고문양손배백허유남심노하곽성차주우구민진나지엄채원천방공현함변염여추도소석선설마길연위표명기반왕금옥육인맹제모탁국어은편용'
+GIVEN_SYLLABLES = '민서준하윤지도현수예은우진영재아연유채시호주원건다인정태경성혜소나리희승'
+GRADES = ['A+', 'A', 'B+', 'B', 'C+', 'C', 'D+', 'D', 'F']
+GRADE_WEIGHTS = [14, 20, 20, 16, 11, 8, 4, 3, 4]
+TARGET_GRADES = ['1', '2', '3', '4', '2-4', '3-4', '전체']
+
+# 도구가 인증 학생으로 사용하는 이름 (합성 데이터에 반드시 한 명씩 존재해야 함)
+FIXED_STUDENTS = {'도윤정': ('영상디자인학과', 2021), '다인장': ('컴퓨터공학과', 2022)}
+
+SCHEMA = [
+    """CREATE TABLE major (
+        major_code VARCHAR(10) PRIMARY KEY,
+        college VARCHAR(50),
+        department VARCHAR(50),
+        dept_code VARCHAR(10),
+        major_name VARCHAR(50)
+    )""",
+    """CREATE TABLE students (
+        student_id VARCHAR(20) PRIMARY KEY,
+        name VARCHAR(50) NOT NULL,
+        major_code VARCHAR(10),
+        admission_year INT,
+        completed_semester INT
+    )""",
+    """CREATE TABLE courses (
+        course_code VARCHAR(20) PRIMARY KEY,
+        course_name VARCHAR(100) NOT NULL,
+        credits INT,
+        course_type VARCHAR(20),
+        department VARCHAR(10),
+        professor VARCHAR(50),
+        note VARCHAR(200),
+        target_grade VARCHAR(10),
+        offered_year INT,
+        offered_semester INT
+    )""",
+    """CREATE TABLE enrollments (
+        student_id VARCHAR(20) NOT NULL,
+        course_code VARCHAR(20) NOT NULL,
+        enrollment_type VARCHAR(20),
+        earned_credits INT,
+        offering_department VARCHAR(10),
+        enrollment_semester VARCHAR(10) NOT NULL,
+        grade VARCHAR(5),
+        PRIMARY KEY (student_id, course_code, enrollment_semester)
+    )""",
+]
+
+
+class SyntheticUniversity:
+    """학사 DB(major, students, courses, enrollments)의 합성 데이터를 만듭니다.
+
+    같은 seed면 같은 데이터가 생성됩니다. 학생/이수 내역은 제너레이터로 만들어
+    수천만 행도 메모리에 올리지 않고 배치 단위로 적재합니다.
+    """
+
+    def __init__(self, students: int = 5000, enrollments: int = 200000, courses_per_major: int = 40, seed: int = 42):
+        self.student_count = students
+        self.enrollment_count = enrollments
+        self.courses_per_major = courses_per_major
+        self.random = random.Random(seed)
+        self.current_year = datetime.now().year
+        self.majors = self._build_majors()
+        self.courses = self._build_courses()
+        self._courses_by_major = {}
+        for course in self.courses:
+            self._courses_by_major.setdefault(course['department'], []).append(course)
+
+    def _name(self) -> str:
+        given = ''.join(self.random.choice(GIVEN_SYLLABLES) for _ in range(2))
+        return self.random.choice(SURNAMES) + given
+
+    def _build_majors(self) -> List[Dict]:
+        majors = []
+        for college_index, (college, departments) in enumerate(COLLEGES.items(), 1):
+            for dept_index, (department, major_name) in enumerate(departments, 1):
+                majors.append({
+                    'major_code': f"M{college_index:02d}{dept_index:02d}",
+                    'college': college,
+                    'department': department,
+                    'dept_code': f"D{college_index:02d}{dept_index:02d}",
+                    'major_name': major_name
+                })
+        return majors
+
+    def _semesters(self) -> List[tuple]:
+        """개설 학기 범위: 4년 전 ~ 내년 (다음/지난/현재 학기 조회에 결과가 있도록)."""
+        return [(year, semester) for year in range(self.current_year - 4, self.current_year + 2) for semester in (1, 2)]
+
+    def _build_courses(self) -> List[Dict]:
+        courses = []
+        semesters = self._semesters()
+        professors = [self._name() for _ in range(max(50, len(self.majors) * 6))]
+        for major in self.majors:
+            subject = (major['major_name'] or major['department']).replace('학과', '')
+            for number in range(1, self.courses_per_major + 1):
+                year, semester = self.random.choice(semesters)
+                courses.append({
+                    'course_code': f"{major['major_code']}{number:03d}",
+                    'course_name': f"{subject}{self.random.choice(SUBJECT_STEMS)}{'' if number <= len(SUBJECT_STEMS) else number}",
+                    'credits': self.random.choice([2, 3, 3, 3]),
+                    'course_type': '전공필수' if number % 4 == 0 else '전공선택',
+                    'department': major['major_code'],
+                    'professor': self.random.choice(professors),
+                    'note': self.random.choice(['', '', '영어강의', '실습 포함', '팀 프로젝트']),
+                    'target_grade': self.random.choice(TARGET_GRADES),
+                    'offered_year': year,
+                    'offered_semester': semester
+                })
+        for number, name in enumerate(GENERAL_COURSES * 3, 1):
+            year, semester = self.random.choice(semesters)
+            courses.append({
+                'course_code': f"G{number:04d}",
+                'course_name': name if number <= len(GENERAL_COURSES) else f"{name}{number // len(GENERAL_COURSES) + 1}",
+                'credits': self.random.choice([1, 2, 3]),
+                'course_type': self.random.choice(GENERAL_TYPES),
+                'department': 'GEN',
+                'professor': self.random.choice(professors),
+                'note': '',
+                'target_grade': '전체',
+                'offered_year': year,
+                'offered_semester': semester
+            })
+        return courses
+
+    def iter_students(self) -> Iterator[Dict]:
+        fixed_majors = {major['department']: major['major_code'] for major in self.majors}
+        for index in range(self.student_count):
+            if index < len(FIXED_STUDENTS):
+                name, (department, admission_year) = list(FIXED_STUDENTS.items())[index]
+                major_code = fixed_majors[department]
+            else:
+                name = self._name()
+                while name in FIXED_STUDENTS:
+                    name = self._name()
+                major_code = self.random.choice(self.majors)['major_code']
+                admission_year = self.random.randint(self.current_year - 7, self.current_year)
+            completed = max(0, min(8, (self.current_year - admission_year) * 2 - self.random.choice([0, 0, 1, 2])))
+            yield {
+                'student_id': f"{admission_year}{index:06d}",
+                'name': name,
+                'major_code': major_code,
+                'admission_year': admission_year,
+                'completed_semester': completed
+            }
+
+    def iter_enrollments(self, students: List[Dict]) -> Iterator[Dict]:
+        """학생별로 전공/교양 과목을 이수 학기에 걸쳐 배분합니다 (합계는 enrollments에 가깝게, 같은 학기 중복 과목은 건너뜀)."""
+        per_student = max(1, self.enrollment_count // max(1, len(students)))
+        remainder = self.enrollment_count - per_student * len(students)
+        general = self._courses_by_major.get('GEN', [])
+        for index, student in enumerate(students):
+            count = per_student + (1 if index < remainder else 0)
+            major_courses = self._courses_by_major.get(student['major_code'], [])
+            semesters = [
+                f"{student['admission_year'] + offset // 2}-{offset % 2 + 1}"
+                for offset in range(max(1, student['completed_semester']))
+            ]
+            seen = set()
+            for _ in range(count):
+                pool = major_courses if major_courses and self.random.random() < 0.65 else general
+                course = self.random.choice(pool)
+                semester = self.random.choice(semesters)
+                if (course['course_code'], semester) in seen:
+                    # 같은 학기 같은 과목은 한 번만 (다른 학기 재수강은 허용), 겹치면 건너뜀
+                    continue
+                seen.add((course['course_code'], semester))
+                grade = self.random.choices(GRADES, GRADE_WEIGHTS)[0]
+                yield {
+                    'student_id': student['student_id'],
+                    'course_code': course['course_code'],
+                    'enrollment_type': course['course_type'],
+                    'earned_credits': 0 if grade == 'F' else course['credits'],
+                    'offering_department': course['department'],
+                    'enrollment_semester': semester,
+                    'grade': grade
+                }
+
+
+def _batched(rows: Iterator[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_into(connection, university: SyntheticUniversity, batch_size: int = 5000, backend: str = 'sqlite') -> Dict:
+    """합성 데이터를 연결된 DB에 적재하고 테이블별 행 수와 소요 시간을 반환합니다."""
+    cursor = connection.cursor()
+    if backend == 'sqlite':
+        # 적재 중에는 저널/동기화를 끄고 마지막에 한 번 기록합니다
+        cursor.execute("PRAGMA journal_mode = OFF")
+        cursor.execute("PRAGMA synchronous = OFF")
+    for table in ('enrollments', 'courses', 'students', 'major'):
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    for statement in SCHEMA:
+        cursor.execute(statement)
+
+    started = time.time()
+    counts = {}
+
+    def insert(table: str, rows: Iterator[Dict]):
+        total = 0
+        for batch in _batched(rows, batch_size):
+            columns = list(batch[0])
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+            cursor.executemany(sql, [tuple(row[column] for column in columns) for row in batch])
+            connection.commit()
+            total += len(batch)
+        counts[table] = total
+
+    insert('major', iter(university.majors))
+    insert('courses', iter(university.courses))
+    students = list(university.iter_students())
+    insert('students', iter(students))
+    insert('enrollments', university.iter_enrollments(students))
+    counts['seconds'] = round(time.time() - started, 1)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="학사 DB 합성 데이터 생성 (SQLite 또는 MySQL)")
+    parser.add_argument('--students', type=int, default=5000, help="학생 수 (예: 50000)")
+    parser.add_argument('--enrollments', type=int, default=200000, help="이수 내역 행 수 (예: 10000000)")
+    parser.add_argument('--courses-per-major', type=int, default=40, help="전공별 과목 수")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite', help="적재 대상 (mysql은 RDS_* 설정 DB를 덮어씀)")
+    parser.add_argument('--sqlite-path', default='nxtclass.sqlite3', help="SQLite 파일 경로")
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    import os
+    os.environ['DB_BACKEND'] = args.backend
+    os.environ['SQLITE_PATH'] = args.sqlite_path
+    from db import get_connection
+
+    university = SyntheticUniversity(args.students, args.enrollments, args.courses_per_major, args.seed)
+    connection = get_connection()
+    try:
+        counts = load_into(connection, university, args.batch_size, args.backend)
+    finally:
+        connection.close()
+    print(f"✅ 합성 데이터 적재 완료 ({args.backend}): {counts}")
+    if args.backend == 'sqlite':
+        print(f"   DB_BACKEND=sqlite SQLITE_PATH={args.sqlite_path} 로 도구와 벤치마크를 실행할 수 있습니다.")
@@ -0,0 +1,107 @@
+import pytest
+
+import answer_cache
+from answer_cache import AnswerCache, DataVersionStamp
+from invalidation import CATALOG_SCOPE, student_scope
+from db import SQLiteConnection
+from synthetic_data import SCHEMA
+
+
+def failing_embed(text):
+    raise RuntimeError("bedrock-embed 회로가 열려 있습니다")
+
+
+def test_embedding_failure_falls_back_to_exact_match():
+    cache = AnswerCache(embed_fn=failing_embed)
+    cache.put("내 정보 알려줘", '2021000000', '2026-2', 'v1/1', "답변", 1.0)
+
+    assert cache.get("내 정보 알려줘", '2021000000', '2026-2', 'v1/1') == "답변"
+    assert cache.get("내 학적 정보", '2021000000', '2026-2', 'v1/1') is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.put("졸업 요건", '2021000000', '2026-2', 'v1', "졸업 답변", 1.0)
+    cache.put("전공 학점", '2021000000', '2026-2', 'v1', "학점 답변", 1.0)
+    assert cache.get("졸업 요건", '2021000000', '2026-2', 'v1') == "졸업 답변"
+
+    cache.put("교양 과목", '2021000000', '2026-2', 'v1', "교양 답변", 1.0)
+
+    assert cache.get("전공 학점", '2021000000', '2026-2', 'v1') is None
+    assert cache.get("졸업 요건", '2021000000', '2026-2', 'v1') == "졸업 답변"
+    assert cache.report()['evictions'] == 1
+
+
+def test_expired_entry_is_not_returned(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache.time, 'time', lambda: now[0])
+    cache = AnswerCache(ttl_seconds=60)
+    cache.put("졸업 요건", '2021000000', '2026-2', 'v1', "졸업 답변", 1.0)
+
+    now[0] += 59
+    assert cache.get("졸업 요건", '2021000000', '2026-2', 'v1') == "졸업 답변"
+    now[0] += 2
+    assert cache.get("졸업 요건", '2021000000', '2026-2', 'v1') is None
+
+
+def test_invalidation_is_scoped_to_the_changed_student():
+    cache = AnswerCache()
+    cache.put("내 학점", '2021000000', '2026-2', 'v1', "첫 학생 답변", 1.0)
+    cache.put("내 학점", '2021000000,2022000001', '2026-2', 'v1', "세션 답변", 1.0)
+    cache.put("내 학점", '2022000002', '2026-2', 'v1', "다른 학생 답변", 1.0)
+
+    cache.invalidate_scope(student_scope('2021000000'))
+
+    assert cache.get("내 학점", '2021000000', '2026-2', 'v1') is None
+    assert cache.get("내 학점", '2021000000,2022000001', '2026-2', 'v1') is None
+    assert cache.get("내 학점", '2022000002', '2026-2', 'v1') == "다른 학생 답변"
+
+    cache.invalidate_scope(CATALOG_SCOPE)
+    assert cache.report()['entries'] == 0
+
+
+@pytest.fixture
+def academic_db(tmp_path):
+    connection = SQLiteConnection(str(tmp_path / 'academic.db'))
+    cursor = connection.cursor()
+    for statement in SCHEMA:
+        cursor.execute(statement)
+    cursor.execute("INSERT INTO major VALUES ('M01', '공과대학', '컴퓨터공학과', 'CSE', '컴퓨터공학')")
+    cursor.execute("INSERT INTO students VALUES ('2022000001', '다인장', 'M01', 2022, 4)")
+    cursor.execute("INSERT INTO courses VALUES ('CSE101', '자료구조', 3, '전공필수', 'M01', '김교수', '', '2', 2026, 2)")
+    cursor.execute("INSERT INTO enrollments VALUES ('2022000001', 'CSE101', '전공필수', 3, 'M01', '2025-2', 'A+')")
+    connection.commit()
+    yield connection
+    connection.close()
+
+
+def _stamp(connection, sql, params=()):
+    cursor = connection.cursor(dictionary=True)
+    cursor.execute(sql, params)
+    row = cursor.fetchone()
+    cursor.close()
+    return f"{row['n']}:{row['h']}"
+
+
+@pytest.mark.parametrize('change', [
+    "UPDATE courses SET professor = '이교수'",
+    "UPDATE courses SET course_type = '전공선택'",
+    "UPDATE courses SET target_grade = '3'",
+    "UPDATE courses SET note = '영어 강의'",
+    "UPDATE major SET major_name = '소프트웨어'",
+])
+def test_catalog_stamp_covers_every_displayed_column(academic_db, change):
+    before = _stamp(academic_db, DataVersionStamp.CATALOG_QUERY)
+    academic_db.cursor().execute(change)
+    assert _stamp(academic_db, DataVersionStamp.CATALOG_QUERY) != before
+
+
+@pytest.mark.parametrize('change', [
+    "UPDATE enrollments SET earned_credits = 0",
+    "UPDATE students SET completed_semester = 5",
+])
+def test_student_stamp_covers_profile_and_enrollments(academic_db, change):
+    params = ('2022000001', '2022000001')
+    before = _stamp(academic_db, DataVersionStamp.STUDENT_QUERY, params)
+    academic_db.cursor().execute(change)
+    assert _stamp(academic_db, DataVersionStamp.STUDENT_QUERY, params) != before
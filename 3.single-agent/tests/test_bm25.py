@@ -0,0 +1,69 @@
+import pytest
+
+import bm25
+from resilience import degradation_scope
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(bm25, '_index', None)
+    monkeypatch.setattr(bm25, '_index_loaded_at', 0.0)
+    monkeypatch.setattr(bm25, '_retry_at', None)
+
+
+def test_failed_build_waits_before_reloading(monkeypatch):
+    loads = []
+
+    def unavailable():
+        loads.append(1)
+        raise ConnectionError("documents DB에 연결할 수 없습니다")
+
+    with degradation_scope() as degraded:
+        assert bm25.get_bm25_index(unavailable, retry_seconds=30) is None
+        assert bm25.get_bm25_index(unavailable, retry_seconds=30) is None
+    assert len(loads) == 1
+    assert degraded == {'bm25'}
+
+    monkeypatch.setattr(bm25, '_retry_at', 0.0)
+    index = bm25.get_bm25_index(lambda: [("졸업 학점은 130학점", {})], retry_seconds=30)
+    assert len(index) == 1
+
+
+def test_failed_refresh_keeps_previous_index():
+    index = bm25.get_bm25_index(lambda: [("졸업 학점은 130학점", {})], refresh_seconds=0)
+
+    def unavailable():
+        raise ConnectionError("documents DB에 연결할 수 없습니다")
+
+    with degradation_scope() as degraded:
+        assert bm25.get_bm25_index(unavailable, refresh_seconds=0) is index
+    assert degraded == {'bm25'}
+
+
+def test_tokenize_strips_particles_and_adds_bigrams():
+    assert bm25.tokenize("졸업논문은 CSE101 3학점") == ['졸업논문', '졸업', '업논', '논문', 'cse101', '3', '학점']
+
+
+def test_search_ranks_matching_documents_and_applies_filters():
+    index = bm25.BM25Index()
+    index.add("졸업논문은 4학년 2학기에 제출합니다", {'category': 'graduation'})
+    index.add("전공 필수 학점은 72학점입니다", {'category': 'credits'})
+    index.add("졸업 요건: 졸업논문과 영어 인증", {'category': 'credits'})
+
+    results = index.search("졸업논문 제출", top_k=2)
+    assert [doc['metadata']['category'] for doc in results] == ['graduation', 'credits']
+    assert results[0]['bm25'] > results[1]['bm25']
+
+    filtered = index.search("졸업논문", filters={'category': 'credits'})
+    assert [doc['content'] for doc in filtered] == ["졸업 요건: 졸업논문과 영어 인증"]
+
+
+def test_reciprocal_rank_fusion_merges_fields_and_favours_agreement():
+    vector = [{'content': 'A', 'similarity': 0.9}, {'content': 'B', 'similarity': 0.8}]
+    keyword = [{'content': 'B', 'bm25': 3.0}, {'content': 'C', 'bm25': 1.0}]
+
+    fused = bm25.reciprocal_rank_fusion([vector, keyword], k=60)
+
+    assert [doc['content'] for doc in fused] == ['B', 'A', 'C']
+    assert fused[0]['similarity'] == 0.8 and fused[0]['bm25'] == 3.0
+    assert fused[0]['rrf_score'] == 1 / 62 + 1 / 61
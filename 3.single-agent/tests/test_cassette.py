@@ -0,0 +1,29 @@
+import pytest
+
+from cassette import Cassette, CassetteEmbeddings, CassetteMiss, fingerprint, normalize_messages
+from embedding_provider import HashingEmbedder, embedding_model_id
+
+
+def test_fingerprint_ignores_date_context():
+    first = normalize_messages([{'role': 'user', 'content': '2026-03-02 기준 수강 추천'}])
+    second = normalize_messages([{'role': 'user', 'content': '2026-09-01 기준 수강 추천'}])
+    assert fingerprint('llm', 'm', first) == fingerprint('llm', 'm', second)
+
+
+def test_embeddings_replay_is_keyed_by_model_id(tmp_path):
+    path = str(tmp_path / 'cassette.jsonl')
+    provider = HashingEmbedder(dimension=16)
+    CassetteEmbeddings(provider, Cassette(path, 'record'), provider.model_id).embed_query("졸업 학점")
+
+    replay = Cassette(path, 'replay')
+    assert CassetteEmbeddings(None, replay, provider.model_id).embed_query("졸업 학점") == provider.embed_query("졸업 학점")
+    with pytest.raises(CassetteMiss):
+        CassetteEmbeddings(None, replay, HashingEmbedder(dimension=32).model_id).embed_query("졸업 학점")
+
+
+def test_embedding_model_id_matches_created_provider(monkeypatch):
+    pytest.importorskip('dotenv')
+    monkeypatch.setenv('RAG_EMBEDDING_DIM', '64')
+    assert embedding_model_id('local') == HashingEmbedder(dimension=64).model_id
+    monkeypatch.setenv('RAG_EMBEDDING_MODEL_ID', 'cohere.embed-multilingual-v3')
+    assert embedding_model_id('bedrock') == 'cohere.embed-multilingual-v3'
@@ -0,0 +1,50 @@
+import context_compression
+from compact_output import estimate_tokens
+from context_compression import CompressionStats, compress_context, mmr_select, select_context
+
+DUPLICATE = "졸업 요건은 전공 학점 72학점 이상입니다. " * 6
+
+
+def test_mmr_skips_near_duplicates():
+    docs = [
+        {'content': "졸업 요건은 전공 72학점 이상입니다.", 'rrf_score': 1.0},
+        {'content': "졸업 요건은 전공 72학점 이상입니다!", 'rrf_score': 0.95},
+        {'content': "교양 과목은 30학점을 이수해야 합니다.", 'rrf_score': 0.5},
+    ]
+
+    assert mmr_select(docs, k=2) == [docs[0], docs[2]]
+    assert mmr_select(docs, k=2, lambda_=1.0) == [docs[0], docs[1]]
+
+
+def test_compression_keeps_relevant_sentences_within_budget():
+    docs = [
+        {'content': "학교 소개입니다. 졸업논문은 4학년 2학기에 제출합니다. 도서관은 9시에 엽니다.", 'source': 'a'},
+        {'content': "식당 메뉴 안내입니다.", 'source': 'b'},
+    ]
+
+    compressed = compress_context("졸업논문 제출 시기", docs, token_budget=400)
+
+    assert compressed == [{'content': "졸업논문은 4학년 2학기에 제출합니다.", 'source': 'a'}]
+
+
+def test_compression_always_keeps_at_least_one_sentence():
+    docs = [{'content': "졸업논문은 4학년 2학기에 제출합니다. 졸업논문 심사는 12월에 진행합니다."}]
+
+    compressed = compress_context("졸업논문", docs, token_budget=1)
+
+    assert compressed == [{'content': "졸업논문은 4학년 2학기에 제출합니다."}]
+
+
+def test_stats_measure_the_mmr_selected_documents(monkeypatch):
+    stats = CompressionStats()
+    monkeypatch.setattr(context_compression, 'compression_stats', stats)
+    candidates = [
+        {'content': DUPLICATE, 'rrf_score': 1.0},
+        {'content': DUPLICATE, 'rrf_score': 0.9},
+        {'content': "교양 학점은 30학점입니다.", 'rrf_score': 0.8},
+    ]
+
+    select_context("졸업 요건", candidates, k=2)
+
+    selected_tokens = estimate_tokens(DUPLICATE) + estimate_tokens("교양 학점은 30학점입니다.")
+    assert stats.report()['original_tokens'] == selected_tokens
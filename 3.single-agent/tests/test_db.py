@@ -0,0 +1,44 @@
+from db import PooledConnection, _limit_query_time
+from resilience import deadline_scope
+
+
+class Connection:
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self, **kwargs):
+        return self
+
+    def execute(self, sql):
+        self.statements.append(sql)
+
+    def close(self):
+        pass
+
+
+def test_query_time_follows_each_request_deadline(monkeypatch):
+    monkeypatch.setenv('DB_BACKEND', 'mysql')
+    monkeypatch.setenv('DB_QUERY_TIMEOUT_MS', '10000')
+    connection = Connection()
+    pooled = PooledConnection(connection, pool=None)
+
+    with deadline_scope(90):
+        _limit_query_time(pooled)
+        _limit_query_time(pooled)
+    assert connection.statements == ["SET SESSION max_execution_time = 10000"]
+
+    with deadline_scope(1):
+        _limit_query_time(pooled)
+    assert pooled.max_execution_ms <= 1000
+
+    # 마감이 짧았던 요청 뒤에 같은 연결을 꺼낸 요청은 다시 기본 제한을 씁니다
+    with deadline_scope(90):
+        _limit_query_time(pooled)
+    assert connection.statements[-1] == "SET SESSION max_execution_time = 10000"
+
+
+def test_sqlite_skips_query_time_limit(monkeypatch):
+    monkeypatch.setenv('DB_BACKEND', 'sqlite')
+    connection = Connection()
+    _limit_query_time(PooledConnection(connection, pool=None))
+    assert connection.statements == []
@@ -0,0 +1,39 @@
+from embedding_cache import EmbeddingCache
+
+
+def test_workers_sharing_a_file_see_each_others_writes(tmp_path):
+    path = str(tmp_path / 'query_embeddings.bin')
+    first = EmbeddingCache(path, capacity=2)
+    second = EmbeddingCache(path, capacity=2)
+
+    first.put('titan', "졸업 요건", [1.0, 0.0])
+    assert second.get('titan', "졸업 요건") == [1.0, 0.0]
+
+    # 두 번째 워커가 슬롯을 채우고 제거해도 첫 번째 워커가 덮어쓴 슬롯의 옛 벡터를 돌려주지 않아야 합니다
+    second.put('titan', "전공 학점", [0.0, 1.0])
+    second.put('titan', "교양 학점", [0.5, 0.5])
+    assert first.get('titan', "졸업 요건") is None
+    assert first.get('titan', "교양 학점") == [0.5, 0.5]
+    assert first.get('titan', "전공 학점") == [0.0, 1.0]
+
+
+def test_dimension_reset_in_one_worker_is_picked_up_by_another(tmp_path):
+    path = str(tmp_path / 'query_embeddings.bin')
+    first = EmbeddingCache(path, capacity=4)
+    second = EmbeddingCache(path, capacity=4)
+    first.put('titan', "졸업 요건", [1.0, 0.0])
+    assert second.get('titan', "졸업 요건") == [1.0, 0.0]
+
+    second.put('cohere', "졸업 요건", [1.0, 2.0, 3.0])
+
+    assert first.get('titan', "졸업 요건") is None
+    assert first.get('cohere', "졸업 요건") == [1.0, 2.0, 3.0]
+
+
+def test_entries_survive_restart(tmp_path):
+    path = str(tmp_path / 'query_embeddings.bin')
+    cache = EmbeddingCache(path, capacity=4)
+    cache.put('titan', "졸업 요건", [1.0, 0.0])
+    cache.close()
+
+    assert EmbeddingCache(path, capacity=4).get('titan', "졸업  요건") == [1.0, 0.0]
@@ -0,0 +1,36 @@
+import pytest
+
+from embedding_provider import CoalescingEmbedder, EmbeddingProvider, HashingEmbedder
+
+
+class AsymmetricProvider(EmbeddingProvider):
+    """질문과 문서를 다르게 임베딩하는 제공자(Cohere input_type) 흉내입니다."""
+
+    model_id = 'fake-asymmetric'
+    dimension = 1
+
+    def embed_documents(self, texts):
+        return [[0.0] for _ in texts]
+
+    def embed_queries(self, texts):
+        return [[1.0] for _ in texts]
+
+
+def test_coalesced_queries_use_query_embeddings():
+    embedder = CoalescingEmbedder(AsymmetricProvider(), max_batch=4, max_wait_ms=1)
+    assert embedder.embed_query("졸업 학점") == [1.0]
+    assert embedder.embed_documents(["문서"]) == [[0.0]]
+
+
+def test_symmetric_provider_queries_match_documents():
+    embedder = HashingEmbedder(dimension=64)
+    assert embedder.embed_query("캡스톤디자인") == embedder.embed_documents(["캡스톤디자인"])[0]
+
+
+def test_provider_without_embed_documents_fails_at_construction():
+    class QueryOnlyProvider(EmbeddingProvider):
+        def embed_queries(self, texts):
+            return [[1.0] for _ in texts]
+
+    with pytest.raises(TypeError):
+        QueryOnlyProvider()
@@ -0,0 +1,92 @@
+import json
+
+import main
+from file_qa import DEGRADED_ERROR, answer_question, load_completed_ids, run_batch
+
+
+def _events(question):
+    if question == '실패':
+        raise KeyError('BEDROCK_MODEL_ID')
+    yield {'event': 'start', 'data': {}, 'elapsed': 0.0}
+    yield {'event': 'final', 'data': {'answer': f"{question} 답변", 'token_usage': {}}, 'elapsed': 0.0}
+
+
+def test_batch_continues_after_question_raises(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'stream_user_query', lambda question, student_id=None: _events(question))
+    questions = tmp_path / 'questions.txt'
+    questions.write_text("첫 질문\n실패\n세 번째 질문\n", encoding='utf-8')
+    output = tmp_path / 'results.jsonl'
+
+    summary = run_batch(str(questions), str(output), concurrency=1, max_retries=0)
+
+    records = {r['id']: r for r in map(json.loads, output.read_text(encoding='utf-8').splitlines())}
+    assert summary['ok'] == 2 and summary['error'] == 1
+    assert records['2']['status'] == 'error' and 'BEDROCK_MODEL_ID' in records['2']['error']
+    assert records['3']['answer'] == "세 번째 질문 답변"
+
+
+def test_degraded_answer_is_retried_and_not_marked_ok(monkeypatch):
+    calls = []
+
+    def degraded(question, student_id=None):
+        calls.append(question)
+        yield {'event': 'final', 'data': {'answer': main.DEGRADED_ANSWER, 'token_usage': {}, 'degraded': True}, 'elapsed': 0.0}
+
+    monkeypatch.setattr(main, 'stream_user_query', degraded)
+    record = answer_question({'id': '1', 'question': "내 정보"}, max_retries=2, backoff=0)
+
+    assert len(calls) == 3
+    assert record['status'] == 'error' and record['error'] == DEGRADED_ERROR
+
+
+def test_resume_skips_only_successful_questions(tmp_path, monkeypatch):
+    asked = []
+
+    def events(question, student_id=None):
+        asked.append(question)
+        return _events(question)
+
+    monkeypatch.setattr(main, 'stream_user_query', events)
+    questions = tmp_path / 'questions.txt'
+    questions.write_text("첫 질문\n두 번째 질문\n세 번째 질문\n", encoding='utf-8')
+    output = tmp_path / 'results.jsonl'
+    output.write_text(
+        json.dumps({'id': '1', 'status': 'ok'}) + '\n'
+        + json.dumps({'id': '2', 'status': 'error'}) + '\n'
+        + '{"id": "3", "sta',   # 중단되며 잘린 마지막 줄
+        encoding='utf-8'
+    )
+
+    assert load_completed_ids(str(output)) == {'1'}
+    run_batch(str(questions), str(output), concurrency=1, max_retries=0)
+    assert sorted(asked) == ["두 번째 질문", "세 번째 질문"]
+
+
+def test_transient_error_is_retried_and_latency_covers_every_attempt(monkeypatch):
+    attempts = []
+
+    def flaky(question, student_id=None):
+        attempts.append(question)
+        if len(attempts) == 1:
+            yield {'event': 'error', 'data': {'message': "ThrottlingException: Rate exceeded"}, 'elapsed': 0.0}
+            return
+        yield {'event': 'final', 'data': {'answer': "답변", 'token_usage': {}}, 'elapsed': 0.0}
+
+    monkeypatch.setattr(main, 'stream_user_query', flaky)
+    record = answer_question({'id': '1', 'question': "졸업 요건"}, max_retries=2, backoff=0.05)
+
+    assert record['status'] == 'ok' and record['attempts'] == 2
+    assert record['latency_s'] >= 0.02 > record['attempt_latency_s']
+
+
+def test_permanent_error_is_not_retried(monkeypatch):
+    attempts = []
+
+    def broken(question, student_id=None):
+        attempts.append(question)
+        yield {'event': 'error', 'data': {'message': "ValidationException: 잘못된 모델 ID"}, 'elapsed': 0.0}
+
+    monkeypatch.setattr(main, 'stream_user_query', broken)
+    record = answer_question({'id': '1', 'question': "졸업 요건"}, max_retries=2, backoff=0)
+
+    assert len(attempts) == 1 and record['status'] == 'error'
@@ -0,0 +1,90 @@
+import pytest
+
+from guarded_query import GuardedQueryError, prepare_select, referenced_tables, run_guarded_select
+
+
+@pytest.mark.parametrize('sql', [
+    "SELECT * FROM courses STRAIGHT_JOIN students",
+    "SELECT * FROM courses c straight_join enrollments e ON 1=1",
+    "SELECT * FROM courses NATURAL JOIN students",
+    "SELECT * FROM courses CROSS JOIN `students`",
+    "SELECT * FROM courses c LEFT OUTER JOIN enrollments e ON c.course_code = e.course_code",
+    "SELECT * FROM courses, nxtclass_db.students",
+    "SELECT * FROM courses, \"students\"",
+    "SELECT * FROM courses c JOIN major m ON c.department = m.major_code, students s",
+    "SELECT * FROM (courses, students)",
+    "SELECT * FROM courses USE INDEX (idx_courses_semester), students",
+])
+def test_rejects_tables_outside_allowlist(sql):
+    with pytest.raises(GuardedQueryError, match='허용하지 않는 테이블'):
+        prepare_select(sql, 200, 'mysql', 2000)
+
+
+@pytest.mark.parametrize('sql', [
+    "SELECT * FROM students",
+    "SELECT * FROM courses WHERE course_code IN (SELECT course_code FROM enrollments)",
+    "SELECT * FROM courses UNION SELECT name, student_id FROM students",
+    "SELECT * FROM courses; DELETE FROM courses",
+    "SELECT * FROM courses -- comment",
+    "DELETE FROM courses",
+])
+def test_rejects_other_statements(sql):
+    with pytest.raises(GuardedQueryError):
+        prepare_select(sql, 200, 'mysql', 2000)
+
+
+def test_allows_course_queries_with_major_join():
+    sql = ("SELECT c.course_name as 과목명, CONCAT(m.college, ' ', m.department) FROM courses c "
+           "LEFT JOIN major m ON c.department = m.major_code "
+           "WHERE c.note LIKE '%FROM students%' AND c.credits IN (2, 3) LIMIT 500")
+    assert referenced_tables(sql) == {'courses', 'major'}
+    statement = prepare_select(sql, 200, 'mysql', 2000)
+    assert statement.startswith("SELECT /*+ MAX_EXECUTION_TIME(2000) */")
+    assert statement.endswith("LIMIT 201")
+
+
+def test_limit_keeps_smaller_value_and_offset():
+    assert prepare_select("SELECT * FROM courses LIMIT 10, 5", 200, 'sqlite', 2000).endswith("LIMIT 5 OFFSET 10")
+
+
+class UnbufferedCursor:
+    """읽지 않은 행이 남은 채 닫으면 오류를 내는 mysql.connector 비버퍼 커서 흉내입니다."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.description = None
+
+    def execute(self, statement):
+        pass
+
+    def fetchmany(self, size):
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def fetchall(self):
+        return self.fetchmany(len(self.rows))
+
+    def close(self):
+        if self.rows:
+            raise RuntimeError("Unread result found")
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def cursor(self, **kwargs):
+        if kwargs.get('dictionary'):
+            return UnbufferedCursor(list(self.rows))
+        cursor = UnbufferedCursor([])
+        cursor.description = [('rows',)]
+        return cursor
+
+
+def test_byte_budget_drains_unread_rows(monkeypatch):
+    monkeypatch.setenv('COURSE_SQL_MAX_BYTES', '100')
+    monkeypatch.setenv('COURSE_SQL_FETCH_SIZE', '5')
+    rows = [{'course_name': 'x' * 30} for _ in range(40)]
+    result = run_guarded_select(FakeConnection(rows), "SELECT course_name FROM courses", 'mysql')
+    assert result['truncated']
+    assert len(result['rows']) == 3
@@ -0,0 +1,111 @@
+import pytest
+
+from answer_cache import AnswerCache
+from change_tracking import VersionWatcher, install
+from db import SQLiteConnection
+from invalidation import CATALOG_SCOPE, InvalidationBus, invalidation_bus, scope_student_id, student_scope
+from tool_memo import ToolCallMemo, clear_session_memo, get_session_memo
+
+SCHEMA = [
+    "CREATE TABLE major (major_code TEXT PRIMARY KEY, major_name TEXT)",
+    "CREATE TABLE courses (course_code TEXT PRIMARY KEY, course_name TEXT)",
+    "CREATE TABLE students (student_id TEXT PRIMARY KEY, name TEXT)",
+    "CREATE TABLE enrollments (student_id TEXT, course_code TEXT, grade TEXT)",
+]
+
+
+@pytest.fixture
+def database(tmp_path):
+    path = str(tmp_path / 'academic.db')
+    connection = SQLiteConnection(path)
+    cursor = connection.cursor()
+    for statement in SCHEMA:
+        cursor.execute(statement)
+    cursor.execute("INSERT INTO students VALUES ('2021000000', '도윤정'), ('2022000001', '다인장')")
+    connection.commit()
+    install(connection, 'sqlite')
+    yield connection, lambda: SQLiteConnection(path)
+    connection.close()
+
+
+@pytest.fixture
+def subscribed_cache():
+    cache = AnswerCache()
+    invalidation_bus.subscribe('test_answer_cache', cache.invalidate_scope)
+    yield cache
+    invalidation_bus.unsubscribe('test_answer_cache')
+
+
+def test_scope_helpers():
+    assert scope_student_id(student_scope('2021000000')) == '2021000000'
+    assert scope_student_id(CATALOG_SCOPE) is None
+
+
+def test_bus_keeps_publishing_after_subscriber_error():
+    bus, received = InvalidationBus(), []
+
+    def broken(scope):
+        raise RuntimeError(scope)
+
+    bus.subscribe('broken', broken)
+    bus.subscribe('ok', received.append)
+    bus.publish(['catalog', 'student:1'])
+    assert received == ['catalog', 'student:1']
+    assert bus.report()['published'] == 2
+
+
+def test_enrollment_insert_invalidates_only_that_students_answers(database, subscribed_cache):
+    connection, connect = database
+    cache = subscribed_cache
+    watcher = VersionWatcher(connect, poll_interval=0, overlap=5)
+    assert watcher.poll() == []
+
+    cache.put("내 성적", '2021000000,2022000001', '2026-2', 'v0/0.0', '이전 답변', 1.0)
+    cache.put("내 성적", '2023000002', '2026-2', 'v0/0', '다른 학생 답변', 1.0)
+
+    cursor = connection.cursor()
+    cursor.execute("INSERT INTO enrollments VALUES ('2022000001', 'CS101', 'A+')")
+    connection.commit()
+
+    assert watcher.poll() == [student_scope('2022000001')]
+    assert cache.get("내 성적", '2021000000,2022000001', '2026-2', 'v0/0.0') is None
+    assert cache.get("내 성적", '2023000002', '2026-2', 'v0/0') == '다른 학생 답변'
+    assert watcher.version(student_scope('2022000001')) == 1
+
+
+def test_catalog_change_clears_every_answer(database, subscribed_cache):
+    connection, connect = database
+    cache = subscribed_cache
+    watcher = VersionWatcher(connect, poll_interval=0, overlap=5)
+    watcher.poll()
+    cache.put("전공 과목", '2023000002', '2026-2', 'v0/0', '답변', 1.0)
+
+    cursor = connection.cursor()
+    cursor.execute("INSERT INTO courses VALUES ('CS102', '자료구조')")
+    connection.commit()
+
+    assert watcher.poll() == [CATALOG_SCOPE]
+    assert cache.report()['entries'] == 0
+
+
+def test_session_memo_cleared_by_member_student():
+    memo = get_session_memo('2021000000,2022000001', ttl_seconds=60)
+    other = get_session_memo('2023000002', ttl_seconds=60)
+    for session in (memo, other):
+        session.call('student_db_tool', 'q', lambda: 'result')
+
+    clear_session_memo('2022000001')
+    assert memo.report()['calls'] == 1 and not memo._results
+    assert other._results
+
+
+def test_memo_does_not_store_tool_errors():
+    memo, calls = ToolCallMemo(), []
+
+    def run():
+        calls.append(1)
+        return "데이터베이스 오류: connection refused"
+
+    memo.call('student_db_tool', 'q', run)
+    memo.call('student_db_tool', 'q', run)
+    assert len(calls) == 2
@@ -0,0 +1,55 @@
+import time
+
+from replicas import ReplicaRouter
+from resilience import DeadlineExceeded
+
+
+class Connection:
+    def cursor(self, **kwargs):
+        return self
+
+    def execute(self, sql):
+        pass
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+def test_choose_does_not_check_inline():
+    opened = []
+    router = ReplicaRouter(['r1'], lambda target: opened.append(target) or Connection(), 'sqlite', check_seconds=60)
+    assert router.choose() is None
+    assert opened == []
+
+
+def test_background_check_enables_replicas():
+    router = ReplicaRouter(['r1', 'r2'], lambda target: Connection(), 'sqlite', check_seconds=60)
+    router.start()
+    try:
+        deadline = time.monotonic() + 2
+        while not all(replica.healthy for replica in router.replicas) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert {router.choose(), router.choose()} == {'r1', 'r2'}
+    finally:
+        router.stop()
+
+
+def test_deadline_does_not_mark_replica_down():
+    router = ReplicaRouter(['r1'], lambda target: Connection(), 'sqlite')
+    router.check_all()
+    assert router.replicas[0].healthy
+
+    def out_of_time(target):
+        raise DeadlineExceeded("요청 처리 시간이 초과되었습니다")
+
+    router.connect = out_of_time
+    router.check_all()
+    assert router.replicas[0].healthy
+
+    router.connect = lambda target: (_ for _ in ()).throw(ConnectionError("refused"))
+    router.check_all()
+    assert not router.replicas[0].healthy
+    assert router.choose() is None
@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+import resilience
+from resilience import (CircuitBreaker, CircuitOpenError, DeadlineExceeded, deadline_scope, degradation_scope,
+                        is_transient, mark_degraded, resilient_call)
+
+
+@pytest.fixture(autouse=True)
+def fresh_breakers(monkeypatch):
+    monkeypatch.setattr(resilience, '_breakers', {})
+    monkeypatch.setenv('TESTDEP_BREAKER_FAILURES', '2')
+    monkeypatch.setenv('TESTDEP_BREAKER_RESET_SECONDS', '0.05')
+
+
+def test_transient_errors_are_retried_then_open_the_breaker():
+    calls = []
+
+    def down():
+        calls.append(1)
+        raise ConnectionError("refused")
+
+    with pytest.raises(ConnectionError):
+        resilient_call('testdep', down, retries=5, base_delay=0)
+    assert len(calls) == 2
+    with pytest.raises(CircuitOpenError):
+        resilient_call('testdep', lambda: 'ok')
+
+    time.sleep(0.06)
+    assert resilient_call('testdep', lambda: 'ok') == 'ok'
+    assert resilience.get_breaker('testdep').state == 'closed'
+
+
+def test_non_transient_errors_are_not_failures():
+    with pytest.raises(ZeroDivisionError):
+        resilient_call('testdep', lambda: 1 / 0)
+    assert resilience.get_breaker('testdep').report()['failures'] == 0
+
+
+def test_half_open_trial_interrupted_by_base_exception_is_released():
+    breaker = resilience.get_breaker('testdep')
+    breaker.state, breaker.opened_at = 'open', time.monotonic() - 1
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        resilient_call('testdep', interrupted)
+    assert resilient_call('testdep', lambda: 'ok') == 'ok'
+
+
+def test_half_open_rejects_concurrent_calls():
+    breaker = CircuitBreaker('x', failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_deadline_stops_new_calls():
+    with deadline_scope(0.01):
+        time.sleep(0.02)
+        with pytest.raises(DeadlineExceeded):
+            resilient_call('testdep', lambda: 'ok')
+
+
+def test_inner_degradation_reaches_outer_scope():
+    with degradation_scope() as outer:
+        with degradation_scope():
+            mark_degraded('vector_search')
+    assert outer == {'vector_search'}
+
+
+def test_transient_classification():
+    class MySQLError(Exception):
+        errno = 2013
+
+    assert is_transient(MySQLError())
+    assert is_transient(TimeoutError())
+    assert not is_transient(ValueError())
+    assert not is_transient(DeadlineExceeded())
@@ -0,0 +1,58 @@
+import tool_memo
+from resilience import mark_degraded
+from tool_memo import ToolCallMemo
+
+
+def test_equivalent_inputs_share_one_call():
+    memo = ToolCallMemo()
+    runs = []
+
+    def run():
+        runs.append(1)
+        return "과목 목록"
+
+    first = memo.call('CourseSearchTool', tool_memo.normalize_tool_input("다음 학기  개설 과목?"), run)
+    second = memo.call('CourseSearchTool', tool_memo.normalize_tool_input("다음 학기 개설 과목"), run)
+
+    assert first == second == "과목 목록" and len(runs) == 1
+    assert memo.report()['by_tool']['CourseSearchTool'] == {'calls': 2, 'duplicates_avoided': 1}
+
+
+def test_error_and_degraded_results_are_not_memoized():
+    memo = ToolCallMemo()
+    runs = []
+
+    def failing():
+        runs.append(1)
+        return "데이터베이스 오류: Lost connection"
+
+    def degraded():
+        runs.append(1)
+        mark_degraded('mysql')
+        return "일부 정보만 조회했습니다"
+
+    memo.call('StudentDBTool', "내 정보", failing)
+    memo.call('StudentDBTool', "내 정보", failing)
+    memo.call('EnrollmentsSearchTool', "이수 과목", degraded)
+    memo.call('EnrollmentsSearchTool', "이수 과목", degraded)
+
+    assert len(runs) == 4
+
+
+def test_session_memo_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tool_memo.time, 'time', lambda: now[0])
+    memo = ToolCallMemo(ttl_seconds=60)
+    runs = []
+
+    def run():
+        runs.append(1)
+        return "졸업 요건"
+
+    memo.call('GraduationRAGTool', "졸업 요건", run)
+    now[0] += 30
+    memo.call('GraduationRAGTool', "졸업 요건", run)
+    now[0] += 31
+    memo.call('GraduationRAGTool', "졸업 요건", run)
+
+    assert len(runs) == 2
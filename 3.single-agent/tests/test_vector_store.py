@@ -0,0 +1,24 @@
+from vector_store import LocalVectorStore
+
+
+def test_build_from_no_rows_returns_empty_store(tmp_path):
+    store = LocalVectorStore.build(str(tmp_path / 'index'), [])
+    assert len(store) == 0
+    assert store.search([0.1, 0.2], top_k=3) == []
+    assert store.load_documents() == []
+
+
+def test_build_quantized_from_no_rows(tmp_path):
+    store = LocalVectorStore.build(str(tmp_path / 'index'), [], quantize=True)
+    assert store.search([1.0], top_k=3, filters={'department': '컴퓨터공학과'}) == []
+
+
+def test_search_filters_by_metadata(tmp_path):
+    rows = [
+        ('컴공 졸업 130학점', {'department': '컴퓨터공학과', 'admission_year': 2021}, [1.0, 0.0, 0.0]),
+        ('경영 졸업 120학점', {'department': '경영학과', 'admission_year': 2021}, [0.9, 0.1, 0.0]),
+        ('컴공 캡스톤 필수', {'department': '컴퓨터공학과', 'admission_year': 2022}, [0.0, 1.0, 0.0]),
+    ]
+    store = LocalVectorStore.build(str(tmp_path / 'index'), rows, m=2)
+    results = store.search([1.0, 0.0, 0.0], top_k=2, filters={'department': '컴퓨터공학과'})
+    assert [result['content'] for result in results] == ['컴공 졸업 130학점', '컴공 캡스톤 필수']
@@ -0,0 +1,192 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from invalidation import CATALOG_SCOPE, invalidation_bus, scope_student_id
+from resilience import degradation_scope, mark_degraded
+
+# 도구가 실패했을 때 반환하는 메시지 머리말 (이런 결과와 이를 바탕으로 한 답변은 저장하지 않습니다)
+TOOL_ERROR_PREFIXES = ('데이터베이스 오류', '수강 추천 중 오류', '졸업 요건 정보 검색 중 오류')
+
+# 현재 요청(crew.kickoff 한 번)에 적용되는 메모이제이션 범위
+current_tool_memo = contextvars.ContextVar('current_tool_memo', default=None)
+
+
+def normalize_tool_input(value: Any) -> Any:
+    """도구 입력을 정규화합니다 (유니코드 정규화, 공백 정리, 끝 문장부호 제거)."""
+    if isinstance(value, str):
+        text = unicodedata.normalize('NFKC', value)
+        return ' '.join(text.split()).strip(' .?!~')
+    return value
+
+
+class ToolCallMemo:
+    """도구 호출 결과를 (도구 이름, 정규화된 입력) 기준으로 저장합니다.
+
+    ttl_seconds가 있으면 세션 단위로 재사용할 때 오래된 결과를 버립니다.
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = ttl_seconds
+        self._results = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.duplicates_avoided = 0
+        self.by_tool = {}
+
+    def call(self, tool_name: str, memo_key: Any, run: Callable[[], str]) -> str:
+        """캐시된 결과가 있으면 반환하고, 없으면 실행해 저장합니다."""
+        key = (tool_name, json.dumps(memo_key, ensure_ascii=False, sort_keys=True, default=str))
+        now = time.time()
+        with self._lock:
+            self.calls += 1
+            counters = self.by_tool.setdefault(tool_name, {'calls': 0, 'duplicates_avoided': 0})
+            counters['calls'] += 1
+            entry = self._results.get(key)
+            if entry and (self.ttl_seconds is None or now - entry[1] < self.ttl_seconds):
+                self.duplicates_avoided += 1
+                counters['duplicates_avoided'] += 1
+                return entry[0]
+
+        with degradation_scope() as degraded:
+            result = run()
+        # 오류 메시지와 의존성 장애로 축소된 결과는 다음 호출에서 재시도할 수 있도록 저장하지 않습니다.
+        if not degraded and not str(result).startswith(TOOL_ERROR_PREFIXES):
+            with self._lock:
+                self._results[key] = (result, now)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'duplicates_avoided': self.duplicates_avoided,
+                'by_tool': {name: dict(counters) for name, counters in self.by_tool.items()}
+            }
+
+
+class ToolMemoStats:
+    """요청별 메모 결과를 누적한 전체 통계입니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.calls = 0
+        self.duplicates_avoided = 0
+        self.by_tool = {}
+
+    def merge(self, memo_report: Dict):
+        with self._lock:
+            self.requests += 1
+            self.calls += memo_report['calls']
+            self.duplicates_avoided += memo_report['duplicates_avoided']
+            for name, counters in memo_report['by_tool'].items():
+                total = self.by_tool.setdefault(name, {'calls': 0, 'duplicates_avoided': 0})
+                total['calls'] += counters['calls']
+                total['duplicates_avoided'] += counters['duplicates_avoided']
+
+    def report(self) -> Dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'calls': self.calls,
+                'duplicates_avoided': self.duplicates_avoided,
+                'by_tool': {name: dict(counters) for name, counters in self.by_tool.items()}
+            }
+
+
+tool_memo_stats = ToolMemoStats()
+_session_memos = {}
+_session_lock = threading.Lock()
+
+
+def get_session_memo(session_id: str, ttl_seconds: float) -> ToolCallMemo:
+    """세션(학생) 단위로 여러 요청에 걸쳐 재사용하는 메모를 반환합니다. session_id는 학번(여러 명이면 쉼표로 구분)입니다."""
+    with _session_lock:
+        memo = _session_memos.get(session_id)
+        if memo is None:
+            memo = ToolCallMemo(ttl_seconds=ttl_seconds)
+            _session_memos[session_id] = memo
+    return memo
+
+
+def clear_session_memo(student_id: Optional[str] = None):
+    """student_id 학생이 들어 있는 세션(없으면 모든 세션)의 메모를 비웁니다 (데이터 변경 시)."""
+    with _session_lock:
+        memos = [memo for session_id, memo in _session_memos.items()
+                 if student_id is None or student_id in session_id.split(',')]
+    for memo in memos:
+        memo.clear()
+
+
+def _on_data_change(scope: str):
+    # 세션 메모는 학번별이므로 학생 범위는 그 학생만, 카탈로그 변경은 모든 세션을 비웁니다
+    student_id = scope_student_id(scope)
+    if scope == CATALOG_SCOPE or student_id is not None:
+        clear_session_memo(student_id)
+
+
+invalidation_bus.subscribe('tool_memo', _on_data_change)
+
+
+@contextmanager
+def tool_memo_scope(memo: Optional[ToolCallMemo] = None):
+    """블록 안의 도구 호출을 하나의 메모로 묶습니다 (기본: 요청 단위 새 메모)."""
+    memo = memo or ToolCallMemo()
+    before = memo.report()
+    token = current_tool_memo.set(memo)
+    try:
+        yield memo
+    finally:
+        current_tool_memo.reset(token)
+        after = memo.report()
+        # 세션 메모를 재사용하는 경우 이번 요청에서 늘어난 만큼만 합산합니다.
+        tool_memo_stats.merge({
+            'calls': after['calls'] - before['calls'],
+            'duplicates_avoided': after['duplicates_avoided'] - before['duplicates_avoided'],
+            'by_tool': {
+                name: {
+                    'calls': counters['calls'] - before['by_tool'].get(name, {}).get('calls', 0),
+                    'duplicates_avoided': counters['duplicates_avoided'] - before['by_tool'].get(name, {}).get('duplicates_avoided', 0)
+                }
+                for name, counters in after['by_tool'].items()
+            }
+        })
+
+
+def memoize_tool_run(run: Callable) -> Callable:
+    """BaseTool._run 데코레이터입니다. 메모 범위 안에서는 같은 입력의 반복 호출을 재사용합니다.
+
+    도구에 _memo_key(**kwargs) 메서드가 있으면 그 값을 키로 사용해
+    실질적으로 같은 결과를 내는 입력(예: '내 정보', '내 정보 조회해주세요')을 하나로 봅니다.
+    """
+    def run_checked(self, *args, **kwargs):
+        result = run(self, *args, **kwargs)
+        # 오류 결과를 본 답변은 답변 캐시에 넣지 않도록 표시합니다
+        if str(result).startswith(TOOL_ERROR_PREFIXES):
+            mark_degraded(f"tool:{self.name}")
+        return result
+
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        memo = current_tool_memo.get()
+        if memo is None:
+            return run_checked(self, *args, **kwargs)
+        if hasattr(self, '_memo_key'):
+            memo_key = self._memo_key(*args, **kwargs)
+        else:
+            memo_key = {
+                'args': [normalize_tool_input(value) for value in args],
+                'kwargs': {name: normalize_tool_input(value) for name, value in kwargs.items()}
+            }
+        return memo.call(self.name, memo_key, lambda: run_checked(self, *args, **kwargs))
+    return wrapper
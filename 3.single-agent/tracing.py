@@ -0,0 +1,311 @@
+import argparse
+import bisect
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# 히스토그램 구간 (초)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# None이면 첫 확인 때 .env를 읽은 뒤 TRACING 값으로 정합니다 (import 시점에는 .env가 아직 로드되지 않았을 수 있음)
+_enabled: Optional[bool] = None
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+def is_tracing_enabled() -> bool:
+    """추적 사용 여부 (TRACING=1). 꺼져 있으면 span()은 아무 일도 하지 않습니다."""
+    global _enabled
+    if _enabled is None:
+        from config import load_env
+
+        load_env()
+        _enabled = os.environ.get('TRACING', '0') == '1'
+    return _enabled
+
+
+def set_tracing_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+class Histogram:
+    """고정 구간 누적 히스토그램입니다 (Prometheus histogram과 같은 형식)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q: float) -> float:
+        """구간 상한으로 근사한 분위수를 반환합니다."""
+        if not self.count:
+            return 0.0
+        target, running = q * self.count, 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            running += count
+            if running >= target:
+                return bound if bound != float('inf') else BUCKETS[-1]
+        return BUCKETS[-1]
+
+
+class MetricsRegistry:
+    """(component, stage)별 소요 시간 히스토그램과 최근 추적 기록을 보관합니다."""
+
+    def __init__(self, history_size: int = 100):
+        self._lock = threading.Lock()
+        self.histograms: Dict[tuple, Histogram] = {}
+        self.traces = deque(maxlen=history_size)
+
+    def observe(self, component: str, stage: str, seconds: float):
+        with self._lock:
+            histogram = self.histograms.get((component, stage))
+            if histogram is None:
+                histogram = self.histograms[(component, stage)] = Histogram()
+            histogram.observe(seconds)
+
+    def add_trace(self, trace: Dict):
+        with self._lock:
+            self.traces.append(trace)
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.traces.clear()
+
+    def to_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식으로 변환합니다."""
+        name = 'nxtclass_stage_duration_seconds'
+        lines = [f"# HELP {name} 도구/에이전트 단계별 소요 시간", f"# TYPE {name} histogram"]
+        with self._lock:
+            for (component, stage), histogram in sorted(self.histograms.items()):
+                labels = f'component="{component}",stage="{stage}"'
+                running = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    running += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {running}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def to_json(self, include_traces: bool = True) -> Dict:
+        """단계별 요약(건수, 합계, p50/p95)과 최근 추적 기록을 반환합니다."""
+        with self._lock:
+            stages = [
+                {
+                    'component': component,
+                    'stage': stage,
+                    'count': histogram.count,
+                    'total_ms': round(histogram.sum * 1000, 2),
+                    'avg_ms': round(histogram.sum / histogram.count * 1000, 2) if histogram.count else 0.0,
+                    'p50_ms': round(histogram.quantile(0.5) * 1000, 2),
+                    'p95_ms': round(histogram.quantile(0.95) * 1000, 2)
+                }
+                for (component, stage), histogram in sorted(self.histograms.items())
+            ]
+            traces = list(self.traces) if include_traces else []
+        return {'stages': stages, 'traces': traces}
+
+
+metrics = MetricsRegistry()
+
+
+class _NoopSpan:
+    """추적이 꺼져 있을 때 쓰는 공용 빈 span입니다."""
+
+    trace_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class Span:
+    """component/stage 하나의 소요 시간을 재는 span입니다.
+
+    부모 span의 component를 물려받으므로 도구 안의 DB 호출은 그 도구 이름으로 집계됩니다.
+    부모에 child_seconds를 더해 두어, 도구 span은 하위 단계를 뺀 자체 처리 시간(format)도 기록합니다.
+    """
+
+    def __init__(self, stage: str, component: Optional[str] = None, record_self: bool = False):
+        parent = _current_span.get()
+        self.stage = stage
+        self.component = component or (parent.component if parent else 'app')
+        self.parent = parent
+        self.record_self = record_self
+        self.child_seconds = 0.0
+        self.attributes = {}
+        self.trace = _current_trace.get()
+        self.trace_id = self.trace['trace_id'] if self.trace else None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        metrics.observe(self.component, self.stage, elapsed)
+        if self.record_self:
+            metrics.observe(self.component, 'format', max(0.0, elapsed - self.child_seconds))
+        if self.parent is not None:
+            self.parent.child_seconds += elapsed
+        if self.trace is not None:
+            entry = {
+                'component': self.component,
+                'stage': self.stage,
+                'start_ms': round((self._started - self.trace['_started']) * 1000, 2),
+                'duration_ms': round(elapsed * 1000, 2)
+            }
+            if exc_type is not None:
+                entry['error'] = exc_type.__name__
+            if self.attributes:
+                entry.update(self.attributes)
+            self.trace['spans'].append(entry)
+        return False
+
+
+def span(stage: str, component: Optional[str] = None, record_self: bool = False):
+    """`with span('sql'):` 형태로 단계 소요 시간을 기록합니다. 추적이 꺼져 있으면 빈 span을 반환합니다."""
+    if not is_tracing_enabled():
+        return _NOOP
+    return Span(stage, component, record_self)
+
+
+@contextmanager
+def start_trace(question: str = ''):
+    """질문 하나에 대한 추적을 시작합니다. 블록 안의 span은 같은 trace_id로 묶입니다."""
+    if not is_tracing_enabled():
+        yield None
+        return
+    trace = {
+        'trace_id': uuid.uuid4().hex[:16],
+        'question': question,
+        'started_at': time.time(),
+        '_started': time.perf_counter(),
+        'spans': []
+    }
+    token = _current_trace.set(trace)
+    try:
+        with Span('request', component='process_user_query'):
+            yield trace
+    finally:
+        _current_trace.reset(token)
+        trace['duration_ms'] = round((time.perf_counter() - trace.pop('_started')) * 1000, 2)
+        metrics.add_trace(trace)
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace['trace_id'] if trace else None
+
+
+def traced_tool_run(run):
+    """BaseTool._run 데코레이터입니다. 도구 전체 시간(total)과 하위 단계를 뺀 처리 시간(format)을 기록합니다."""
+    @functools.wraps(run)
+    def wrapper(self, *args, **kwargs):
+        if not is_tracing_enabled():
+            return run(self, *args, **kwargs)
+        with Span('total', component=self.name, record_self=True):
+            return run(self, *args, **kwargs)
+    return wrapper
+
+
+class TracedCursor:
+    """execute를 sql 단계로, fetch*를 fetch 단계로 기록하는 커서 래퍼입니다."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        with span('sql'):
+            return self._cursor.execute(*args, **kwargs)
+
+    def fetchone(self):
+        with span('fetch'):
+            return self._cursor.fetchone()
+
+    def fetchall(self):
+        with span('fetch'):
+            return self._cursor.fetchall()
+
+    def fetchmany(self, *args, **kwargs):
+        with span('fetch'):
+            return self._cursor.fetchmany(*args, **kwargs)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class TracedConnection:
+    """cursor()가 TracedCursor를 반환하는 연결 래퍼입니다."""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self._connection.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def write_metrics(path: str):
+    """확장자에 따라 Prometheus 텍스트(.prom) 또는 JSON으로 지표를 저장합니다."""
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.prom'):
+            f.write(metrics.to_prometheus())
+        else:
+            json.dump(metrics.to_json(), f, ensure_ascii=False, indent=2)
+
+
+def print_summary(stages: List[Dict]):
+    print(f"{'component':<32} {'stage':<14} {'count':>6} {'avg_ms':>9} {'p50_ms':>9} {'p95_ms':>9}")
+    for stage in stages:
+        print(f"{stage['component']:<32} {stage['stage']:<14} {stage['count']:>6} "
+              f"{stage['avg_ms']:>9} {stage['p50_ms']:>9} {stage['p95_ms']:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="질문을 추적하며 실행하고 단계별 소요 시간을 출력")
+    parser.add_argument('questions', nargs='+', help="실행할 질문")
+    parser.add_argument('--output', help="지표 저장 경로 (.prom이면 Prometheus 텍스트, 그 외 JSON)")
+    args = parser.parse_args()
+
+    set_tracing_enabled(True)
+    from main import process_user_query
+
+    for question in args.questions:
+        process_user_query(question)
+    print_summary(metrics.to_json(include_traces=False)['stages'])
+    if args.output:
+        write_metrics(args.output)
+        print(f"\n지표 저장: {args.output}")
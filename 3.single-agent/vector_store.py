@@ -0,0 +1,423 @@
+import argparse
+import heapq
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 필터에 맞는 행이 이보다 적으면 그래프 탐색 대신 해당 행만 정확히 계산합니다.
+EXACT_SCAN_LIMIT = 2000
+
+
+def _parse_metadata(metadata) -> Dict:
+    if isinstance(metadata, str):
+        return json.loads(metadata) if metadata else {}
+    return metadata or {}
+
+
+class PgVectorStore:
+    """PostgreSQL pgvector documents 테이블을 사용하는 벡터 저장소입니다."""
+
+    backend = 'pgvector'
+
+    def __init__(self, connect: Callable):
+        self.connect = connect
+
+    def search(self, query_embedding: List[float], top_k: int = 5, filters: Optional[Dict] = None) -> List[Dict]:
+        """코사인 유사도 상위 top_k 문서를 반환합니다.
+
+        filters({'department': ..., 'admission_year': ...})가 있으면 metadata JSONB 조건
+        (GIN 인덱스 사용)으로 먼저 후보를 좁힌 뒤 유사도 순으로 정렬합니다.
+        """
+        import psycopg2.extras
+
+        conn = self.connect()
+        try:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+            where_clause = ""
+            params = [query_embedding]
+            if filters:
+                where_clause = "WHERE metadata @> %s::jsonb"
+                params.append(json.dumps(filters, ensure_ascii=False))
+                # 필터가 있으면 HNSW 탐색이 조건에 맞는 후보를 충분히 찾도록 반복 탐색을 허용합니다
+                try:
+                    cursor.execute("SET LOCAL hnsw.iterative_scan = relaxed_order")
+                except Exception:
+                    # pgvector 0.8 미만에서는 지원하지 않으므로 트랜잭션을 되돌리고 계속합니다
+                    conn.rollback()
+                cursor.execute("SET LOCAL hnsw.ef_search = %s", (max(40, top_k * 4),))
+            params.extend([query_embedding, top_k])
+
+            # 벡터 유사도 검색 (코사인 유사도 사용)
+            cursor.execute(f"""
+                SELECT
+                    content,
+                    metadata,
+                    1 - (embedding <=> %s::vector) as similarity
+                FROM documents
+                {where_clause}
+                ORDER BY embedding <=> %s::vector
+                LIMIT %s
+            """, params)
+
+            return [
+                {
+                    'content': row['content'],
+                    'metadata': _parse_metadata(row['metadata']),
+                    'similarity': float(row['similarity'])
+                }
+                for row in cursor.fetchall()
+            ]
+        finally:
+            conn.close()
+
+    def load_documents(self) -> List[Tuple[str, Dict]]:
+        """BM25 색인용 (content, metadata) 목록을 반환합니다."""
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT content, metadata FROM documents")
+            return [(content, _parse_metadata(metadata)) for content, metadata in cursor.fetchall()]
+        finally:
+            conn.close()
+
+    def iter_rows(self) -> Iterable[Tuple[str, Dict, List[float]]]:
+        """로컬 색인 내보내기용으로 (content, metadata, embedding)을 반환합니다."""
+        conn = self.connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT content, metadata, embedding::text FROM documents WHERE embedding IS NOT NULL ORDER BY id")
+            for content, metadata, embedding in cursor.fetchall():
+                yield content, _parse_metadata(metadata), json.loads(embedding)
+        finally:
+            conn.close()
+
+
+class LocalVectorStore:
+    """서비스 없이 동작하는 로컬 벡터 저장소입니다.
+
+    디렉터리 구성:
+    - header.json: 개수, 차원, 그래프 차수(m), 진입점, 양자화 여부
+    - vectors.f32: 정규화된 float32 임베딩 행렬 (메모리 맵, 최종 재정렬용)
+    - vectors.i8, scales.f32: 행별 스케일의 int8 양자화 행렬 (선택, 그래프 탐색용)
+    - graph.i32: 노드별 이웃 m개 (-1은 빈 칸)
+    - metadata.jsonl: 행별 content와 metadata
+
+    검색은 HNSW 하위 계층과 같은 방식의 근접 그래프 빔 탐색으로 후보를 모은 뒤
+    float32 벡터로 정확히 다시 정렬합니다. 필터에 맞는 행이 적으면 그 행들만 전부 계산합니다.
+    """
+
+    backend = 'local'
+
+    def __init__(self, path: str, ef_search: int = 64):
+        import numpy as np
+
+        self.path = path
+        self.ef_search = ef_search
+        with open(os.path.join(path, 'header.json'), 'r', encoding='utf-8') as f:
+            self.header = json.load(f)
+        count, dim = self.header['count'], self.header['dim']
+
+        self.vectors = self._open_matrix('vectors.f32', np.float32, (count, dim))
+        self.graph = self._open_matrix('graph.i32', np.int32, (count, self.header['m']))
+        if self.header.get('quantized'):
+            self.quantized = self._open_matrix('vectors.i8', np.int8, (count, dim))
+            self.scales = self._open_matrix('scales.f32', np.float32, (count,))
+        else:
+            self.quantized = None
+
+        self.documents = []
+        with open(os.path.join(path, 'metadata.jsonl'), 'r', encoding='utf-8') as f:
+            for line in f:
+                self.documents.append(json.loads(line))
+
+        # metadata 필드 값 → 행 번호 목록 (필터용)
+        postings = {}
+        for row, doc in enumerate(self.documents):
+            for key, value in doc['metadata'].items():
+                if isinstance(value, (str, int)):
+                    postings.setdefault(key, {}).setdefault(str(value), []).append(row)
+        self._postings = {
+            key: {value: np.array(rows, dtype=np.int64) for value, rows in values.items()}
+            for key, values in postings.items()
+        }
+
+    def _open_matrix(self, name: str, dtype, shape: tuple):
+        """행렬 파일을 메모리 맵으로 엽니다. 문서가 없으면 빈 파일은 mmap할 수 없으므로 빈 배열을 반환합니다."""
+        import numpy as np
+
+        if not shape[0]:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(os.path.join(self.path, name), dtype=dtype, mode='r', shape=shape)
+
+    def __len__(self):
+        return self.header['count']
+
+    def _allowed_rows(self, filters: Optional[Dict]):
+        """filters를 모두 만족하는 행 번호 배열을 반환합니다 (filters가 없으면 None)."""
+        import numpy as np
+
+        if not filters:
+            return None
+        allowed = None
+        for key, value in filters.items():
+            rows = self._postings.get(key, {}).get(str(value))
+            if rows is None:
+                return np.array([], dtype=np.int64)
+            allowed = rows if allowed is None else np.intersect1d(allowed, rows, assume_unique=True)
+        return allowed
+
+    def _approx_scores(self, query, rows):
+        if self.quantized is None:
+            return self.vectors[rows] @ query
+        return (self.quantized[rows].astype('float32') @ query) * self.scales[rows]
+
+    def _beam_search(self, query, ef: int, allowed_mask) -> List[int]:
+        """그래프를 따라가며 쿼리와 가까운 노드를 ef개까지 찾고, 필터에 맞는 방문 노드를 반환합니다."""
+        import numpy as np
+
+        entry = self.header['entry']
+        visited = np.zeros(len(self), dtype=bool)
+        visited[entry] = True
+        entry_score = float(self._approx_scores(query, np.array([entry]))[0])
+        candidates = [(-entry_score, entry)]
+        nearest = [(entry_score, entry)]
+        matched = {}
+        if allowed_mask is None or allowed_mask[entry]:
+            matched[entry] = entry_score
+
+        while candidates:
+            negative_score, node = heapq.heappop(candidates)
+            if len(nearest) >= ef and -negative_score < nearest[0][0]:
+                break
+            neighbors = self.graph[node]
+            neighbors = neighbors[neighbors >= 0]
+            neighbors = neighbors[~visited[neighbors]]
+            if not len(neighbors):
+                continue
+            visited[neighbors] = True
+            for neighbor, score in zip(neighbors.tolist(), self._approx_scores(query, neighbors).tolist()):
+                if len(nearest) < ef or score > nearest[0][0]:
+                    heapq.heappush(candidates, (-score, neighbor))
+                    heapq.heappush(nearest, (score, neighbor))
+                    if len(nearest) > ef:
+                        heapq.heappop(nearest)
+                if allowed_mask is None or allowed_mask[neighbor]:
+                    matched[neighbor] = score
+        return sorted(matched, key=matched.get, reverse=True)[:ef]
+
+    def search(self, query_embedding: List[float], top_k: int = 5, filters: Optional[Dict] = None) -> List[Dict]:
+        """_search_vector_db와 같은 형식({'content', 'metadata', 'similarity'})으로 상위 top_k를 반환합니다."""
+        import numpy as np
+
+        if not len(self):
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        allowed = self._allowed_rows(filters)
+        if allowed is not None and not len(allowed):
+            return []
+
+        if len(self) <= EXACT_SCAN_LIMIT or (allowed is not None and len(allowed) <= EXACT_SCAN_LIMIT):
+            candidates = allowed if allowed is not None else np.arange(len(self))
+        else:
+            allowed_mask = None
+            if allowed is not None:
+                allowed_mask = np.zeros(len(self), dtype=bool)
+                allowed_mask[allowed] = True
+            candidates = np.array(self._beam_search(query, max(self.ef_search, top_k * 4), allowed_mask), dtype=np.int64)
+            if len(candidates) < top_k and allowed is not None:
+                # 그래프 탐색으로 필터 조건에 맞는 후보를 충분히 못 찾으면 해당 행 전체를 계산합니다
+                candidates = allowed
+
+        # float32 벡터로 정확한 코사인 유사도를 계산해 다시 정렬합니다
+        scores = self.vectors[candidates] @ query
+        order = np.argsort(-scores)[:top_k]
+        return [
+            {
+                'content': self.documents[int(candidates[i])]['content'],
+                'metadata': self.documents[int(candidates[i])]['metadata'],
+                'similarity': float(scores[i])
+            }
+            for i in order
+        ]
+
+    def load_documents(self) -> List[Tuple[str, Dict]]:
+        return [(doc['content'], doc['metadata']) for doc in self.documents]
+
+    @staticmethod
+    def build(path: str, rows: Iterable[Tuple[str, Dict, List[float]]], m: int = 16,
+              ef_construction: int = 64, quantize: bool = False) -> 'LocalVectorStore':
+        """(content, metadata, embedding) 목록으로 로컬 색인을 만듭니다."""
+        import numpy as np
+
+        rows = list(rows)
+        os.makedirs(path, exist_ok=True)
+        count = len(rows)
+        dim = len(rows[0][2]) if rows else 0
+
+        vectors = np.array([embedding for _, _, embedding in rows], dtype=np.float32).reshape(count, dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        graph = np.full((count, m), -1, dtype=np.int32)
+        for node in range(1, count):
+            # 이미 삽입된 노드(0..node-1)에서 가까운 후보를 찾아 양방향으로 연결합니다
+            nearest = _build_search(vectors, graph, vectors[node], ef_construction, node)
+            chosen = _select_neighbors(vectors, node, nearest, m)
+            graph[node, :len(chosen)] = chosen
+            for neighbor in chosen:
+                links = graph[neighbor]
+                links = links[links >= 0]
+                if len(links) < m:
+                    graph[neighbor, len(links)] = node
+                else:
+                    merged = np.append(links, node)
+                    merged = merged[np.argsort(-(vectors[merged] @ vectors[neighbor]))].tolist()
+                    keep = _select_neighbors(vectors, neighbor, merged, m)
+                    graph[neighbor] = -1
+                    graph[neighbor, :len(keep)] = keep
+
+        # 전체 평균에 가장 가까운 노드를 진입점으로 사용합니다
+        entry = int(np.argmax(vectors @ vectors.mean(axis=0))) if count else 0
+
+        vectors.tofile(os.path.join(path, 'vectors.f32'))
+        graph.tofile(os.path.join(path, 'graph.i32'))
+        if quantize:
+            scales = np.abs(vectors).max(axis=1, initial=0.0) / 127.0
+            scales[scales == 0] = 1.0
+            np.round(vectors / scales[:, None]).astype(np.int8).tofile(os.path.join(path, 'vectors.i8'))
+            scales.astype(np.float32).tofile(os.path.join(path, 'scales.f32'))
+        with open(os.path.join(path, 'metadata.jsonl'), 'w', encoding='utf-8') as f:
+            for content, metadata, _ in rows:
+                f.write(json.dumps({'content': content, 'metadata': metadata}, ensure_ascii=False) + '\n')
+        with open(os.path.join(path, 'header.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'count': count, 'dim': dim, 'm': m, 'entry': entry, 'quantized': quantize}, f)
+        return LocalVectorStore(path)
+
+
+def _select_neighbors(vectors, node: int, candidates: List[int], m: int) -> List[int]:
+    """HNSW 이웃 선택 휴리스틱: 이미 고른 이웃보다 node에 더 가까운 후보를 우선 고릅니다.
+
+    가까운 후보만 m개 고르면 군집 사이 연결이 끊기므로, 서로 다른 방향의 이웃을 남기고
+    남는 자리는 가까운 순서로 채웁니다. candidates는 node와의 유사도 내림차순이어야 합니다.
+    """
+    import numpy as np
+
+    selected, skipped = [], []
+    for candidate in candidates:
+        if len(selected) >= m:
+            break
+        if candidate == node:
+            continue
+        similarity = float(vectors[candidate] @ vectors[node])
+        if selected and float(np.max(vectors[selected] @ vectors[candidate])) > similarity:
+            skipped.append(candidate)
+        else:
+            selected.append(candidate)
+    return selected + skipped[:m - len(selected)]
+
+
+def _build_search(vectors, graph, query, ef: int, limit: int) -> List[int]:
+    """색인 구축 중 0..limit-1 노드에서 query와 가까운 노드를 유사도 순으로 반환합니다."""
+    import numpy as np
+
+    if limit <= ef:
+        scores = vectors[:limit] @ query
+        return np.argsort(-scores).tolist()
+
+    visited = {0}
+    start = float(vectors[0] @ query)
+    candidates = [(-start, 0)]
+    nearest = [(start, 0)]
+    while candidates:
+        negative_score, node = heapq.heappop(candidates)
+        if len(nearest) >= ef and -negative_score < nearest[0][0]:
+            break
+        neighbors = [n for n in graph[node].tolist() if n >= 0 and n not in visited]
+        if not neighbors:
+            continue
+        visited.update(neighbors)
+        for neighbor, score in zip(neighbors, (vectors[neighbors] @ query).tolist()):
+            if len(nearest) < ef or score > nearest[0][0]:
+                heapq.heappush(candidates, (-score, neighbor))
+                heapq.heappush(nearest, (score, neighbor))
+                if len(nearest) > ef:
+                    heapq.heappop(nearest)
+    return [node for _, node in sorted(nearest, reverse=True)]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_vector_store(connect: Callable):
+    """RAG_VECTOR_STORE 설정(pgvector 기본, local)에 맞는 공용 벡터 저장소를 반환합니다."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            if os.environ.get('RAG_VECTOR_STORE', 'pgvector') == 'local':
+                _store = LocalVectorStore(
+                    os.environ.get('RAG_LOCAL_INDEX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'rag_index')),
+                    ef_search=int(os.environ.get('RAG_LOCAL_EF_SEARCH', '64'))
+                )
+            else:
+                _store = PgVectorStore(connect)
+    return _store
+
+
+def compare_backends(pg_store: PgVectorStore, local_store: LocalVectorStore, queries: int = 50, top_k: int = 5) -> Dict:
+    """저장된 임베딩을 쿼리로 사용해 두 저장소의 지연 시간과 로컬 색인의 recall@k를 비교합니다."""
+    import random
+
+    samples = random.sample(range(len(local_store)), min(queries, len(local_store)))
+    latencies = {'pgvector': [], 'local': []}
+    recall_hits = 0
+    for row in samples:
+        query = local_store.vectors[row].tolist()
+        started = time.perf_counter()
+        expected = pg_store.search(query, top_k)
+        latencies['pgvector'].append(time.perf_counter() - started)
+        started = time.perf_counter()
+        found = local_store.search(query, top_k)
+        latencies['local'].append(time.perf_counter() - started)
+        recall_hits += len({doc['content'] for doc in expected} & {doc['content'] for doc in found})
+
+    def percentile(values, p):
+        values = sorted(values)
+        return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 2) if values else 0.0
+
+    return {
+        'queries': len(samples),
+        **{f"{name}_p50_ms": percentile(values, 0.5) for name, values in latencies.items()},
+        **{f"{name}_p95_ms": percentile(values, 0.95) for name, values in latencies.items()},
+        f"local_recall@{top_k}": round(recall_hits / (len(samples) * top_k), 3) if samples else 0.0
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="졸업 요건 RAG 로컬 벡터 색인 관리")
+    parser.add_argument('--path', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'rag_index'), help="로컬 색인 디렉터리")
+    parser.add_argument('--export', action='store_true', help="pgvector documents 테이블에서 로컬 색인 생성")
+    parser.add_argument('--quantize', action='store_true', help="그래프 탐색용 int8 양자화 행렬도 생성")
+    parser.add_argument('--m', type=int, default=16, help="노드별 이웃 수")
+    parser.add_argument('--ef-construction', type=int, default=64, help="구축 시 탐색 폭")
+    parser.add_argument('--compare', type=int, default=0, help="N개 쿼리로 pgvector와 지연 시간/recall 비교")
+    args = parser.parse_args()
+
+    from graduation_rag_tool import GraduationRAGTool
+
+    pg_store = PgVectorStore(GraduationRAGTool()._get_db_connection)
+    if args.export:
+        started = time.time()
+        store = LocalVectorStore.build(args.path, pg_store.iter_rows(), m=args.m,
+                                       ef_construction=args.ef_construction, quantize=args.quantize)
+        print(f"✅ {len(store)}개 문서 → {args.path} ({time.time() - started:.1f}초)")
+    if args.compare:
+        for key, value in compare_backends(pg_store, LocalVectorStore(args.path), args.compare).items():
+            print(f"{key}: {value}")